@@ -0,0 +1,86 @@
+"""add_rollup_views
+
+Revision ID: a3d5e8f1c7b2
+Revises: f4a9c2e7b1d3
+Create Date: 2026-10-18 18:41:07.903552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+import os
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d5e8f1c7b2'
+down_revision: Union[str, Sequence[str], None] = 'f4a9c2e7b1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Refreshed by `cli.py --refresh-rollups`, the unique indexes allow REFRESH ... CONCURRENTLY
+ROLLUPS = {
+    # One row per collection group and day, from the dense snapshots (delta snapshots are repeated every day)
+    'collection_group_daily_stats': ("""
+        CREATE MATERIALIZED VIEW collection_group_daily_stats AS
+        SELECT
+            s.collection_group_id,
+            s.created_at::date AS day,
+            (ARRAY_AGG(s.taux_remplissage ORDER BY s.created_at DESC))[1] AS taux_remplissage,
+            (ARRAY_AGG(s.nb_places_restantes_st ORDER BY s.created_at DESC))[1] AS nb_places_restantes_st,
+            (ARRAY_AGG(s.nb_places_totales_st ORDER BY s.created_at DESC))[1] AS nb_places_totales_st,
+            (ARRAY_AGG(s.nb_places_reservees_st ORDER BY s.created_at DESC))[1] AS nb_places_reservees_st,
+            MIN(s.nb_places_restantes_st) AS min_places_restantes_st,
+            MAX(s.nb_places_restantes_st) AS max_places_restantes_st,
+            MIN(s.nb_places_restantes_pla) AS min_places_restantes_pla,
+            MAX(s.nb_places_restantes_pla) AS max_places_restantes_pla,
+            MIN(s.nb_places_restantes_cpa) AS min_places_restantes_cpa,
+            MAX(s.nb_places_restantes_cpa) AS max_places_restantes_cpa,
+            COUNT(*) AS n_snapshots,
+            MAX(s.created_at) AS last_snapshot_at
+        FROM collection_group_snapshots_dense s
+        GROUP BY s.collection_group_id, s.created_at::date
+        WITH DATA
+    """, ['collection_group_id', 'day']),
+    # One row per event and day, with the collection group of the event
+    'schedule_daily_stats': ("""
+        CREATE MATERIALIZED VIEW schedule_daily_stats AS
+        SELECT
+            s.event_id,
+            s.created_at::date AS day,
+            e.collection_group_id,
+            (ARRAY_AGG(s.total_slots ORDER BY s.created_at DESC))[1] AS total_slots,
+            MIN(s.total_slots) AS min_total_slots,
+            MAX(s.total_slots) AS max_total_slots,
+            COUNT(*) AS n_snapshots,
+            MAX(s.created_at) AS last_snapshot_at
+        FROM schedules s
+        JOIN collection_events e ON e.id = s.event_id
+        GROUP BY s.event_id, s.created_at::date, e.collection_group_id
+        WITH DATA
+    """, ['event_id', 'day']),
+}
+
+
+def upgrade() -> None:
+    """Create the daily rollups read by the Grafana dashboards."""
+
+    grafana_user = os.getenv('POSTGRES_GRAFANA_USER', 'grafana_reader')
+
+    connection = op.get_bind()
+
+    for view, (definition, unique_columns) in ROLLUPS.items():
+        connection.execute(text(definition))
+        op.create_index(f'ux_{view}', view, unique_columns, unique=True)
+        connection.execute(text(f"GRANT SELECT ON {view} TO {grafana_user}"))
+
+    op.create_index('ix_schedule_daily_stats_collection_group_id', 'schedule_daily_stats', ['collection_group_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop the daily rollups."""
+    connection = op.get_bind()
+
+    for view in ROLLUPS:
+        connection.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {view}"))
@@ -0,0 +1,70 @@
+"""fix_dense_snapshots_view
+
+Revision ID: d2b7e4a9c1f3
+Revises: c7e2a9d4f610
+Create Date: 2026-10-18 21:07:35.418296
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b7e4a9c1f3'
+down_revision: Union[str, Sequence[str], None] = 'c7e2a9d4f610'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Same columns as collection_group_snapshots, a snapshot valid several days is repeated on each day of `{days}`
+DENSE_VIEW = """
+    CREATE OR REPLACE VIEW collection_group_snapshots_dense AS
+    SELECT
+        s.id,
+        s.taux_remplissage,
+        s.nb_places_restantes_st,
+        s.nb_places_totales_st,
+        s.nb_places_reservees_st,
+        s.nb_places_restantes_pla,
+        s.nb_places_totales_pla,
+        s.nb_places_reservees_pla,
+        s.nb_places_restantes_cpa,
+        s.nb_places_totales_cpa,
+        s.nb_places_reservees_cpa,
+        serie.created_at,
+        s.valid_until,
+        s.collection_group_id
+    FROM collection_group_snapshots s
+    CROSS JOIN LATERAL ({days}) AS serie(created_at);
+"""
+
+# Every day from created_at to valid_until, and valid_until for the day less than 24h after the last one
+DAYS = """
+    SELECT generate_series(s.created_at, COALESCE(s.valid_until, s.created_at), INTERVAL '1 day')
+    UNION
+    SELECT COALESCE(s.valid_until, s.created_at)
+"""
+
+# Days of b5a0e7c2d914, missing valid_until when it is less than 24h after the last day
+PREVIOUS_DAYS = """
+    SELECT generate_series(s.created_at, COALESCE(s.valid_until, s.created_at), INTERVAL '1 day')
+"""
+
+
+def upgrade() -> None:
+    """Emit the valid_until day of the snapshots in the dense view."""
+
+    connection = op.get_bind()
+
+    # Same columns, the grants and the views depending on it are kept
+    connection.execute(text(DENSE_VIEW.format(days=DAYS)))
+
+
+def downgrade() -> None:
+    """Restore the previous days of the dense view."""
+
+    connection = op.get_bind()
+
+    connection.execute(text(DENSE_VIEW.format(days=PREVIOUS_DAYS)))
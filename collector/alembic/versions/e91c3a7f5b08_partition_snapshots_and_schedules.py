@@ -0,0 +1,132 @@
+"""partition_snapshots_and_schedules
+
+Revision ID: e91c3a7f5b08
+Revises: b5a0e7c2d914
+Create Date: 2026-10-18 17:11:52.730466
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+import os
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e91c3a7f5b08'
+down_revision: Union[str, Sequence[str], None] = 'b5a0e7c2d914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Foreign key and indexes of each table, they are recreated on the new table
+TABLES = {
+    'collection_group_snapshots': {
+        'foreign_key': ('collection_group_id', 'collection_groups'),
+        'indexes': {'ix_collection_group_snapshots_created_at': 'created_at'},
+    },
+    'schedules': {
+        'foreign_key': ('event_id', 'collection_events'),
+        'indexes': {'ix_schedules_efs_id': 'efs_id'},
+    },
+}
+
+# Partitions created in advance, the next ones are created by `cli.py --maintenance`
+MONTHS_AHEAD = 3
+
+# View on the snapshots table, dropped before the rebuild and recreated with the same definition afterwards
+DENSE_VIEW = 'collection_group_snapshots_dense'
+
+
+def _month_start(day: date, offset: int = 0) -> date:
+    month = day.year * 12 + day.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def _drop_view(connection) -> str:
+    """Drop the dense view, return its definition"""
+    definition = connection.execute(text(f"SELECT pg_get_viewdef('{DENSE_VIEW}'::regclass)")).scalar()
+    connection.execute(text(f"DROP VIEW {DENSE_VIEW}"))
+    return definition
+
+
+def _rebuild_table(connection, table: str, partitioned: bool) -> None:
+    """Copy the table into a new partitioned (or regular) table with the same name"""
+    config = TABLES[table]
+    old_table = f"{table}_old"
+    sequence = connection.execute(text(f"SELECT pg_get_serial_sequence('{table}', 'id')")).scalar()
+
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {old_table}"))
+    connection.execute(text(f"ALTER TABLE {old_table} RENAME CONSTRAINT {table}_pkey TO {old_table}_pkey"))
+    for index in config['indexes']:
+        connection.execute(text(f"ALTER INDEX {index} RENAME TO {index}_old"))
+
+    if partitioned:
+        connection.execute(text(
+            f"CREATE TABLE {table} (LIKE {old_table} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+        ))
+        connection.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)"))
+    else:
+        connection.execute(text(f"CREATE TABLE {table} (LIKE {old_table} INCLUDING DEFAULTS)"))
+        connection.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)"))
+
+    column, referred_table = config['foreign_key']
+    connection.execute(text(
+        f"ALTER TABLE {table} ADD FOREIGN KEY ({column}) REFERENCES {referred_table} (id) ON DELETE CASCADE"
+    ))
+    for index, index_column in config['indexes'].items():
+        connection.execute(text(f"CREATE INDEX {index} ON {table} ({index_column})"))
+
+    if partitioned:
+        first_day = connection.execute(text(f"SELECT MIN(created_at)::date FROM {old_table}")).scalar()
+        month = _month_start(first_day or date.today())
+        last_month = _month_start(date.today(), MONTHS_AHEAD)
+        while month <= last_month:
+            connection.execute(text(
+                f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_month_start(month, 1).isoformat()}')"
+            ))
+            month = _month_start(month, 1)
+        # Rows outside of the monthly partitions, moved to their partition once `cli.py --maintenance` creates it
+        connection.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+
+    connection.execute(text(f"INSERT INTO {table} SELECT * FROM {old_table}"))
+    # The sequence would be dropped with the old table
+    connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+    connection.execute(text(f"DROP TABLE {old_table}"))
+
+
+def upgrade() -> None:
+    """Convert snapshots and schedules to monthly range partitions on created_at."""
+
+    grafana_user = os.getenv('POSTGRES_GRAFANA_USER', 'grafana_reader')
+
+    connection = op.get_bind()
+
+    # The view depends on the snapshots table
+    definition = _drop_view(connection)
+
+    for table in TABLES:
+        _rebuild_table(connection, table, partitioned=True)
+        connection.execute(text(f"GRANT SELECT ON {table} TO {grafana_user}"))
+
+    connection.execute(text(f"CREATE VIEW {DENSE_VIEW} AS {definition}"))
+    connection.execute(text(f"GRANT SELECT ON {DENSE_VIEW} TO {grafana_user}"))
+
+
+def downgrade() -> None:
+    """Convert snapshots and schedules back to regular tables."""
+
+    grafana_user = os.getenv('POSTGRES_GRAFANA_USER', 'grafana_reader')
+
+    connection = op.get_bind()
+
+    definition = _drop_view(connection)
+
+    for table in TABLES:
+        _rebuild_table(connection, table, partitioned=False)
+        connection.execute(text(f"GRANT SELECT ON {table} TO {grafana_user}"))
+
+    connection.execute(text(f"CREATE VIEW {DENSE_VIEW} AS {definition}"))
+    connection.execute(text(f"GRANT SELECT ON {DENSE_VIEW} TO {grafana_user}"))
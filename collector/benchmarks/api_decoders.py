@@ -0,0 +1,118 @@
+"""Time the decoding of recorded carto API responses, generated models against msgspec structs.
+
+Record responses with `curl -o payloads/collections-35000.json <url>`, the file name starts with
+the kind of response (see `PAYLOAD_MODELS`). Then (from the collector folder):
+
+    python -m benchmarks.api_decoders                       # Test data of the collector
+    python -m benchmarks.api_decoders --payloads payloads --repeat 20
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+import api_carto_client.models as generated
+import msgspec
+
+from collector.core import api_structs
+
+PAYLOADS_DIR = Path(__file__).resolve().parents[2] / "tests" / "test_collector" / "data"
+
+# Start of the file names: (model of the response body, model of its items when it's a list)
+PAYLOAD_MODELS = {
+    "collections": ("SamplingCollectionResult", "SamplingLocationCollectionsEntity"),
+    "locations": ("SamplingLocationResult", "SamplingLocationEntity"),
+    "groups": (None, "SamplingGroupEntity"),
+    "regions": (None, "SamplingRegionEntity"),
+}
+
+# The results of the other decoders are compared to the ones of the generated models
+REFERENCE_DECODER = "generated"
+DECODERS = [REFERENCE_DECODER, "msgspec"]
+
+
+def payload_model(path: Path, content: bytes) -> str | None:
+    """Return the model name of the recorded response, None when the file isn't a known response"""
+    kind = next((kind for kind in PAYLOAD_MODELS if path.stem.startswith(kind)), None)
+    if kind is None:
+        return None
+    result_model, item_model = PAYLOAD_MODELS[kind]
+    return f"list[{item_model}]" if content.lstrip().startswith(b"[") else result_model
+
+
+def decode(content: bytes, model: str, decoder: str) -> Any:
+    """Decode a response as the API client does with the decoder"""
+    is_list = model.startswith("list[")
+    name = model.removeprefix("list[").removesuffix("]")
+    if decoder == REFERENCE_DECODER:
+        data = json.loads(content)
+        model_class = getattr(generated, name)
+        return [model_class.from_dict(item) for item in data] if is_list else model_class.from_dict(data)
+    struct = getattr(api_structs, name)
+    return msgspec.json.decode(content, type=list[struct] if is_list else struct)
+
+
+def to_dict(decoded: Any) -> Any:
+    return [item.to_dict() for item in decoded] if isinstance(decoded, list) else decoded.to_dict()
+
+
+def run_benchmark(payloads: list[Path], decoders: list[str], repeat: int) -> list[dict]:
+    """Decode every payload with each decoder, keep the fastest run and the payloads decoded differently"""
+    contents = []
+    for payload in payloads:
+        content = payload.read_bytes()
+        if model := payload_model(payload, content):
+            contents.append((payload, content, model))
+    reference = {payload: to_dict(decode(content, model, REFERENCE_DECODER)) for payload, content, model in contents}
+
+    results = []
+    for decoder in decoders:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outputs = {payload: decode(content, model, decoder) for payload, content, model in contents}
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results.append(
+            {
+                "decoder": decoder,
+                "payloads": len(contents),
+                "bytes": sum(len(content) for _, content, _ in contents),
+                "total_ms": best * 1000,
+                "mismatches": [payload.name for payload in outputs if to_dict(outputs[payload]) != reference[payload]],
+            }
+        )
+    return results
+
+
+def print_report(results: list[dict]) -> None:
+    reference = next((r for r in results if r["decoder"] == REFERENCE_DECODER), None)
+    for result in results:
+        megabytes_per_s = result["bytes"] / 1e6 / max(result["total_ms"] / 1000, 1e-9)
+        line = f"{result['decoder']:<10} {result['payloads']} payloads, {result['total_ms']:.2f} ms"
+        line += f", {megabytes_per_s:.1f} MB/s"
+        if reference and result is not reference:
+            line += f" (x{reference['total_ms'] / max(result['total_ms'], 0.001):.1f})"
+        print(line)
+        for payload in result["mismatches"]:
+            print(f"    MISMATCH: {payload}")
+
+
+parser = argparse.ArgumentParser(prog="api_decoders", description="Benchmark the carto API decoders")
+parser.add_argument("--payloads", type=Path, default=PAYLOADS_DIR, help="Folder of the recorded JSON responses")
+parser.add_argument("--decoder", action="append", help="Decoder to run, all of them by default")
+parser.add_argument("--repeat", type=int, default=5, help="Runs over the payloads, the fastest one is kept")
+
+
+def main(args: argparse.Namespace) -> bool:
+    """Print the report, return False when a decoder doesn't match the generated models"""
+    payloads = sorted(args.payloads.glob("**/*.json"))
+    results = run_benchmark(payloads, args.decoder or DECODERS, args.repeat)
+    print_report(results)
+    return not any(result["mismatches"] for result in results)
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main(parser.parse_args()) else 1)
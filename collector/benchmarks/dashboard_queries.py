@@ -0,0 +1,315 @@
+"""Run the SQL of the Grafana dashboards with EXPLAIN ANALYZE.
+
+Compare the plans before and after a migration (from the collector folder):
+
+    python -m benchmarks.dashboard_queries --seed 200      # Synthetic data, use a dedicated database
+    python -m benchmarks.dashboard_queries --output before.json
+    alembic upgrade head
+    python -m benchmarks.dashboard_queries --compare before.json --plans
+"""
+
+import argparse
+import asyncio
+import json
+import re
+from dataclasses import asdict, dataclass
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from collector.core.database import engine, get_db
+from collector.services.partitions import PARTITIONED_TABLES, create_partitions
+
+DASHBOARDS_DIR = Path(__file__).resolve().parents[2] / "conf" / "grafana" / "dashboards"
+
+# Group code of the synthetic data, deleting it cascades to every seeded row
+SEED_GROUP = "BENCH"
+
+# Queries used to pick a value for each dashboard variable, the busiest row is used
+DEFAULT_VARIABLES = {
+    "collection_id": "SELECT collection_group_id FROM collection_group_snapshots GROUP BY 1 ORDER BY COUNT(*) DESC",
+    "event_id": "SELECT event_id FROM schedules GROUP BY 1 ORDER BY COUNT(*) DESC",
+    "location_id": "SELECT location_id FROM collection_groups GROUP BY 1 ORDER BY COUNT(*) DESC",
+    "relnames": "SELECT quote_literal('schedules')",
+}
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO groups (gr_code, gr_lib) VALUES (:group, 'Benchmark') ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO locations (
+        sampling_location_code, post_code, full_address, latitude, longitude,
+        give_blood, give_plasma, give_platelet, group_code
+    )
+    SELECT 'B' || i, '35000', 'Benchmark ' || i, 47 + random() * 2, -5 + random() * 4,
+        true, i % 2 = 0, i % 3 = 0, :group
+    FROM generate_series(1, :locations) AS i
+    """,
+    """
+    INSERT INTO collection_groups (
+        efs_id, start_date, end_date, nature, is_public, is_publishable, propose_planning_rdv,
+        created_at, group_code, location_id
+    )
+    SELECT CAST(:group AS text) || '-' || l.id || '-' || i, start_date, start_date + INTERVAL '2 days', 'bench',
+        true, true, true, NOW(), :group, l.id
+    FROM locations l
+    CROSS JOIN generate_series(1, :collections) AS i
+    CROSS JOIN LATERAL (SELECT date_trunc('day', NOW()) + (i * 7 - :days) * INTERVAL '1 day' AS start_date) AS d
+    WHERE l.group_code = :group
+    """,
+    """
+    INSERT INTO collection_events (id, lp_code, date, created_at, collection_group_id)
+    SELECT (SELECT COALESCE(MAX(id), 0) FROM collection_events) + ROW_NUMBER() OVER (), :group,
+        g.start_date + i * INTERVAL '1 day', NOW(), g.id
+    FROM collection_groups g
+    CROSS JOIN generate_series(0, 2) AS i
+    WHERE g.group_code = :group
+    """,
+    """
+    INSERT INTO collection_group_snapshots (
+        taux_remplissage, nb_places_restantes_st, nb_places_totales_st, nb_places_reservees_st,
+        created_at, collection_group_id
+    )
+    SELECT random(), 10, 40, 30, NOW() - i * INTERVAL '1 day', g.id
+    FROM collection_groups g
+    CROSS JOIN generate_series(0, :days - 1) AS i
+    WHERE g.group_code = :group
+    """,
+    """
+    INSERT INTO schedules (
+        efs_id, date, location, url, created_at, total_slots, collect_type,
+        timetables, timetable_min, timetable_max, event_id
+    )
+    SELECT g.efs_id, e.date::date, 'Benchmark', 'https://benchmark', NOW() - i * INTERVAL '1 day',
+        (random() * 40)::int, 'ST', '{"08:00": 2, "12:00": 4}'::json, '08:00', '12:00', e.id
+    FROM collection_events e
+    JOIN collection_groups g ON g.id = e.collection_group_id
+    CROSS JOIN generate_series(0, :days - 1) AS i
+    WHERE g.group_code = :group
+    """,
+]
+
+
+@dataclass
+class DashboardQuery:
+    dashboard: str
+    panel: str
+    sql: str
+
+
+def _walk(node, panel: str = ""):
+    """Yield (panel, sql) for every SQL target and query variable of a dashboard node"""
+    if isinstance(node, list):
+        for item in node:
+            yield from _walk(item, panel)
+    elif isinstance(node, dict):
+        if "title" in node and ("targets" in node or "panels" in node):
+            panel = node["title"]
+        for key, value in node.items():
+            if key == "rawSql" and isinstance(value, str):
+                yield panel, value
+            elif key == "query" and isinstance(value, str) and node.get("type") == "query":
+                yield f"${node.get('name')}", value
+            else:
+                yield from _walk(value, panel)
+
+
+def extract_queries(paths: list[Path]) -> list[DashboardQuery]:
+    """Return the SQL queries of the dashboards, Loki and custom variables are ignored"""
+    queries = []
+    for path in paths:
+        dashboard = json.loads(path.read_text())
+        for panel, sql in _walk(dashboard):
+            sql = sql.strip().rstrip(";").strip()
+            if re.match(r"(SELECT|WITH)\b", sql, re.IGNORECASE):
+                queries.append(DashboardQuery(dashboard=path.stem, panel=panel, sql=sql))
+    return queries
+
+
+def render_query(sql: str, variables: dict[str, str], time_from: datetime, time_to: datetime) -> str:
+    """Replace the Grafana macros and variables, as Grafana does before sending the query"""
+    sql = re.sub(
+        r"\$__timeFilter\(([^)]+)\)",
+        lambda m: f"{m.group(1).strip()} BETWEEN '{time_from.isoformat()}' AND '{time_to.isoformat()}'",
+        sql,
+    )
+    sql = sql.replace("$__timeFrom()", f"'{time_from.isoformat()}'").replace("$__timeTo()", f"'{time_to.isoformat()}'")
+
+    def variable(match: re.Match) -> str:
+        name = next(group for group in match.groups() if group)
+        return variables.get(name, match.group(0))
+
+    return re.sub(r"\[\[(\w+)\]\]|\$\{(\w+)\}|\$(\w+)", variable, sql)
+
+
+def summarize_plan(plan: dict) -> dict:
+    """Return the timings, buffers and scans of an EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) plan"""
+    scans = []
+
+    def visit(node: dict):
+        if "Relation Name" in node:
+            scan = f"{node['Node Type']} on {node['Relation Name']}"
+            if "Index Name" in node:
+                scan += f" using {node['Index Name']}"
+            scans.append(scan)
+        for child in node.get("Plans", []):
+            visit(child)
+
+    visit(plan["Plan"])
+    return {
+        "execution_ms": plan["Execution Time"],
+        "planning_ms": plan["Planning Time"],
+        "shared_hit": plan["Plan"].get("Shared Hit Blocks", 0),
+        "shared_read": plan["Plan"].get("Shared Read Blocks", 0),
+        "scans": scans,
+    }
+
+
+def render_plan(node: dict, depth: int = 0) -> list[str]:
+    """Return an indented text version of a JSON plan node"""
+    label = node["Node Type"]
+    if "Relation Name" in node:
+        label += f" on {node['Relation Name']}"
+    if "Index Name" in node:
+        label += f" using {node['Index Name']}"
+    lines = [
+        f"{'  ' * depth}-> {label} "
+        f"(rows={node.get('Actual Rows')} loops={node.get('Actual Loops')} time={node.get('Actual Total Time')}ms)"
+    ]
+    for child in node.get("Plans", []):
+        lines.extend(render_plan(child, depth + 1))
+    return lines
+
+
+async def default_variables(conn: AsyncConnection) -> dict[str, str]:
+    """Pick a value for each dashboard variable from the database"""
+    variables = {}
+    for name, query in DEFAULT_VARIABLES.items():
+        value = (await conn.execute(text(f"{query} LIMIT 1"))).scalar()
+        if value is not None:
+            variables[name] = str(value)
+    return variables
+
+
+async def explain(conn: AsyncConnection, sql: str, repeat: int) -> dict:
+    """Run the query `repeat` times and return the fastest plan"""
+    best = None
+    for _ in range(repeat):
+        result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"))
+        plan = result.scalar()
+        plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]
+        if best is None or plan["Execution Time"] < best["Execution Time"]:
+            best = plan
+    return best
+
+
+async def seed(locations: int, collections: int, days: int) -> None:
+    """Insert synthetic locations, collections, events, snapshots and schedules"""
+    today = date.today()
+    async with get_db() as session:
+        async with session.begin():
+            for table in PARTITIONED_TABLES:
+                await create_partitions(session, table, today - timedelta(days=days), today)
+            params = {"group": SEED_GROUP, "locations": locations, "collections": collections, "days": days}
+            for statement in SEED_STATEMENTS:
+                await session.execute(text(statement), params)
+    await analyze()
+
+
+async def clear() -> None:
+    """Delete the synthetic data"""
+    async with get_db() as session:
+        async with session.begin():
+            await session.execute(text("DELETE FROM groups WHERE gr_code = :group"), {"group": SEED_GROUP})
+    await analyze()
+
+
+async def analyze() -> None:
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE"))
+        await conn.commit()
+
+
+async def run_benchmark(
+    queries: list[DashboardQuery], variables: dict[str, str], time_from: datetime, time_to: datetime, repeat: int
+) -> list[dict]:
+    """EXPLAIN ANALYZE every query, each one in a rolled back transaction"""
+    results = []
+    async with engine.connect() as conn:
+        variables = {**await default_variables(conn), **variables}
+        await conn.rollback()
+        for query in queries:
+            result = asdict(query)
+            try:
+                plan = await explain(conn, render_query(query.sql, variables, time_from, time_to), repeat)
+                result.update(summarize_plan(plan), plan=plan)
+            except Exception as e:
+                result["error"] = str(e).splitlines()[0]
+            finally:
+                await conn.rollback()
+            results.append(result)
+    return results
+
+
+def print_report(results: list[dict], baseline: list[dict] | None = None, plans: bool = False) -> None:
+    before = {(r["dashboard"], r["panel"], r["sql"]): r for r in baseline or []}
+    for result in results:
+        name = f"{result['dashboard']} / {result['panel']}"
+        if "error" in result:
+            print(f"{name}\n    ERROR: {result['error']}")
+            continue
+        line = f"{name}\n    {result['execution_ms']:.2f} ms (planning {result['planning_ms']:.2f} ms)"
+        line += f", buffers hit={result['shared_hit']} read={result['shared_read']}"
+        previous = before.get((result["dashboard"], result["panel"], result["sql"]))
+        if previous and "error" not in previous:
+            line += f", before {previous['execution_ms']:.2f} ms"
+            line += f" (x{previous['execution_ms'] / max(result['execution_ms'], 0.001):.1f})"
+        print(line)
+        for scan in result["scans"]:
+            print(f"      {scan}")
+        if plans:
+            if previous and "plan" in previous:
+                print("    before:")
+                print("\n".join(f"      {row}" for row in render_plan(previous["plan"]["Plan"])))
+                print("    after:")
+            print("\n".join(f"      {row}" for row in render_plan(result["plan"]["Plan"])))
+
+
+parser = argparse.ArgumentParser(prog="dashboard-queries", description="EXPLAIN ANALYZE the Grafana dashboard queries")
+parser.add_argument("--dashboards", type=Path, default=DASHBOARDS_DIR, help="Folder of the dashboards JSON files")
+parser.add_argument("--var", action="append", default=[], help="Value of a dashboard variable: name=value")
+parser.add_argument("--days", type=int, default=7, help="Time range of $__timeFilter, in days before now")
+parser.add_argument("--repeat", type=int, default=3, help="Runs per query, the fastest one is kept")
+parser.add_argument("--output", type=Path, help="Save the results to a JSON file")
+parser.add_argument("--compare", type=Path, help="JSON results of a previous run")
+parser.add_argument("--plans", action="store_true", help="Print the plans")
+parser.add_argument("--seed", type=int, metavar="LOCATIONS", help="Insert synthetic data before the benchmark")
+parser.add_argument("--seed-collections", type=int, default=10, help="Collections per seeded location")
+parser.add_argument("--seed-days", type=int, default=60, help="Days of snapshots and schedules per seeded collection")
+parser.add_argument("--clear", action="store_true", help="Delete the synthetic data and exit")
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.clear:
+        await clear()
+        return
+    if args.seed:
+        await seed(args.seed, args.seed_collections, args.seed_days)
+
+    queries = extract_queries(sorted(args.dashboards.glob("**/*.json")))
+    variables = dict(var.split("=", 1) for var in args.var)
+    time_to = datetime.now(UTC)
+    results = await run_benchmark(queries, variables, time_to - timedelta(days=args.days), time_to, args.repeat)
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(results, baseline, args.plans)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parser.parse_args()))
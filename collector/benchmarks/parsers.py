@@ -0,0 +1,143 @@
+"""Time the crawler parsers on saved booking pages, and check they return the same results.
+
+Save pages with `curl -o pages/<id>.html <url>`, then (from the collector folder):
+
+    python -m benchmarks.parsers                        # Sample pages of the crawler tests
+    python -m benchmarks.parsers --pages pages --repeat 20
+    python -m benchmarks.parsers --processes -1          # Also parse them in a process pool
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+from pathlib import Path
+from types import SimpleNamespace
+
+from bs4 import BeautifulSoup
+from crawler.handlers import collect_handler, fast_collect_handler
+from crawler.parsers.fast import FAST_PARSER
+from crawler.parsers.pages import available_cores, parse_page
+
+PAGES_DIR = Path(__file__).resolve().parents[2] / "tests" / "test_crawler" / "test_data"
+
+# The results of the other parsers are compared to the ones of the default BeautifulSoup parser
+REFERENCE_PARSER = "html.parser"
+
+
+def available_parsers() -> list[str]:
+    parsers = [REFERENCE_PARSER]
+    if find_spec("lxml"):
+        parsers.append("lxml")
+    parsers.append(FAST_PARSER)
+    return parsers
+
+
+async def parse(html: bytes, url: str, parser: str) -> dict | None:
+    """Run the crawler handler of the parser on a page, return the pushed data without its time"""
+    pushed = []
+
+    async def push_data(data: str) -> None:
+        pushed.append(data)
+
+    context = SimpleNamespace(
+        request=SimpleNamespace(url=url),
+        http_response=SimpleNamespace(status_code=200, headers={}),
+        parsed_content=html,
+        push_data=push_data,
+        log=logging.getLogger(__name__),
+    )
+    if parser == FAST_PARSER:
+        await fast_collect_handler(context)
+    else:
+        context.soup = BeautifulSoup(html, features=parser)
+        await collect_handler(context)
+
+    if not pushed:
+        return None
+    data = json.loads(pushed[0])
+    data.pop("time")
+    return data
+
+
+async def run_benchmark(pages: list[Path], parsers: list[str], repeat: int) -> list[dict]:
+    """Parse every page with each parser, keep the fastest run and the pages parsed differently"""
+    contents = [(page, page.read_bytes()) for page in pages]
+    reference = {page: await parse(html, page.as_uri(), REFERENCE_PARSER) for page, html in contents}
+
+    results = []
+    for parser in parsers:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outputs = {page: await parse(html, page.as_uri(), parser) for page, html in contents}
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results.append(
+            {
+                "parser": parser,
+                "pages": len(contents),
+                "total_ms": best * 1000,
+                "page_ms": best * 1000 / max(len(contents), 1),
+                "mismatches": [page.name for page in outputs if outputs[page] != reference[page]],
+            }
+        )
+    return results
+
+
+def run_pool_benchmark(pages: list[Path], parsers: list[str], processes: int, repeat: int) -> list[dict]:
+    """Parse the pages `repeat` times in a process pool, as the crawler does with `parse_processes`"""
+    contents = [(page.read_bytes(), page.as_uri()) for page in pages] * repeat
+    results = []
+    context = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(processes, context, initializer=logging.disable, initargs=(logging.ERROR,))
+    with pool as executor:
+        # Start the workers before timing
+        list(executor.map(time.sleep, [0.1] * processes))
+        for parser in parsers:
+            start = time.perf_counter()
+            list(executor.map(parse_page, *zip(*contents), [parser] * len(contents), chunksize=8))
+            elapsed = time.perf_counter() - start
+            results.append({"parser": parser, "pages": len(contents), "pages_per_s": len(contents) / elapsed})
+    return results
+
+
+def print_report(results: list[dict]) -> None:
+    reference = next((r for r in results if r["parser"] == REFERENCE_PARSER), None)
+    for result in results:
+        line = f"{result['parser']:<12} {result['pages']} pages, {result['page_ms']:.3f} ms/page"
+        if reference and result is not reference:
+            line += f" (x{reference['total_ms'] / max(result['total_ms'], 0.001):.1f})"
+        print(line)
+        for page in result["mismatches"]:
+            print(f"    MISMATCH: {page}")
+
+
+parser = argparse.ArgumentParser(prog="parsers", description="Benchmark the crawler parsers on saved pages")
+parser.add_argument("--pages", type=Path, default=PAGES_DIR, help="Folder of the saved HTML pages")
+parser.add_argument("--parser", action="append", help="Parser to run, all the installed ones by default")
+parser.add_argument("--repeat", type=int, default=5, help="Runs over the pages, the fastest one is kept")
+parser.add_argument("--processes", type=int, help="Also parse the pages in a pool of processes, -1 for one per core")
+
+
+async def main(args: argparse.Namespace) -> bool:
+    """Print the report, return False when a parser doesn't match the reference one"""
+    logging.disable(logging.ERROR)
+    pages = sorted(args.pages.glob("**/*.html"))
+    parsers = args.parser or available_parsers()
+    results = await run_benchmark(pages, parsers, args.repeat)
+    print_report(results)
+    if args.processes:
+        processes = available_cores() if args.processes < 0 else args.processes
+        for result in run_pool_benchmark(pages, parsers, processes, args.repeat):
+            line = f"{result['parser']:<12} {result['pages']} pages, {result['pages_per_s']:.0f} pages/s"
+            print(f"{line} in {processes} processes")
+    return not any(result["mismatches"] for result in results)
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if asyncio.run(main(parser.parse_args())) else 1)
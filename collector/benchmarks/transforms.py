@@ -0,0 +1,114 @@
+"""Time the transform of the collections into groups, and measure the memory it allocates.
+
+From the collector folder:
+
+    python -m benchmarks.transforms                        # Collections of the test data, repeated
+    python -m benchmarks.transforms --copies 10000 --repeat 3
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from collector.schemas import CollectionGroupSchema, CollectionSchema, LocationSchema
+from collector.schemas.collection import collections_as_groups
+
+DATA_FILE = Path(__file__).resolve().parents[2] / "tests" / "test_collector" / "data" / "collections.json"
+
+# The results of the other transforms are compared to the ones of `as_group`
+REFERENCE_TRANSFORM = "as_group"
+
+TRANSFORMS: dict[str, Callable[[list[CollectionSchema]], list[CollectionGroupSchema]]] = {
+    REFERENCE_TRANSFORM: lambda collections: [collection.as_group(from_db=False) for collection in collections],
+    "batch": collections_as_groups,
+}
+
+
+def load_collections(path: Path, copies: int) -> list[CollectionSchema]:
+    """Return the collections of the API locations saved in the file, repeated `copies` times"""
+    locations = [LocationSchema(**location) for location in json.loads(path.read_text())]
+    # Collections without id have no events, the API calls drop them before the transform
+    collections = [collection for location in locations for collection in location.collections if collection.id]
+    return collections * copies
+
+
+def measure_memory(transform: Callable, collections: list[CollectionSchema]) -> tuple[int, int]:
+    """Return the peak of memory allocated by the transform, and the memory blocks its result keeps"""
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    result = transform(collections)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    kept_blocks = sys.getallocatedblocks() - blocks
+    del result
+    return peak, kept_blocks
+
+
+def run_benchmark(collections: list[CollectionSchema], transforms: list[str], repeat: int) -> list[dict]:
+    """Transform the collections with each transform, keep the fastest run and its memory use"""
+    reference = TRANSFORMS[REFERENCE_TRANSFORM](collections)
+    n_collections = max(len(collections), 1)
+
+    results = []
+    for name in transforms:
+        transform = TRANSFORMS[name]
+        best = None
+        for _ in range(repeat):
+            # As timeit, the garbage collector runs are left out of the timings
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            groups = transform(collections)
+            elapsed = time.perf_counter() - start
+            gc.enable()
+            best = elapsed if best is None else min(best, elapsed)
+        peak, kept_blocks = measure_memory(transform, collections)
+        results.append(
+            {
+                "transform": name,
+                "collections": len(collections),
+                "total_ms": best * 1000,
+                "collection_us": best * 1e6 / n_collections,
+                "peak_bytes_per_collection": peak / n_collections,
+                "blocks_per_collection": kept_blocks / n_collections,
+                "match": groups == reference,
+            }
+        )
+    return results
+
+
+def print_report(results: list[dict]) -> None:
+    reference = next((r for r in results if r["transform"] == REFERENCE_TRANSFORM), None)
+    for result in results:
+        line = f"{result['transform']:<10} {result['collections']} collections, {result['collection_us']:.1f} us"
+        line += f", {result['peak_bytes_per_collection'] / 1024:.1f} KiB peak"
+        line += f", {result['blocks_per_collection']:.0f} blocks kept per collection"
+        if reference and result is not reference:
+            line += f" (x{reference['total_ms'] / max(result['total_ms'], 0.001):.1f})"
+        print(line)
+        if not result["match"]:
+            print("    MISMATCH with as_group")
+
+
+parser = argparse.ArgumentParser(prog="transforms", description="Benchmark the collections to groups transforms")
+parser.add_argument("--data", type=Path, default=DATA_FILE, help="JSON file of API locations with their collections")
+parser.add_argument("--copies", type=int, default=2000, help="Times the collections of the file are repeated")
+parser.add_argument("--repeat", type=int, default=5, help="Runs over the collections, the fastest one is kept")
+
+
+def main(args: argparse.Namespace) -> bool:
+    """Print the report, return False when a transform doesn't match `as_group`"""
+    collections = load_collections(args.data, args.copies)
+    results = run_benchmark(collections, list(TRANSFORMS), args.repeat)
+    print_report(results)
+    return all(result["match"] for result in results)
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main(parser.parse_args()) else 1)
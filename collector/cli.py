@@ -1,13 +1,18 @@
 import argparse
 import asyncio
 import json
+import sys
 
-from crawler import start_crawler
+from crawler import reparse_archive, start_crawler
 
+from collector.core.api_client import close_api_client
 from collector.core.logging import configure_logger
+from collector.core.settings import settings
 from collector.tasks.collections import update_collections
 from collector.tasks.groups import update_groups
 from collector.tasks.locations import update_locations
+from collector.tasks.maintenance import update_partitions, update_rollups
+from collector.tasks.pipeline import run_pipeline
 from collector.tasks.schedules import update_schedules
 
 logger = configure_logger()
@@ -37,6 +42,25 @@ parser.add_argument(
     action="store_true",
     help="Run the task to retrieve and save new schedules",
 )
+parser.add_argument(
+    "--maintenance",
+    "-m",
+    action="store_true",
+    help="Create the upcoming partitions and apply the retention policy",
+)
+parser.add_argument(
+    "--refresh-rollups",
+    "-r",
+    action="store_true",
+    help="Refresh the daily rollups read by the dashboards (after collections and schedules)",
+)
+parser.add_argument(
+    "--pipeline",
+    "--all",
+    "-a",
+    action="store_true",
+    help="Run the selected tasks (all of them by default) in one process, following their dependencies",
+)
 parser.add_argument(
     "--file",
     "-f",
@@ -56,6 +80,14 @@ parser.add_argument(
     action="store_true",
     help="Run the crawler with the given url (for test purpose)",
 )
+parser.add_argument(
+    "--reparse",
+    "-R",
+    nargs="+",
+    default=None,
+    metavar="ARCHIVE",
+    help="Parse the pages of the crawler archive again (segments or folders), without network",
+)
 parser.add_argument(
     "urls",
     nargs="*",
@@ -87,6 +119,19 @@ async def main(params: argparse.Namespace):
         logger.info("Pong !", extra={"foo": "bar"})
         return
 
+    if params.pipeline:
+        selected = {
+            "groups": grp,
+            "locations": loc,
+            "collections": col,
+            "schedules": sch,
+            "rollups": params.refresh_rollups,
+            "maintenance": params.maintenance,
+        }
+        results = await run_pipeline([stage for stage, run_stage in selected.items() if run_stage] or None)
+        # Exit status of the process, for the launch script
+        return 0 if all(results.values()) else 1
+
     if params.crawl and len(params.urls) == 0:
         logger.error("You need to provide a url to start the crawler")
         return
@@ -96,6 +141,11 @@ async def main(params: argparse.Namespace):
         data = results
         logger.info(f"Crawler ended with data: {data}")
 
+    if params.reparse:
+        # Backfill: combine with --schedules to save the schedules of the archived pages
+        data = await asyncio.to_thread(reparse_archive, params.reparse, settings.CRAWLER_PARSER)
+        logger.info(f"Reparsed {len(data)} archived pages.")
+
     if params.file:
         data = load_data(params.file, params.format)
 
@@ -111,9 +161,20 @@ async def main(params: argparse.Namespace):
         await update_collections(data)
     if sch:
         await update_schedules(data)
+    if params.refresh_rollups:
+        await update_rollups()
+    if params.maintenance:
+        await update_partitions()
+
+
+async def run(params: argparse.Namespace):
+    try:
+        return await main(params)
+    finally:
+        await close_api_client()
 
 
 if __name__ == "__main__":
     args = parser.parse_args()
 
-    asyncio.run(main(args))
+    sys.exit(asyncio.run(run(args)))
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+
+import httpx
+from api_carto_client import Client
+
+from collector.core.concurrency import AdaptiveTransport
+from collector.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Client | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _build_client() -> Client:
+    limits = httpx.Limits(
+        max_connections=settings.API_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.API_MAX_CONNECTIONS,
+        keepalive_expiry=settings.API_KEEPALIVE_EXPIRY,
+    )
+    transport = httpx.AsyncHTTPTransport(http2=settings.API_HTTP2, limits=limits, retries=1)
+    logger.debug(
+        "Carto API client created", extra={"http2": settings.API_HTTP2, "max_connections": limits.max_connections}
+    )
+    return Client(
+        base_url=settings.API_BASE_URL,
+        timeout=httpx.Timeout(settings.API_TIMEOUT),
+        httpx_args={"transport": AdaptiveTransport(transport)},
+    )
+
+
+def get_api_client() -> Client:
+    """Return the process-wide carto API client, its connection pool is shared by every call.
+
+    httpx pools are bound to the event loop that opened them, so a new client is created
+    if the loop changed (e.g. between two `asyncio.run`).
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = _build_client()
+        _client_loop = loop
+    return _client
+
+
+async def close_api_client() -> None:
+    """Close the connections of the process-wide carto API client"""
+    global _client, _client_loop
+    if _client is not None and _client._async_client is not None:
+        await _client.get_async_httpx_client().aclose()
+    _client = None
+    _client_loop = None
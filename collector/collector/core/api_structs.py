@@ -0,0 +1,164 @@
+"""msgspec decoders of the carto API responses used by the collector, needs the `msgspec` package.
+
+The structs mirror the generated `api_carto_client.models` of the same swagger: same class and
+attribute names, unset fields are `UNSET`, and `to_dict` / `from_dict` use the API keys. They are
+decoded in C straight from the response body instead of field by field by `from_dict`. As the
+generated `from_dict` keeps any value, every field also accepts null.
+"""
+
+import datetime
+from functools import cache
+from typing import Any, Self
+
+import msgspec
+from api_carto_client.api.ping import get_carto_api_v3_ping as api_ping
+from api_carto_client.api.sampling_collection import (
+    get_carto_api_v3_samplingcollection_searchbypostcode as api_search_collection,
+)
+from api_carto_client.api.sampling_collection import (
+    get_carto_api_v3_samplingcollection_searchinsquare as api_search_square,
+)
+from api_carto_client.api.sampling_location import (
+    get_carto_api_v3_samplinglocation_getgroupements as api_get_groupements,
+)
+from api_carto_client.api.sampling_location import (
+    get_carto_api_v3_samplinglocation_getregions as api_get_regions,
+)
+from api_carto_client.api.sampling_location import (
+    get_carto_api_v3_samplinglocation_searchbygrouplocationcode as api_search_location,
+)
+from msgspec import UNSET, UnsetType, field
+
+
+class _Entity(msgspec.Struct, rename="camel", kw_only=True):
+    def to_dict(self) -> dict[str, Any]:
+        return msgspec.to_builtins(self)
+
+    @classmethod
+    def from_dict(cls, src_dict: dict[str, Any]) -> Self:
+        return msgspec.convert(src_dict, cls)
+
+
+class Ping(_Entity):
+    version: None | UnsetType | str = UNSET
+    environment: None | UnsetType | str = UNSET
+
+
+class SamplingRegionEntity(_Entity):
+    libelle: None | UnsetType | str = UNSET
+    acronyme: None | UnsetType | str = UNSET
+    monogramme: None | UnsetType | str = UNSET
+    code: None | UnsetType | str = UNSET
+
+
+class SamplingGroupEntity(_Entity):
+    gr_code: None | UnsetType | str = UNSET
+    gr_lib: None | UnsetType | str = UNSET
+    gr_desd: None | UnsetType | datetime.datetime = UNSET
+
+
+class SamplingCollectionEntity(_Entity):
+    date: None | UnsetType | datetime.datetime = UNSET
+    group_code: None | UnsetType | str = UNSET
+    id: None | UnsetType | float = UNSET
+    is_public: None | UnsetType | bool = UNSET
+    is_publishable: None | UnsetType | bool = UNSET
+    lp_code: None | UnsetType | str = UNSET
+    morning_end_time: None | UnsetType | str = UNSET
+    morning_start_time: None | UnsetType | str = UNSET
+    afternoon_end_time: None | UnsetType | str = UNSET
+    afternoon_start_time: None | UnsetType | str = UNSET
+    nature: None | UnsetType | str = UNSET
+    url_blood: None | UnsetType | str = UNSET
+    url_plasma: None | UnsetType | str = UNSET
+    url_platelet: None | UnsetType | str = UNSET
+    convocation_label_long: None | UnsetType | str = UNSET
+    convocation_label_sms: None | UnsetType | str = field(default=UNSET, name="convocationLabelSMS")
+    taux_remplissage: None | UnsetType | float = UNSET
+    children: None | UnsetType | list["SamplingCollectionEntity"] = UNSET
+    nb_places_restantes_st: None | UnsetType | int = field(default=UNSET, name="nbPlacesRestantesST")
+    nb_places_totales_st: None | UnsetType | int = field(default=UNSET, name="nbPlacesTotalesST")
+    nb_places_reservees_st: None | UnsetType | int = field(default=UNSET, name="nbPlacesReserveesST")
+    nb_places_restantes_pla: None | UnsetType | int = field(default=UNSET, name="nbPlacesRestantesPLA")
+    nb_places_totales_pla: None | UnsetType | int = field(default=UNSET, name="nbPlacesTotalesPLA")
+    nb_places_reservees_pla: None | UnsetType | int = field(default=UNSET, name="nbPlacesReserveesPLA")
+    nb_places_restantes_cpa: None | UnsetType | int = field(default=UNSET, name="nbPlacesRestantesCPA")
+    nb_places_totales_cpa: None | UnsetType | int = field(default=UNSET, name="nbPlacesTotalesCPA")
+    nb_places_reservees_cpa: None | UnsetType | int = field(default=UNSET, name="nbPlacesReserveesCPA")
+    propose_planning_rdv: None | UnsetType | bool = UNSET
+
+
+class SamplingLocationEntity(_Entity):
+    address1: None | UnsetType | str = UNSET
+    address2: None | UnsetType | str = UNSET
+    city: None | UnsetType | str = UNSET
+    convocation_label: None | UnsetType | str = UNSET
+    distance: None | UnsetType | float = UNSET
+    full_address: None | UnsetType | str = UNSET
+    give_blood: None | UnsetType | int = UNSET
+    give_plasma: None | UnsetType | int = UNSET
+    give_platelet: None | UnsetType | int = UNSET
+    region_code: None | UnsetType | str = UNSET
+    group_code: None | UnsetType | str = UNSET
+    latitude: None | UnsetType | float = UNSET
+    longitude: None | UnsetType | float = UNSET
+    name: None | UnsetType | str = UNSET
+    post_code: None | UnsetType | str = UNSET
+    sampling_location_code: None | UnsetType | str = UNSET
+    horaires: None | UnsetType | str = UNSET
+    infos: None | UnsetType | str = UNSET
+    metro: None | UnsetType | str = UNSET
+    bus: None | UnsetType | str = UNSET
+    tram: None | UnsetType | str = UNSET
+    parking: None | UnsetType | str = UNSET
+    debut_infos: None | UnsetType | datetime.datetime = UNSET
+    fin_infos: None | UnsetType | datetime.datetime = UNSET
+    ville: None | UnsetType | str = UNSET
+    id: None | UnsetType | int = UNSET
+    phone: None | UnsetType | str = UNSET
+    url_blood: None | UnsetType | str = UNSET
+    url_plasma: None | UnsetType | str = UNSET
+    url_platelets: None | UnsetType | str = UNSET
+
+
+# The fixed sites share the fields of the locations
+SamplingLocationSFEntity = SamplingLocationEntity
+
+
+class SamplingLocationCollectionsEntity(SamplingLocationEntity):
+    collections: None | UnsetType | list[SamplingCollectionEntity] = UNSET
+
+
+class SamplingCollectionResult(_Entity):
+    sampling_location_entities_sf: None | UnsetType | list[SamplingLocationSFEntity] = field(
+        default=UNSET, name="samplingLocationEntities_SF"
+    )
+    sampling_location_collections: None | UnsetType | list[SamplingLocationCollectionsEntity] = UNSET
+
+
+class SamplingLocationResult(_Entity):
+    sampling_location_entities_sf: None | UnsetType | list[SamplingLocationSFEntity] = field(
+        default=UNSET, name="samplingLocationEntities_SF"
+    )
+    sampling_location_entities: None | UnsetType | list[SamplingLocationEntity] = UNSET
+
+
+# Type of the 200 response of each endpoint decoded by `decode_response`
+RESPONSE_TYPES: dict[str, Any] = {
+    api_ping.__name__: Ping,
+    api_get_regions.__name__: list[SamplingRegionEntity],
+    api_get_groupements.__name__: list[SamplingGroupEntity],
+    api_search_location.__name__: SamplingLocationResult,
+    api_search_collection.__name__: SamplingCollectionResult,
+    api_search_square.__name__: SamplingCollectionResult,
+}
+
+
+@cache
+def _decoder(endpoint_name: str) -> msgspec.json.Decoder:
+    return msgspec.json.Decoder(RESPONSE_TYPES[endpoint_name])
+
+
+def decode_response(endpoint_name: str, content: bytes) -> Any:
+    """Decode the JSON body of a 200 response of the endpoint into its structs"""
+    return _decoder(endpoint_name).decode(content)
@@ -0,0 +1,170 @@
+import asyncio
+import contextlib
+import logging
+from collections import deque
+from collections.abc import AsyncIterator
+from time import monotonic
+
+import httpx
+
+from collector.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def is_overload_status(status: int) -> bool:
+    """Return whether the HTTP status means that the server is overloaded"""
+    return status == 429 or status >= 500
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """Return whether the exception means that the server is overloaded"""
+    return isinstance(error, TimeoutError | httpx.TimeoutException)
+
+
+class LimiterSlot:
+    """A request running under an AdaptiveLimiter"""
+
+    def __init__(self):
+        self.overloaded = False
+
+    def observe(self, status: int) -> None:
+        """Report the HTTP status of the request"""
+        if is_overload_status(status):
+            self.overloaded = True
+
+
+class AdaptiveLimiter:
+    """Adaptive concurrency limit, following the AIMD rule (Additive Increase, Multiplicative Decrease).
+
+    The limit grows by one slot per "window" of successful requests answered under `latency_target`,
+    and is multiplied by `backoff_factor` on timeouts, 429 and 5xx responses (at most once per
+    `backoff_cooldown` seconds, so a burst of failures counts as a single congestion event).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        min_limit: int = 1,
+        max_limit: int = 50,
+        initial_limit: int = 5,
+        latency_target: float = 2.0,
+        backoff_factor: float = 0.5,
+        backoff_cooldown: float = 1.0,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff_factor = backoff_factor
+        self.backoff_cooldown = backoff_cooldown
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._last_backoff = 0.0
+        # Futures are created from the running loop so the limiter can be shared across event loops
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed to run concurrently"""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _wake_up(self) -> None:
+        available = self.limit - self._in_flight
+        while available > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                available -= 1
+
+    async def acquire(self) -> None:
+        while self._in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Woken up then cancelled, the slot goes to the next waiter
+                    self._wake_up()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self._in_flight += 1
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._wake_up()
+
+    def on_success(self, latency: float) -> None:
+        """Grow the limit by one slot per window of fast responses"""
+        if latency <= self.latency_target and self._limit < self.max_limit:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self._wake_up()
+
+    def on_overload(self) -> None:
+        """Shrink the limit after a congestion signal"""
+        now = monotonic()
+        if now - self._last_backoff < self.backoff_cooldown:
+            return
+        self._last_backoff = now
+        self._limit = max(self.min_limit, self._limit * self.backoff_factor)
+        logger.warning("Server overloaded, backing off", extra={"limiter": self.name, "limit": self.limit})
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[LimiterSlot]:
+        """Run a request under the limit and adapt the limit to its outcome"""
+        await self.acquire()
+        slot = LimiterSlot()
+        start = monotonic()
+        try:
+            yield slot
+        except BaseException as e:
+            if is_overload_error(e):
+                self.on_overload()
+            raise
+        else:
+            if slot.overloaded:
+                self.on_overload()
+            else:
+                self.on_success(monotonic() - start)
+        finally:
+            self.release()
+
+
+_limiters: dict[str, AdaptiveLimiter] = {}
+
+
+def get_limiter(host: str) -> AdaptiveLimiter:
+    """Return the limiter shared by every request sent to `host`"""
+    if host not in _limiters:
+        _limiters[host] = AdaptiveLimiter(
+            name=host,
+            min_limit=settings.HTTP_MIN_CONCURRENCY,
+            max_limit=settings.HTTP_MAX_CONCURRENCY,
+            initial_limit=settings.HTTP_INITIAL_CONCURRENCY,
+            latency_target=settings.HTTP_LATENCY_TARGET,
+        )
+    return _limiters[host]
+
+
+class AdaptiveTransport(httpx.AsyncBaseTransport):
+    """httpx transport sending every request under the limiter of its host"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None):
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        async with get_limiter(request.url.host).slot() as slot:
+            response = await self._transport.handle_async_request(request)
+            slot.observe(response.status_code)
+            return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
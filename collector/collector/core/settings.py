@@ -13,7 +13,46 @@ class Settings(BaseSettings):
     MAX_LAT: float = 49.06
     MIN_LNG: float = -5.42
     MAX_LNG: float = -0.93
-    CRAWLER_BATCH: int = 20
+    CRAWLER_BATCH: int = 20  # Crawled pages whose schedules are matched and saved together
+    CRAWLER_PARSER: str = "html.parser"  # "html.parser", "lxml" or "selectolax" (a dependency of the crawler)
+    CRAWLER_PROCESSES: int = 0  # Processes parsing the pages, 0 to parse them on the event loop, -1 for one per core
+    CRAWLER_ARCHIVE_DIR: str | None = None  # Folder of the compressed archive of the crawled pages, for `--reparse`
+    COLLECTIONS_FETCH: str = "postcode"  # "postcode" to search known post codes, "tiles" the MIN/MAX_LAT/LNG box
+    TILE_LIMIT: int = 100  # Tiles returning this many locations are split in four
+    TILE_MAX_DEPTH: int = 6
+    COLLECTIONS_STREAMING: bool = False  # Resolve and save collections as soon as they are fetched
+    PIPELINE_QUEUE_SIZE: int = 100  # Locations waiting between two stages
+    PIPELINE_WORKERS: int = 10  # Locations resolved concurrently
+    PIPELINE_BATCH_SIZE: int = 50  # Locations saved per transaction
+    PIPELINE_FLUSH_INTERVAL: float = 2.0  # Seconds before saving an incomplete batch
+
+    # CRAWL PLANNER
+    CRAWL_INCREMENTAL: bool = False  # Only crawl the booking pages due for a revisit
+    CRAWL_HOURS_PER_DAY_TO_EVENT: float = 6.0  # Revisit interval added per day until the event
+    CRAWL_MIN_INTERVAL_HOURS: float = 12.0
+    CRAWL_MAX_INTERVAL_HOURS: float = 168.0
+    CRAWL_VOLATILITY_DAYS: int = 7  # Past days of schedules used to measure how often slots change
+    CRAWL_FULL_FACTOR: float = 2.0  # Full events are revisited this many times less often
+
+    # EFS_ID RESOLUTION
+    EFS_ID_CACHE: bool = False  # Persist URL to EFS_ID resolutions between runs
+    EFS_ID_CACHE_TTL_DAYS: int = 30
+    EFS_ID_CACHE_NEGATIVE_TTL_HOURS: int = 12  # URLs that didn't lead to a collection
+
+    # HTTP CONCURRENCY (adaptive, per host)
+    HTTP_MIN_CONCURRENCY: int = 2
+    HTTP_MAX_CONCURRENCY: int = 50
+    HTTP_INITIAL_CONCURRENCY: int = 5
+    HTTP_LATENCY_TARGET: float = 2.0  # Seconds, slower responses stop the limit from growing
+
+    # CARTO API
+    API_BASE_URL: str = "https://oudonner.api.efs.sante.fr/"
+    API_TIMEOUT: float = 30.0
+    API_HTTP2: bool = True  # With the `h2` package of the `httpx[http2]` dependency
+    API_MAX_CONNECTIONS: int = 10  # Warm connections kept to the API
+    API_KEEPALIVE_EXPIRY: float = 60.0
+    API_RAW_JSON: bool = False  # Validate the responses straight into the schemas, without the generated models
+    API_MSGSPEC: bool = False  # Otherwise decode them with msgspec structs, the generated models on rejected bodies
 
     # POSTGRES
     POSTGRES_USER: str = "postgres"
@@ -21,6 +60,16 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str = "127.0.0.1"
     POSTGRES_PORT: str = "5432"
     POSTGRES_DB: str = "collecte"
+    DB_BULK_WRITES: bool = False  # Use set-based upserts instead of one session per row
+    DB_BATCH_SIZE: int = 500  # Rows per multi-row INSERT statement
+    DB_STREAM_BATCH: int = 1000  # Rows fetched and validated at once by the loaders
+    SNAPSHOT_MODE: str = "full"  # "full" to insert every snapshot, "delta" to only insert changes
+
+    # PARTITIONS (collection_group_snapshots and schedules, by month)
+    PARTITION_MONTHS_AHEAD: int = 3  # Future partitions created in advance
+    SNAPSHOTS_RETENTION_MONTHS: int | None = None  # Past months kept, everything is kept when not set
+    SCHEDULES_RETENTION_MONTHS: int | None = None
+    PARTITION_RETENTION_ACTION: str = "detach"  # "detach" keeps expired partitions as tables, "drop" deletes them
 
     # LOKI
     LOKI_URL: str | None = None
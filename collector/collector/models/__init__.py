@@ -3,8 +3,11 @@ from collector.models.collection import (
     CollectionGroupModel,
     CollectionGroupSnapshotModel,
 )
+from collector.models.crawl_state import CrawlStateModel
+from collector.models.efs_id import EfsIdCacheModel
 from collector.models.group import GroupModel
 from collector.models.location import LocationModel
+from collector.models.rollups import CollectionGroupDailyStatsModel, ScheduleDailyStatsModel
 from collector.models.schedules import ScheduleModel
 
 __all__ = [
@@ -14,4 +17,8 @@ __all__ = [
     "CollectionEventModel",
     "CollectionGroupSnapshotModel",
     "ScheduleModel",
+    "EfsIdCacheModel",
+    "CrawlStateModel",
+    "CollectionGroupDailyStatsModel",
+    "ScheduleDailyStatsModel",
 ]
@@ -1,7 +1,7 @@
 from datetime import UTC, datetime, time
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, ForeignKey, String, UniqueConstraint
+from sqlalchemy import DateTime, ForeignKey, Index, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from collector.models.base import Base
@@ -31,7 +31,12 @@ class CollectionGroupModel(Base):
         super().__init__(**kw)
 
     __tablename__ = "collection_groups"
-    __table_args__ = (UniqueConstraint("efs_id", "nature", name="unique_collection_group"),)
+    __table_args__ = (
+        UniqueConstraint("efs_id", "nature", name="unique_collection_group"),
+        # Dashboards: collections of a location, and upcoming collections
+        Index("ix_collection_groups_location_id_start_date", "location_id", "start_date"),
+        Index("ix_collection_groups_end_date", "end_date", postgresql_include=["location_id", "start_date", "id"]),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     efs_id: Mapped[str | None] = mapped_column(unique=True, nullable=True, index=True)
@@ -57,6 +62,7 @@ class CollectionGroupModel(Base):
 
     # Metadata
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    content_hash: Mapped[str | None] = mapped_column(String(32))
 
     # Relationships
     group_code: Mapped[str] = mapped_column(ForeignKey("groups.gr_code", ondelete="CASCADE"))
@@ -74,6 +80,7 @@ class CollectionEventModel(Base):
     """SQLAlchemy: Single event information"""
 
     __tablename__ = "collection_events"
+    __table_args__ = (Index("ix_collection_events_group_id_date", "collection_group_id", "date"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     lp_code: Mapped[str] = mapped_column(String(10))
@@ -87,6 +94,7 @@ class CollectionEventModel(Base):
 
     # Metadata
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    content_hash: Mapped[str | None] = mapped_column(String(32))
 
     # Relationships
     collection_group_id: Mapped[int] = mapped_column(ForeignKey("collection_groups.id", ondelete="CASCADE"))
@@ -98,6 +106,15 @@ class CollectionGroupSnapshotModel(Base):
     """SQLAlchemy: Snapshot of stats for an collection group"""
 
     __tablename__ = "collection_group_snapshots"
+    __table_args__ = (
+        Index(
+            "ix_collection_group_snapshots_group_id_created_at",
+            "collection_group_id",
+            "created_at",
+            postgresql_include=["taux_remplissage"],
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
 
@@ -119,7 +136,12 @@ class CollectionGroupSnapshotModel(Base):
     nb_places_reservees_cpa: Mapped[int | None]
 
     # Metadata
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC), index=True)
+    # Partition key, part of the primary key
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC), primary_key=True, index=True
+    )
+    # Last time the same values were observed, only set with SNAPSHOT_MODE="delta"
+    valid_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
     # Relationships
     collection_group_id: Mapped[int] = mapped_column(ForeignKey("collection_groups.id", ondelete="CASCADE"))
@@ -0,0 +1,22 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from collector.models.base import Base
+
+
+class CrawlStateModel(Base):
+    """SQLAlchemy: Crawl history of a booking page, used to plan its next crawl"""
+
+    __tablename__ = "crawl_state"
+
+    url: Mapped[str] = mapped_column(primary_key=True)
+
+    # Validators sent back for a conditional GET
+    etag: Mapped[str | None]
+    last_modified: Mapped[str | None]
+
+    # Metadata
+    crawled_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    next_crawl_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
@@ -0,0 +1,18 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from collector.models.base import Base
+
+
+class EfsIdCacheModel(Base):
+    """SQLAlchemy: Resolution of a booking URL into an EFS_ID"""
+
+    __tablename__ = "efs_id_cache"
+
+    url: Mapped[str] = mapped_column(primary_key=True)
+    efs_id: Mapped[str | None]  # None when the URL doesn't lead to a collection page
+
+    # Metadata
+    resolved_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
@@ -0,0 +1,52 @@
+from datetime import date, datetime
+
+from sqlalchemy import DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from collector.models.base import Base
+
+
+class CollectionGroupDailyStatsModel(Base):
+    """SQLAlchemy: Snapshots of a collection group over a day, read by the dashboards"""
+
+    __tablename__ = "collection_group_daily_stats"
+
+    collection_group_id: Mapped[int] = mapped_column(primary_key=True)
+    day: Mapped[date] = mapped_column(primary_key=True)
+
+    # Values of the last snapshot of the day
+    taux_remplissage: Mapped[float | None]
+    nb_places_restantes_st: Mapped[int | None]
+    nb_places_totales_st: Mapped[int | None]
+    nb_places_reservees_st: Mapped[int | None]
+
+    # Range of the remaining slots over the day
+    min_places_restantes_st: Mapped[int | None]
+    max_places_restantes_st: Mapped[int | None]
+    min_places_restantes_pla: Mapped[int | None]
+    max_places_restantes_pla: Mapped[int | None]
+    min_places_restantes_cpa: Mapped[int | None]
+    max_places_restantes_cpa: Mapped[int | None]
+
+    # Metadata
+    n_snapshots: Mapped[int]
+    last_snapshot_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+class ScheduleDailyStatsModel(Base):
+    """SQLAlchemy: Schedules of an event over a day, read by the dashboards"""
+
+    __tablename__ = "schedule_daily_stats"
+
+    event_id: Mapped[int] = mapped_column(primary_key=True)
+    day: Mapped[date] = mapped_column(primary_key=True)
+    collection_group_id: Mapped[int] = mapped_column(index=True)
+
+    # Slots of the last schedule of the day, and their range over the day
+    total_slots: Mapped[int]
+    min_total_slots: Mapped[int]
+    max_total_slots: Mapped[int]
+
+    # Metadata
+    n_snapshots: Mapped[int]
+    last_snapshot_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -1,6 +1,6 @@
 from datetime import date, datetime, time
 
-from sqlalchemy import DateTime, ForeignKey
+from sqlalchemy import DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from collector.models import CollectionEventModel
@@ -11,15 +11,21 @@ class ScheduleModel(Base):
     """SQLAlchemy: Informations relative to a schedule event"""
 
     __tablename__ = "schedules"
+    __table_args__ = (
+        # Dashboards: schedules of an event or of a collection, by snapshot date
+        Index("ix_schedules_event_id_created_at", "event_id", "created_at", postgresql_include=["total_slots"]),
+        Index("ix_schedules_efs_id_created_at", "efs_id", "created_at", postgresql_include=["total_slots", "event_id"]),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    efs_id: Mapped[str] = mapped_column(index=True)
+    efs_id: Mapped[str]
 
     # Details
     date: Mapped[date]
     location: Mapped[str | None]  # Found on the webpage (not linked to Locations)
     url: Mapped[str]
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)  # Partition key
 
     # Data
     total_slots: Mapped[int]
@@ -1,9 +1,18 @@
+from collector.schemas.api import (
+    CollectionsResultAdapter,
+    CollectionsResultSchema,
+    GroupsAdapter,
+    LocationsResultAdapter,
+    LocationsResultSchema,
+)
 from collector.schemas.collection import (
     CollectionEventSchema,
     CollectionGroupSchema,
     CollectionGroupSnapshotSchema,
     CollectionSchema,
+    CollectionUrlsSchema,
 )
+from collector.schemas.crawl_state import CrawlStateSchema
 from collector.schemas.group import GroupSchema
 from collector.schemas.location import LocationSchema
 from collector.schemas.schedules import (
@@ -19,7 +28,14 @@ __all__ = [
     "CollectionGroupSchema",
     "CollectionEventSchema",
     "CollectionGroupSnapshotSchema",
+    "CollectionUrlsSchema",
     "ScheduleSchema",
     "ScheduleGroupSchema",
     "ScheduleEventSchema",
+    "CrawlStateSchema",
+    "CollectionsResultSchema",
+    "LocationsResultSchema",
+    "CollectionsResultAdapter",
+    "LocationsResultAdapter",
+    "GroupsAdapter",
 ]
@@ -0,0 +1,28 @@
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+from collector.schemas.group import GroupSchema
+from collector.schemas.location import LocationSchema
+
+
+class CollectionsResultSchema(BaseModel):
+    """Pydantic: Body of the collections searches of the carto API"""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    sampling_location_collections: list[LocationSchema] | None = Field(
+        alias="samplingLocationCollections", default=None
+    )
+
+
+class LocationsResultSchema(BaseModel):
+    """Pydantic: Body of the locations search of the carto API"""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    sampling_location_entities: list[LocationSchema] | None = Field(alias="samplingLocationEntities", default=None)
+
+
+# Validate the raw JSON bodies of the carto API (see `services.utils.api_json_to_pydantic`)
+CollectionsResultAdapter = TypeAdapter(CollectionsResultSchema)
+LocationsResultAdapter = TypeAdapter(LocationsResultSchema)
+GroupsAdapter = TypeAdapter(list[GroupSchema])
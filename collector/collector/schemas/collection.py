@@ -1,7 +1,26 @@
+import hashlib
+import json
 import re
 from datetime import datetime, time
+from itertools import batched
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+
+def booking_url(url_blood: str | None, url_plasma: str | None, url_platelet: str | None) -> str | None:
+    """Return the first available url for booking"""
+    url = url_blood or url_plasma or url_platelet
+
+    if url and not re.match(r"https?://", url):
+        url = f"https://{url}"
+
+    return url
+
+
+def fingerprint(data: dict) -> str:
+    """Return a stable hash of the given data, used to detect unchanged rows"""
+    normalized = json.dumps(data, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
 
 
 class CollectionGroupSnapshotSchema(BaseModel):
@@ -31,6 +50,10 @@ class CollectionGroupSnapshotSchema(BaseModel):
     # Relations
     collection_group_id: int | None = None
 
+    def counters(self) -> dict:
+        """Values compared between two snapshots of a collection"""
+        return self.model_dump(exclude={"id", "collection_group_id"})
+
 
 class CollectionEventSchema(BaseModel):
     """Pydantic: Single event information"""
@@ -50,6 +73,9 @@ class CollectionEventSchema(BaseModel):
     # Relations
     collection_group_id: int | None = None
 
+    def fingerprint(self) -> str:
+        return fingerprint(self.model_dump(mode="json"))
+
     def info(self) -> dict:
         return {
             **self.model_dump(include=["id", "lp_code"]),
@@ -93,19 +119,11 @@ class CollectionGroupSchema(BaseModel):
     @property
     def url(self) -> str:
         """Return the first available url for booking"""
-        url = None
-
-        if self.url_blood:
-            url = self.url_blood
-        elif self.url_plasma:
-            url = self.url_plasma
-        elif self.url_platelet:
-            url = self.url_platelet
+        return booking_url(self.url_blood, self.url_plasma, self.url_platelet)
 
-        if url and not re.match(r"https?://", url):
-            url = f"https://{url}"
-
-        return url
+    def fingerprint(self) -> str:
+        """Hash of the stored columns, the location of an existing collection is never updated"""
+        return fingerprint(self.model_dump(mode="json", exclude={"id", "location_id", "events", "snapshots"}))
 
     def update_ids(self, _id: int):
         for snapshot in self.snapshots:
@@ -132,6 +150,23 @@ class CollectionGroupSchema(BaseModel):
         }
 
 
+class CollectionUrlsSchema(BaseModel):
+    """Pydantic: Booking URLs of a collection group, the only columns read to plan a crawl"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    efs_id: str | None = None
+    start_date: datetime = None
+    url_blood: str | None = None
+    url_plasma: str | None = None
+    url_platelet: str | None = None
+
+    @property
+    def url(self) -> str:
+        """Return the first available url for booking"""
+        return booking_url(self.url_blood, self.url_plasma, self.url_platelet)
+
+
 class CollectionSchema(BaseModel):
     """Pydantic: Main collection information"""
 
@@ -182,19 +217,7 @@ class CollectionSchema(BaseModel):
     @property
     def url(self) -> str:
         """Return the first available url for booking"""
-        url = None
-
-        if self.url_blood:
-            url = self.url_blood
-        elif self.url_plasma:
-            url = self.url_plasma
-        elif self.url_platelet:
-            url = self.url_platelet
-
-        if url and not re.match(r"https?://", url):
-            url = f"https://{url}"
-
-        return url
+        return booking_url(self.url_blood, self.url_plasma, self.url_platelet)
 
     def info(self) -> dict:
         return {
@@ -263,3 +286,44 @@ class CollectionSchema(BaseModel):
             # Make sure to not take an event ID as PK
             group.id = None
         return group
+
+
+CollectionGroupsAdapter = TypeAdapter(list[CollectionGroupSchema])
+# Collections validated at once by `collections_as_groups`, bounds the records kept alive
+TRANSFORM_CHUNK = 256
+
+# Fields copied from a collection by `collections_as_groups`, the others are set or left empty
+_GROUP_FIELDS = tuple(
+    name for name in CollectionGroupSchema.model_fields if name in CollectionSchema.model_fields and name != "id"
+)
+_EVENT_FIELDS = tuple(name for name in CollectionEventSchema.model_fields if name in CollectionSchema.model_fields)
+_SNAPSHOT_FIELDS = tuple(
+    name
+    for name in CollectionGroupSnapshotSchema.model_fields
+    if name in CollectionSchema.model_fields and name != "id"
+)
+
+
+def collections_as_groups(collections: list[CollectionSchema]) -> list[CollectionGroupSchema]:
+    """Return the collections as groups, as `CollectionSchema.as_group(from_db=False)`.
+
+    The records of the groups, events and snapshots are read from the already validated
+    collections, then validated by chunks instead of one model at a time.
+    """
+    groups = []
+    for chunk in batched(collections, TRANSFORM_CHUNK):
+        records = []
+        for collection in chunk:
+            values = collection.__dict__
+            members = [collection, *collection.children] if collection.children else [collection]
+            dates = [member.date for member in members if member.date]
+            record = {name: values[name] for name in _GROUP_FIELDS}
+            record["start_date"] = min(dates)
+            record["end_date"] = max(dates)
+            record["events"] = [{name: member.__dict__[name] for name in _EVENT_FIELDS} for member in members]
+            snapshot = {name: values[name] for name in _SNAPSHOT_FIELDS}
+            snapshot["id"] = None
+            record["snapshots"] = [snapshot]
+            records.append(record)
+        groups.extend(CollectionGroupsAdapter.validate_python(records))
+    return groups
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class CrawlStateSchema(BaseModel):
+    """Pydantic: Crawl history of a booking page"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    url: str
+    etag: str | None = None
+    last_modified: str | None = None
+    crawled_at: datetime
+    next_crawl_at: datetime
+
+    def info(self) -> dict:
+        return self.model_dump(include=["url", "next_crawl_at"], mode="json")
@@ -107,6 +107,10 @@ class ScheduleGroupSchema(BaseModel):
     created_at: datetime = Field(..., alias="time")
     events: list[ScheduleEventSchema]
 
+    # Validators of the crawled page
+    etag: str | None = None
+    last_modified: str | None = None
+
     def info(self) -> dict:
         return self.model_dump(include=["efs_id", "url", "location"])
 
@@ -115,7 +119,7 @@ class ScheduleGroupSchema(BaseModel):
         for event in self.events:
             schedules.append(
                 ScheduleSchema(
-                    **event.model_dump() | self.model_dump(exclude={"events"}),
+                    **event.model_dump() | self.model_dump(exclude={"events", "etag", "last_modified"}),
                 )
             )
         return schedules
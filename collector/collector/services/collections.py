@@ -1,11 +1,16 @@
 import asyncio
 import logging
-from datetime import datetime
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+from itertools import batched
 
-from sqlalchemy import select
+from pydantic import BaseModel
+from sqlalchemy import Result, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from collector.core.database import db_samaphore, get_db
+from collector.core.settings import settings
 
 # Models
 from collector.models import (
@@ -19,22 +24,34 @@ from collector.schemas import (
     CollectionEventSchema,
     CollectionGroupSchema,
     CollectionGroupSnapshotSchema,
+    CollectionUrlsSchema,
 )
 from collector.schemas.location import LocationSchema
 
 # Services
-from collector.services.locations import get_location
+from collector.services.groups import get_group_codes
+from collector.services.locations import get_location, load_location_index, location_key
 
-from .utils import sqlalchemy_to_pydantic
+from .utils import select_columns, stream_pydantic
 
 logger = logging.getLogger(__name__)
 
 
-async def load_collection_groups() -> list[CollectionGroupSchema]:
+async def iter_collection_groups[T: BaseModel](
+    *criteria, schema: type[T] = CollectionGroupSchema
+) -> AsyncIterator[list[T]]:
+    """Yield the collection groups matching the criteria from database, by batches of `DB_STREAM_BATCH`.
+
+    Only the columns of `schema` are selected.
+    """
     async with get_db() as session:
-        results = await session.execute(select(CollectionGroupModel))
-        collections = results.scalars().all()
-        return await sqlalchemy_to_pydantic(collections, CollectionGroupSchema)
+        stmt = select_columns(CollectionGroupModel, schema).where(*criteria)
+        async for collections in stream_pydantic(session, stmt, schema):
+            yield collections
+
+
+async def load_collection_groups() -> list[CollectionGroupSchema]:
+    return [collection async for collections in iter_collection_groups() for collection in collections]
 
 
 async def get_collection(session: AsyncSession, efs_id: str) -> CollectionGroupModel | None:
@@ -43,17 +60,14 @@ async def get_collection(session: AsyncSession, efs_id: str) -> CollectionGroupM
     return results.scalar_one_or_none()
 
 
-async def get_active_collections() -> list[CollectionGroupSchema]:
-    """Filter and return all collection that have not already ended"""
-    async with get_db() as session:
-        try:
-            stmt = select(CollectionGroupModel).where(CollectionGroupModel.end_date >= datetime.now())
-            results = await session.execute(stmt)
-            collections = results.scalars().all()
-            return await sqlalchemy_to_pydantic(collections, CollectionGroupSchema)
-        except Exception as e:
-            logger.error("Failed to retrieve active collections", extra={"error": str(e)})
-            return []
+async def iter_active_collections() -> AsyncIterator[list[CollectionUrlsSchema]]:
+    """Yield the booking URLs of the collections that have not already ended, by batches"""
+    try:
+        active = iter_collection_groups(CollectionGroupModel.end_date >= datetime.now(), schema=CollectionUrlsSchema)
+        async for collections in active:
+            yield collections
+    except Exception as e:
+        logger.error("Failed to retrieve active collections", extra={"error": str(e)})
 
 
 async def get_event(session: AsyncSession, event_id: int) -> CollectionEventModel | None:
@@ -99,21 +113,23 @@ async def _handle_collection(
 
                 collection_db = await get_collection(session, collection.efs_id)
 
+                content_hash = collection.fingerprint()
                 if not collection_db:
                     # Collection does not exist, create it
-                    collection_db = CollectionGroupModel(**collection.model_dump())
+                    collection_db = CollectionGroupModel(**collection.model_dump(), content_hash=content_hash)
                     session.add(collection_db)
                     await session.commit()
                     return
-                else:
-                    # Collection does exist, update the values
+                elif collection_db.content_hash != content_hash:
+                    # Collection does exist and changed, update the values
                     for key, value in collection.model_dump(
                         exclude={"id", "location_id", "events", "snapshots"}
                     ).items():
                         setattr(collection_db, key, value)
+                    collection_db.content_hash = content_hash
 
-                await session.commit()
-                await session.refresh(collection_db)
+                    await session.commit()
+                    await session.refresh(collection_db)
 
                 # Update the ids of the events and snapshots
                 collection.update_ids(collection_db.id)
@@ -126,20 +142,26 @@ async def _handle_collection(
                 )
 
 
-async def _handle_event(event: CollectionEventSchema) -> CollectionEventModel:
+async def _handle_event(event: CollectionEventSchema) -> CollectionEventModel | None:
+    """Insert or update the event, return None when nothing was written"""
     async with db_samaphore:
         async with get_db() as session:
             try:
                 event_db = await get_event(session, event.id)
+                content_hash = event.fingerprint()
 
                 # Collection does not exist, create it
                 if not event_db:
-                    event_db = CollectionEventModel(**event.model_dump())
+                    event_db = CollectionEventModel(**event.model_dump(), content_hash=content_hash)
                     session.add(event_db)
+                elif event_db.content_hash == content_hash:
+                    # Event didn't change, nothing to write
+                    return None
                 else:
                     # Collection does exist, update the values
                     for key, value in event.model_dump().items():
                         setattr(event_db, key, value)
+                    event_db.content_hash = content_hash
 
                 await session.commit()
                 await session.refresh(event_db)
@@ -150,10 +172,20 @@ async def _handle_event(event: CollectionEventSchema) -> CollectionEventModel:
 
 async def _handle_snapshot(
     snapshot: CollectionGroupSnapshotSchema,
-) -> CollectionGroupSnapshotModel:
+) -> CollectionGroupSnapshotModel | None:
     async with db_samaphore:
         async with get_db() as session:
+            if settings.SNAPSHOT_MODE == "delta":
+                latest = await _load_latest_snapshots(session, [snapshot.collection_group_id])
+                unchanged, _ = _split_unchanged_snapshots([snapshot], latest)
+                if unchanged:
+                    await _extend_snapshots(session, unchanged)
+                    await session.commit()
+                    return None
+
             db_snapshot = CollectionGroupSnapshotModel(**snapshot.model_dump())
+            if settings.SNAPSHOT_MODE == "delta":
+                db_snapshot.created_at = db_snapshot.valid_until = datetime.now(UTC)
             session.add(db_snapshot)
             await session.commit()
             await session.refresh(db_snapshot)
@@ -164,7 +196,10 @@ async def save_location_collections(
     locations: list[LocationSchema],
 ) -> tuple[int, int, int]:
     # Add a good docstring for this function
-    """Save the collections of a list of locations in the database."""
+    """Save the collections of a list of locations in the database.
+
+    Return the number of collection groups, and of events and snapshots written.
+    """
 
     # Add location.id to each collection
     tasks = [_handle_location(location) for location in locations]
@@ -183,11 +218,250 @@ async def save_location_collections(
     events = [event for items in items_groups if items for event in items[0]]
     tasks = [_handle_event(event) for event in events]
 
-    await asyncio.gather(*tasks)
+    # Same counts as `bulk_save_location_collections`, the unchanged events and extended snapshots aren't written
+    n_events = sum(1 for event_db in await asyncio.gather(*tasks) if event_db is not None)
 
     # Add all snapshots
     snapshots = [snapshot for items in items_groups if items for snapshot in items[1]]
     tasks = [_handle_snapshot(snapshot) for snapshot in snapshots]
-    await asyncio.gather(*tasks)
+    n_snapshots = sum(1 for snapshot_db in await asyncio.gather(*tasks) if snapshot_db is not None)
 
-    return len(items_groups), len(events), len(snapshots)
+    return len(items_groups), n_events, n_snapshots
+
+
+def _resolve_collections(
+    locations: list[LocationSchema],
+    location_index: dict,
+    group_codes: set[str],
+) -> list[CollectionGroupSchema]:
+    """Attach the location id to each collection and drop the ones that can't be saved.
+
+    Collections are deduplicated by efs_id, the last occurrence wins.
+    """
+    collections: dict[str, CollectionGroupSchema] = {}
+    for location in locations:
+        location_id = location_index.get(location_key(location))
+        if not location_id:
+            logger.warning("Location doesn't exist", extra={**location.info()})
+            continue
+
+        for collection in location.collections:
+            if not collection:
+                continue
+            # This is usually because the collection is not already available
+            if not collection.efs_id:
+                logger.warning("Collection doesn't have EFS_ID", extra={**collection.info()})
+                continue
+            if collection.group_code not in group_codes:
+                logger.warning("No group found", extra={**collection.info()})
+                continue
+
+            collection.location_id = location_id
+            collections[collection.efs_id] = collection
+
+    return list(collections.values())
+
+
+async def _load_content_hashes(session: AsyncSession, key_column, keys: list) -> dict:
+    """Return the id and content hash of the existing rows, indexed by `key_column`"""
+    model = key_column.class_
+    hashes = {}
+    for batch in batched(keys, settings.DB_BATCH_SIZE):
+        stmt = select(key_column, model.id, model.content_hash).where(key_column.in_(batch))
+        results = await session.execute(stmt)
+        hashes.update({key: (_id, content_hash) for key, _id, content_hash in results})
+    return hashes
+
+
+async def _execute_batch(session: AsyncSession, stmt, table: str, keys: list) -> Result | None:
+    """Execute the statement of a batch in a savepoint, so a failed batch only drops its own rows.
+
+    Return None when the batch failed, after logging the keys of its rows.
+    """
+    try:
+        async with session.begin_nested():
+            return await session.execute(stmt)
+    except Exception as e:
+        logger.error("Failed to save batch, rows dropped", extra={"table": table, "keys": keys, "error": str(e)})
+        return None
+
+
+async def _upsert_collection_groups(session: AsyncSession, collections: list[CollectionGroupSchema]) -> dict[str, int]:
+    """Insert or update the collection groups and return their ids by efs_id"""
+    ids = {}
+    for batch in batched(collections, settings.DB_BATCH_SIZE):
+        rows = [
+            {
+                **collection.model_dump(exclude={"id", "events", "snapshots"}),
+                "content_hash": collection.fingerprint(),
+            }
+            for collection in batch
+        ]
+        stmt = insert(CollectionGroupModel).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CollectionGroupModel.efs_id],
+            # The location of an existing collection is never updated
+            set_={key: stmt.excluded[key] for key in rows[0] if key not in {"efs_id", "location_id"}},
+        ).returning(CollectionGroupModel.id, CollectionGroupModel.efs_id)
+        results = await _execute_batch(session, stmt, "collection_groups", [row["efs_id"] for row in rows])
+        if results is not None:
+            ids.update({efs_id: _id for _id, efs_id in results})
+    return ids
+
+
+async def _upsert_events(session: AsyncSession, events: list[CollectionEventSchema]) -> int:
+    """Insert or update the events by id and return the number of rows written"""
+    n_events = 0
+    for batch in batched(events, settings.DB_BATCH_SIZE):
+        rows = [{**event.model_dump(), "content_hash": event.fingerprint()} for event in batch]
+        stmt = insert(CollectionEventModel).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CollectionEventModel.id],
+            set_={key: stmt.excluded[key] for key in rows[0] if key != "id"},
+        ).returning(CollectionEventModel.id)
+        results = await _execute_batch(session, stmt, "collection_events", [row["id"] for row in rows])
+        if results is not None:
+            n_events += len(results.all())
+    return n_events
+
+
+async def _load_latest_snapshots(
+    session: AsyncSession, group_ids: list[int]
+) -> dict[int, CollectionGroupSnapshotSchema]:
+    """Return the last snapshot of each collection group"""
+    latest = {}
+    for batch in batched(group_ids, settings.DB_BATCH_SIZE):
+        stmt = (
+            select(CollectionGroupSnapshotModel)
+            .where(CollectionGroupSnapshotModel.collection_group_id.in_(batch))
+            .distinct(CollectionGroupSnapshotModel.collection_group_id)
+            .order_by(CollectionGroupSnapshotModel.collection_group_id, CollectionGroupSnapshotModel.created_at.desc())
+        )
+        results = await session.execute(stmt)
+        for snapshot in results.scalars().all():
+            latest[snapshot.collection_group_id] = CollectionGroupSnapshotSchema.model_validate(snapshot)
+    return latest
+
+
+def _split_unchanged_snapshots(
+    snapshots: list[CollectionGroupSnapshotSchema],
+    latest: dict[int, CollectionGroupSnapshotSchema],
+) -> tuple[list[int], list[CollectionGroupSnapshotSchema]]:
+    """Return the ids of the last snapshots still valid, and the snapshots with new values"""
+    unchanged, changed = [], []
+    for snapshot in snapshots:
+        previous = latest.get(snapshot.collection_group_id)
+        if previous and previous.counters() == snapshot.counters():
+            unchanged.append(previous.id)
+        else:
+            changed.append(snapshot)
+    return unchanged, changed
+
+
+async def _extend_snapshots(session: AsyncSession, snapshot_ids: list[int]) -> None:
+    """Mark the snapshots as still valid now"""
+    now = datetime.now(UTC)
+    for batch in batched(snapshot_ids, settings.DB_BATCH_SIZE):
+        stmt = (
+            update(CollectionGroupSnapshotModel)
+            .where(CollectionGroupSnapshotModel.id.in_(batch))
+            .values(valid_until=now)
+        )
+        await _execute_batch(session, stmt, "collection_group_snapshots", list(batch))
+
+
+async def _insert_snapshots(session: AsyncSession, snapshots: list[CollectionGroupSnapshotSchema]) -> int:
+    """Insert the snapshots and return the number of rows written.
+
+    With SNAPSHOT_MODE="delta", a snapshot with the same values as the last one of its collection
+    isn't inserted, the `valid_until` of the last one is moved forward instead.
+    """
+    extra = {}
+    if settings.SNAPSHOT_MODE == "delta":
+        latest = await _load_latest_snapshots(session, list({s.collection_group_id for s in snapshots}))
+        unchanged, snapshots = _split_unchanged_snapshots(snapshots, latest)
+        await _extend_snapshots(session, unchanged)
+        logger.info("Unchanged snapshots extended", extra={"n_snapshots_extended": len(unchanged)})
+        now = datetime.now(UTC)
+        extra = {"created_at": now, "valid_until": now}
+
+    n_snapshots = 0
+    for batch in batched(snapshots, settings.DB_BATCH_SIZE):
+        rows = [{**snapshot.model_dump(exclude={"id"}), **extra} for snapshot in batch]
+        stmt = insert(CollectionGroupSnapshotModel).values(rows)
+        keys = [row["collection_group_id"] for row in rows]
+        if await _execute_batch(session, stmt, "collection_group_snapshots", keys) is not None:
+            n_snapshots += len(rows)
+    return n_snapshots
+
+
+async def load_collection_references() -> tuple[dict, set[str]]:
+    """Return the location index and group codes needed to save collections"""
+    async with get_db() as session:
+        return await load_location_index(session), await get_group_codes(session)
+
+
+async def bulk_save_location_collections(
+    locations: list[LocationSchema],
+    location_index: dict | None = None,
+    group_codes: set[str] | None = None,
+) -> tuple[int, int, int]:
+    """Save the collections of a list of locations in the database with set-based statements.
+
+    Same result as `save_location_collections`, but every table is written with multi-row
+    upserts inside a single transaction, so the number of round-trips depends on the number
+    of batches instead of the number of rows. Each statement batch runs in a savepoint: a batch
+    rejected by the database is logged and dropped, the other ones are saved. Callers saving
+    several batches can pass the references from `load_collection_references` to avoid
+    reloading them each time.
+    """
+    async with get_db() as session:
+        try:
+            async with session.begin():
+                if location_index is None:
+                    location_index = await load_location_index(session)
+                if group_codes is None:
+                    group_codes = await get_group_codes(session)
+                collections = _resolve_collections(locations, location_index, group_codes)
+                if not collections:
+                    return 0, 0, 0
+
+                # Rows with the same content hash are left untouched
+                existing = await _load_content_hashes(
+                    session, CollectionGroupModel.efs_id, [collection.efs_id for collection in collections]
+                )
+                changed = [c for c in collections if existing.get(c.efs_id, (None, None))[1] != c.fingerprint()]
+                ids = {efs_id: _id for efs_id, (_id, _) in existing.items()}
+                ids.update(await _upsert_collection_groups(session, changed))
+
+                events, snapshots = [], []
+                for collection in collections:
+                    # The events and snapshots of a dropped collection group can't reference it
+                    if collection.efs_id not in ids:
+                        continue
+                    collection.update_ids(ids[collection.efs_id])
+                    events.extend(collection.events)
+                    snapshots.extend(collection.snapshots)
+
+                # The same event can't be updated twice by a single statement
+                events = list({event.id: event for event in events}.values())
+                existing_events = await _load_content_hashes(
+                    session, CollectionEventModel.id, [event.id for event in events]
+                )
+                changed_events = [e for e in events if existing_events.get(e.id, (None, None))[1] != e.fingerprint()]
+                n_events = await _upsert_events(session, changed_events)
+                n_snapshots = await _insert_snapshots(session, snapshots)
+
+                logger.info(
+                    "Collections compared with database",
+                    extra={
+                        "n_collections_changed": len(changed),
+                        "n_collections_unchanged": len(collections) - len(changed),
+                        "n_events_changed": len(changed_events),
+                        "n_events_unchanged": len(events) - len(changed_events),
+                    },
+                )
+                return len(ids), n_events, n_snapshots
+        except Exception as e:
+            logger.error("Failed to save collections", extra={"error": str(e)})
+            return 0, 0, 0
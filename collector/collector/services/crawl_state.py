@@ -0,0 +1,91 @@
+import logging
+from datetime import datetime
+from itertools import batched
+
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from collector.core.database import get_db
+from collector.core.settings import settings
+from collector.models import CrawlStateModel, ScheduleModel
+from collector.schemas import CrawlStateSchema
+
+logger = logging.getLogger(__name__)
+
+# Share of the consecutive snapshots where the slots changed, and whether the latest snapshots are full
+SlotStats = dict[str, tuple[float, bool]]
+
+
+async def load_crawl_states(urls: list[str]) -> dict[str, CrawlStateSchema]:
+    """Return the crawl history of the booking pages"""
+    async with get_db() as session:
+        try:
+            states = {}
+            for batch in batched(urls, settings.DB_BATCH_SIZE):
+                stmt = select(CrawlStateModel).where(CrawlStateModel.url.in_(batch))
+                results = await session.execute(stmt)
+                for state in results.scalars().all():
+                    states[state.url] = CrawlStateSchema.model_validate(state)
+            return states
+        except Exception as e:
+            logger.error("Failed to load crawl states", extra={"n_urls": len(urls), "error": str(e)})
+            return {}
+
+
+async def load_slot_stats(efs_ids: list[str], since: datetime) -> SlotStats:
+    """Return how often the slots of each collection changed since `since`, and whether it is full.
+
+    A collection is full when the latest snapshot of each of its events has no slot left.
+    """
+    previous_slots = func.lag(ScheduleModel.total_slots).over(
+        partition_by=ScheduleModel.event_id, order_by=ScheduleModel.created_at
+    )
+    rank = func.row_number().over(partition_by=ScheduleModel.event_id, order_by=ScheduleModel.created_at.desc())
+    async with get_db() as session:
+        try:
+            stats = {}
+            for batch in batched(efs_ids, settings.DB_BATCH_SIZE):
+                snapshots = (
+                    select(
+                        ScheduleModel.efs_id,
+                        ScheduleModel.total_slots,
+                        previous_slots.label("previous_slots"),
+                        rank.label("rank"),
+                    )
+                    .where(ScheduleModel.efs_id.in_(batch), ScheduleModel.created_at >= since)
+                    .subquery()
+                )
+                stmt = select(
+                    snapshots.c.efs_id,
+                    func.avg(case((snapshots.c.total_slots != snapshots.c.previous_slots, 1.0), else_=0.0)).filter(
+                        snapshots.c.previous_slots.is_not(None)
+                    ),
+                    func.bool_and(snapshots.c.total_slots == 0).filter(snapshots.c.rank == 1),
+                ).group_by(snapshots.c.efs_id)
+                for efs_id, volatility, is_full in await session.execute(stmt):
+                    stats[efs_id] = (float(volatility or 0.0), bool(is_full))
+            return stats
+        except Exception as e:
+            logger.error("Failed to load slot stats", extra={"n_collections": len(efs_ids), "error": str(e)})
+            return {}
+
+
+async def save_crawl_states(states: list[CrawlStateSchema]) -> None:
+    """ADD/UPDATE the crawl history of the booking pages"""
+    async with get_db() as session:
+        try:
+            async with session.begin():
+                for batch in batched(states, settings.DB_BATCH_SIZE):
+                    stmt = insert(CrawlStateModel).values([state.model_dump() for state in batch])
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[CrawlStateModel.url],
+                        set_={
+                            "etag": stmt.excluded.etag,
+                            "last_modified": stmt.excluded.last_modified,
+                            "crawled_at": stmt.excluded.crawled_at,
+                            "next_crawl_at": stmt.excluded.next_crawl_at,
+                        },
+                    )
+                    await session.execute(stmt)
+        except Exception as e:
+            logger.error("Failed to save crawl states", extra={"n_urls": len(states), "error": str(e)})
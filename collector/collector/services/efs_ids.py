@@ -0,0 +1,66 @@
+import logging
+from datetime import UTC, datetime, timedelta
+from itertools import batched
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
+
+from collector.core.database import get_db
+from collector.core.settings import settings
+from collector.models import CollectionGroupModel, EfsIdCacheModel
+from collector.schemas.collection import booking_url
+
+logger = logging.getLogger(__name__)
+
+
+async def load_efs_id_cache() -> dict[str, str | None]:
+    """Return the known EFS_ID of each booking URL.
+
+    Entries come from the resolution cache (positive and negative ones, while they are still fresh)
+    and from the collection groups stored in database within the same TTL as the positive ones.
+    """
+    now = datetime.now(UTC)
+    expired_before = now - timedelta(days=settings.EFS_ID_CACHE_TTL_DAYS)
+    async with get_db() as session:
+        try:
+            stmt = select(EfsIdCacheModel.url, EfsIdCacheModel.efs_id).where(
+                or_(
+                    EfsIdCacheModel.efs_id.is_not(None) & (EfsIdCacheModel.resolved_at >= expired_before),
+                    EfsIdCacheModel.efs_id.is_(None)
+                    & (EfsIdCacheModel.resolved_at >= now - timedelta(hours=settings.EFS_ID_CACHE_NEGATIVE_TTL_HOURS)),
+                )
+            )
+            cache = {url: efs_id for url, efs_id in await session.execute(stmt)}
+
+            # The URL of a stored collection group was resolved into its EFS_ID when the group was created
+            stmt = select(
+                CollectionGroupModel.url_blood,
+                CollectionGroupModel.url_plasma,
+                CollectionGroupModel.url_platelet,
+                CollectionGroupModel.efs_id,
+            ).where(CollectionGroupModel.efs_id.is_not(None), CollectionGroupModel.created_at >= expired_before)
+            for url_blood, url_plasma, url_platelet, efs_id in await session.execute(stmt):
+                url = booking_url(url_blood, url_plasma, url_platelet)
+                if url:
+                    cache.setdefault(url, efs_id)
+
+            return cache
+        except Exception as e:
+            logger.error("Failed to load EFS_ID cache", extra={"error": str(e)})
+            return {}
+
+
+async def save_efs_id_cache(resolutions: dict[str, str | None]) -> None:
+    """ADD/UPDATE the resolution of booking URLs into EFS_IDs"""
+    async with get_db() as session:
+        try:
+            async with session.begin():
+                for batch in batched(resolutions.items(), settings.DB_BATCH_SIZE):
+                    stmt = insert(EfsIdCacheModel).values([{"url": url, "efs_id": efs_id} for url, efs_id in batch])
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[EfsIdCacheModel.url],
+                        set_={"efs_id": stmt.excluded.efs_id, "resolved_at": stmt.excluded.resolved_at},
+                    )
+                    await session.execute(stmt)
+        except Exception as e:
+            logger.error("Failed to save EFS_ID cache", extra={"n_urls": len(resolutions), "error": str(e)})
@@ -8,7 +8,7 @@ from collector.core.database import db_samaphore, get_db
 from collector.models import GroupModel
 from collector.schemas import GroupSchema
 
-from .utils import sqlalchemy_to_pydantic
+from .utils import select_columns, stream_pydantic
 
 logger = logging.getLogger(__name__)
 
@@ -16,11 +16,8 @@ logger = logging.getLogger(__name__)
 async def load_groups() -> list[GroupSchema]:
     """Return all groups from database"""
     async with get_db() as session:
-        stmt = select(GroupModel)
-        results = await session.execute(stmt)
-        groups = results.scalars().all()
-
-        return await sqlalchemy_to_pydantic(groups, GroupSchema)
+        stmt = select_columns(GroupModel, GroupSchema)
+        return [group async for groups in stream_pydantic(session, stmt, GroupSchema) for group in groups]
 
 
 async def get_group(session: AsyncSession, gr_code: str) -> GroupModel | None:
@@ -30,6 +27,12 @@ async def get_group(session: AsyncSession, gr_code: str) -> GroupModel | None:
     return results.scalar_one_or_none()
 
 
+async def get_group_codes(session: AsyncSession) -> set[str]:
+    """Return the code of every group stored in database"""
+    results = await session.execute(select(GroupModel.gr_code))
+    return set(results.scalars().all())
+
+
 async def add_group(group: GroupSchema) -> GroupModel | None:
     """Add a group to database"""
     async with db_samaphore:
@@ -1,25 +1,57 @@
 import asyncio
 import logging
+from itertools import batched
 
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from collector.core.database import db_samaphore, get_db
+from collector.core.settings import settings
 from collector.models import LocationModel
 from collector.schemas import LocationSchema
-from collector.services.groups import get_group
+from collector.services.groups import get_group, get_group_codes
 
-from .utils import sqlalchemy_to_pydantic
+from .utils import select_columns, stream_pydantic
 
 logger = logging.getLogger(__name__)
 
+# Natural key of a location, same columns as the `unique_location` constraint
+LocationKey = tuple[str | None, str, float, float, str]
+
+
+def location_key(location: LocationSchema | LocationModel) -> LocationKey:
+    """Return the natural key of a location"""
+    return (
+        location.name,
+        location.full_address,
+        location.latitude,
+        location.longitude,
+        location.sampling_location_code,
+    )
+
+
+async def load_location_index(session: AsyncSession) -> dict[LocationKey, int]:
+    """Return the id of every location from database indexed by its natural key"""
+    stmt = select(
+        LocationModel.id,
+        LocationModel.name,
+        LocationModel.full_address,
+        LocationModel.latitude,
+        LocationModel.longitude,
+        LocationModel.sampling_location_code,
+    )
+    results = await session.execute(stmt)
+    return {tuple(row[1:]): row[0] for row in results}
+
 
 async def load_locations() -> list[LocationSchema]:
     """Return all location from database"""
     async with get_db() as session:
-        results = await session.execute(select(LocationModel))
-        locations = results.scalars().all()
-        return await sqlalchemy_to_pydantic(locations, LocationSchema)
+        stmt = select_columns(LocationModel, LocationSchema)
+        return [
+            location async for locations in stream_pydantic(session, stmt, LocationSchema) for location in locations
+        ]
 
 
 async def get_postal_codes() -> list[str]:
@@ -75,3 +107,67 @@ async def save_locations(locations: list[LocationSchema]) -> list[LocationModel
     """Retrieve all locations from API and store them in database"""
     tasks = [add_location(location) for location in locations]
     return await asyncio.gather(*tasks)
+
+
+async def bulk_save_locations(locations: list[LocationSchema]) -> list[int]:
+    """ADD/UPDATE all locations with multi-row upserts on the `unique_location` constraint.
+
+    Groups and existing locations are preloaded once, so the whole refresh takes one statement
+    per batch instead of one session per location. Postgres never finds a conflict on a NULL
+    `name`, so the locations without name are updated by id when they're in the preloaded index,
+    and inserted otherwise.
+    """
+    async with get_db() as session:
+        try:
+            async with session.begin():
+                group_codes = await get_group_codes(session)
+                location_index = await load_location_index(session)
+
+                rows: dict[LocationKey, dict] = {}
+                for location in locations:
+                    if location.group_code not in group_codes:
+                        logger.warning("No group found", extra={**location.info()})
+                        continue
+                    # The same location can't be updated twice by a single statement
+                    rows[location_key(location)] = location.model_dump(exclude={"id", "collections"})
+
+                n_new = sum(1 for key in rows if key not in location_index)
+                logger.info(
+                    "Saving locations",
+                    extra={"n_new_locations": n_new, "n_existing_locations": len(rows) - n_new},
+                )
+
+                upserts, new_unnamed, known_unnamed = [], [], []
+                for key, row in rows.items():
+                    if row["name"] is not None:
+                        upserts.append(row)
+                    elif key in location_index:
+                        row.pop("group_code")
+                        known_unnamed.append({**row, "id": location_index[key]})
+                    else:
+                        new_unnamed.append(row)
+
+                key_columns = {"name", "full_address", "latitude", "longitude", "sampling_location_code"}
+                ids = []
+                for batch in batched(upserts, settings.DB_BATCH_SIZE):
+                    stmt = insert(LocationModel).values(batch)
+                    stmt = stmt.on_conflict_do_update(
+                        constraint="unique_location",
+                        set_={key: stmt.excluded[key] for key in batch[0] if key not in key_columns | {"group_code"}},
+                    ).returning(LocationModel.id)
+                    results = await session.execute(stmt)
+                    ids.extend(results.scalars().all())
+
+                for batch in batched(new_unnamed, settings.DB_BATCH_SIZE):
+                    results = await session.execute(insert(LocationModel).values(batch).returning(LocationModel.id))
+                    ids.extend(results.scalars().all())
+
+                if known_unnamed:
+                    # Bulk UPDATE by primary key
+                    await session.execute(update(LocationModel), known_unnamed)
+                    ids.extend(row["id"] for row in known_unnamed)
+
+                return ids
+        except Exception as e:
+            logger.error("Failed to save locations", extra={"error": str(e)})
+            return []
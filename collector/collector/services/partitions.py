@@ -0,0 +1,138 @@
+import logging
+import re
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from collector.core.database import get_db
+from collector.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Tables partitioned by month on `created_at`
+PARTITIONED_TABLES = ("collection_group_snapshots", "schedules")
+
+
+def month_start(day: date, offset: int = 0) -> date:
+    """Return the first day of the month `offset` months after the month of `day`"""
+    month = day.year * 12 + day.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Return the name of the partition holding the rows of `month`"""
+    return f"{table}_p{month:%Y_%m}"
+
+
+def retention_months(table: str) -> int | None:
+    """Return the number of past months kept for the table, None to keep everything"""
+    return {
+        "collection_group_snapshots": settings.SNAPSHOTS_RETENTION_MONTHS,
+        "schedules": settings.SCHEDULES_RETENTION_MONTHS,
+    }.get(table)
+
+
+async def list_partitions(session: AsyncSession, table: str) -> dict[str, date | None]:
+    """Return the partitions attached to the table with their month (None for the default partition)"""
+    stmt = text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+    """)
+    results = await session.execute(stmt, {"table": table})
+
+    partitions = {}
+    for name in results.scalars().all():
+        match = re.search(r"_p(\d{4})_(\d{2})$", name)
+        partitions[name] = date(int(match.group(1)), int(match.group(2)), 1) if match else None
+    return partitions
+
+
+def _partition_bounds(month: date) -> str:
+    return f"FOR VALUES FROM ('{month.isoformat()}') TO ('{month_start(month, 1).isoformat()}')"
+
+
+async def _move_default_rows(session: AsyncSession, table: str, default: str, name: str, month: date) -> bool:
+    """Create the partition of the month with the rows of the month left in the default partition.
+
+    Postgres refuses to create a partition whose rows are in the default partition (inserted while
+    the maintenance didn't run), so the default partition is detached while its rows are moved.
+    Return False, without creating the partition, when the default partition has no row of the month.
+    """
+    bounds = {"start": month, "end": month_start(month, 1)}
+    in_month = "created_at >= :start AND created_at < :end"
+    stmt = text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_month})")
+    if not (await session.execute(stmt, bounds)).scalar():
+        return False
+
+    await session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    await session.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {_partition_bounds(month)}"))
+    moved = await session.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_month}"), bounds)
+    await session.execute(text(f"DELETE FROM {default} WHERE {in_month}"), bounds)
+    await session.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+    logger.warning("Rows moved out of the default partition", extra={"partition": name, "n_rows": moved.rowcount})
+    return True
+
+
+async def create_partitions(session: AsyncSession, table: str, first_month: date, last_month: date) -> list[str]:
+    """Create the missing monthly partitions between the two months (included).
+
+    The rows of a created month found in the default partition are moved to the new partition.
+    """
+    existing = await list_partitions(session, table)
+    default = next((name for name, month in existing.items() if month is None), None)
+
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        name = partition_name(table, month)
+        if name not in existing:
+            if not default or not await _move_default_rows(session, table, default, name, month):
+                await session.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {_partition_bounds(month)}"))
+            created.append(name)
+        month = month_start(month, 1)
+    return created
+
+
+async def expire_partitions(session: AsyncSession, table: str, cutoff: date, action: str) -> list[str]:
+    """Detach the partitions of the months before `cutoff`, and drop them if `action` is "drop".
+
+    Detached partitions are kept as standalone tables, to be archived or dropped by hand.
+    """
+    partitions = await list_partitions(session, table)
+
+    expired = []
+    for name, month in sorted(partitions.items(), key=lambda item: item[1] or date.max):
+        if not month or month >= cutoff:
+            continue
+        await session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        if action == "drop":
+            await session.execute(text(f"DROP TABLE {name}"))
+        expired.append(name)
+    return expired
+
+
+async def maintain_partitions() -> dict[str, dict[str, list[str]]]:
+    """Create the next monthly partitions and apply the retention policy of every partitioned table"""
+    today = date.today()
+    report = {}
+    async with get_db() as session:
+        try:
+            async with session.begin():
+                for table in PARTITIONED_TABLES:
+                    created = await create_partitions(
+                        session, table, today, month_start(today, settings.PARTITION_MONTHS_AHEAD)
+                    )
+                    expired = []
+                    months = retention_months(table)
+                    if months is not None:
+                        cutoff = month_start(today, -months)
+                        expired = await expire_partitions(session, table, cutoff, settings.PARTITION_RETENTION_ACTION)
+                    report[table] = {"created": created, "expired": expired}
+            return report
+        except Exception as e:
+            logger.error("Failed to maintain partitions", extra={"error": str(e)})
+            return {}
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from datetime import date
+
+from sqlalchemy import text
+
+from collector.core.database import get_db
+
+logger = logging.getLogger(__name__)
+
+# Days from `:since` recomputed from the snapshots and upserted into each rollup read by the Grafana dashboards
+ROLLUPS = {
+    # One row per collection group and day, with the days of collection_group_snapshots_dense (delta snapshots are
+    # repeated every day). The snapshots no longer valid on `:since` are skipped before generating their days, and
+    # extending a delta snapshot only adds the days after its previous `valid_until`, the days before don't change
+    "collection_group_daily_stats": """
+        WITH snapshots AS (
+            SELECT *
+            FROM collection_group_snapshots
+            WHERE COALESCE(valid_until, created_at) >= CAST(:since AS date)
+        )
+        INSERT INTO collection_group_daily_stats (
+            collection_group_id, day, taux_remplissage, nb_places_restantes_st, nb_places_totales_st,
+            nb_places_reservees_st, min_places_restantes_st, max_places_restantes_st, min_places_restantes_pla,
+            max_places_restantes_pla, min_places_restantes_cpa, max_places_restantes_cpa, n_snapshots,
+            last_snapshot_at
+        )
+        SELECT
+            s.collection_group_id,
+            serie.created_at::date AS day,
+            (ARRAY_AGG(s.taux_remplissage ORDER BY serie.created_at DESC))[1],
+            (ARRAY_AGG(s.nb_places_restantes_st ORDER BY serie.created_at DESC))[1],
+            (ARRAY_AGG(s.nb_places_totales_st ORDER BY serie.created_at DESC))[1],
+            (ARRAY_AGG(s.nb_places_reservees_st ORDER BY serie.created_at DESC))[1],
+            MIN(s.nb_places_restantes_st),
+            MAX(s.nb_places_restantes_st),
+            MIN(s.nb_places_restantes_pla),
+            MAX(s.nb_places_restantes_pla),
+            MIN(s.nb_places_restantes_cpa),
+            MAX(s.nb_places_restantes_cpa),
+            COUNT(*),
+            MAX(serie.created_at)
+        FROM snapshots s
+        CROSS JOIN LATERAL (
+            SELECT generate_series(s.created_at, COALESCE(s.valid_until, s.created_at), INTERVAL '1 day')
+            UNION
+            SELECT COALESCE(s.valid_until, s.created_at)
+        ) AS serie(created_at)
+        WHERE serie.created_at >= CAST(:since AS date)
+        GROUP BY s.collection_group_id, serie.created_at::date
+        ON CONFLICT (collection_group_id, day) DO UPDATE SET
+            taux_remplissage = EXCLUDED.taux_remplissage,
+            nb_places_restantes_st = EXCLUDED.nb_places_restantes_st,
+            nb_places_totales_st = EXCLUDED.nb_places_totales_st,
+            nb_places_reservees_st = EXCLUDED.nb_places_reservees_st,
+            min_places_restantes_st = EXCLUDED.min_places_restantes_st,
+            max_places_restantes_st = EXCLUDED.max_places_restantes_st,
+            min_places_restantes_pla = EXCLUDED.min_places_restantes_pla,
+            max_places_restantes_pla = EXCLUDED.max_places_restantes_pla,
+            min_places_restantes_cpa = EXCLUDED.min_places_restantes_cpa,
+            max_places_restantes_cpa = EXCLUDED.max_places_restantes_cpa,
+            n_snapshots = EXCLUDED.n_snapshots,
+            last_snapshot_at = EXCLUDED.last_snapshot_at
+    """,
+    # One row per event and day, with the collection group of the event
+    "schedule_daily_stats": """
+        INSERT INTO schedule_daily_stats (
+            event_id, day, collection_group_id, total_slots, min_total_slots, max_total_slots, n_snapshots,
+            last_snapshot_at
+        )
+        SELECT
+            s.event_id,
+            s.created_at::date AS day,
+            e.collection_group_id,
+            (ARRAY_AGG(s.total_slots ORDER BY s.created_at DESC))[1],
+            MIN(s.total_slots),
+            MAX(s.total_slots),
+            COUNT(*),
+            MAX(s.created_at)
+        FROM schedules s
+        JOIN collection_events e ON e.id = s.event_id
+        WHERE s.created_at >= CAST(:since AS date)
+        GROUP BY s.event_id, s.created_at::date, e.collection_group_id
+        ON CONFLICT (event_id, day) DO UPDATE SET
+            collection_group_id = EXCLUDED.collection_group_id,
+            total_slots = EXCLUDED.total_slots,
+            min_total_slots = EXCLUDED.min_total_slots,
+            max_total_slots = EXCLUDED.max_total_slots,
+            n_snapshots = EXCLUDED.n_snapshots,
+            last_snapshot_at = EXCLUDED.last_snapshot_at
+    """,
+}
+ROLLUP_VIEWS = tuple(ROLLUPS)
+
+
+async def refresh_rollup(view: str) -> bool:
+    """Recompute the days of the rollup from its last one, the days before it are left untouched.
+
+    The last day may have been rolled up before its last snapshots, the first refresh computes every day.
+    """
+    async with get_db() as session:
+        try:
+            async with session.begin():
+                since = (await session.execute(text(f"SELECT MAX(day) FROM {view}"))).scalar() or date.min
+                results = await session.execute(text(ROLLUPS[view]), {"since": since})
+            logger.info("Rollup refreshed", extra={"view": view, "since": str(since), "n_rows": results.rowcount})
+            return True
+        except Exception as e:
+            logger.error("Failed to refresh rollup", extra={"view": view, "error": str(e)})
+            return False
+
+
+async def refresh_rollups() -> list[str]:
+    """Refresh every rollup in parallel, return the refreshed views"""
+    results = await asyncio.gather(*(refresh_rollup(view) for view in ROLLUP_VIEWS))
+    return [view for view, refreshed in zip(ROLLUP_VIEWS, results) if refreshed]
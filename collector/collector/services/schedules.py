@@ -1,15 +1,22 @@
 import logging
+from collections import defaultdict
+from datetime import date
+from itertools import batched
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 
-from collector.core.database import get_db
-from collector.models import ScheduleModel
+from collector.core.database import db_samaphore, get_db
+from collector.core.settings import settings
+from collector.models import CollectionEventModel, CollectionGroupModel, ScheduleModel
 from collector.schemas import CollectionEventSchema, ScheduleSchema
 from collector.services.collections import get_collection
 from collector.services.utils import sqlalchemy_to_pydantic
 
 logger = logging.getLogger(__name__)
 
+# Events of the collections indexed by (efs_id, date)
+EventIndex = dict[tuple[str, date], list[CollectionEventSchema]]
+
 
 async def load_schedules() -> list[ScheduleSchema]:
     """Return all groups from database"""
@@ -26,28 +33,49 @@ async def load_schedules() -> list[ScheduleSchema]:
 async def retrieve_events(
     schedule: ScheduleSchema,
 ) -> list[CollectionEventSchema] | None:
-    async with get_db() as session:
-        """Check if the schedule is linked to a collection.
-        Retrieve all events of that collection and return the ones that occure at the the same date
-        """
-        try:
-            collection_db = await get_collection(session, schedule.efs_id)
-
-            if not collection_db:
-                logger.warning("Collection not found", extra={**schedule.info()})
-                return None
-
-            await collection_db.awaitable_attrs.events
-            return [
-                CollectionEventSchema.model_validate(event)
-                for event in collection_db.events
-                if event.date.date() == schedule.date
-            ]
-        except Exception as e:
-            logger.error(
-                "Failed to retrieve events ",
-                extra={**schedule.info(), "error": str(e)},
-            )
+    """Check if the schedule is linked to a collection.
+    Retrieve all events of that collection and return the ones that occure at the the same date
+    """
+    async with db_samaphore:
+        async with get_db() as session:
+            try:
+                collection_db = await get_collection(session, schedule.efs_id)
+
+                if not collection_db:
+                    logger.warning("Collection not found", extra={**schedule.info()})
+                    return None
+
+                await collection_db.awaitable_attrs.events
+                return [
+                    CollectionEventSchema.model_validate(event)
+                    for event in collection_db.events
+                    if event.date.date() == schedule.date
+                ]
+            except Exception as e:
+                logger.error(
+                    "Failed to retrieve events ",
+                    extra={**schedule.info(), "error": str(e)},
+                )
+
+
+async def load_events_index(efs_ids: set[str]) -> EventIndex | None:
+    """Load the events of all the given collections with a single query and index them by (efs_id, date)"""
+    async with db_samaphore:
+        async with get_db() as session:
+            try:
+                stmt = (
+                    select(CollectionGroupModel.efs_id, CollectionEventModel)
+                    .join(CollectionEventModel.collection_group)
+                    .where(CollectionGroupModel.efs_id.in_(efs_ids))
+                )
+                results = await session.execute(stmt)
+
+                index = defaultdict(list)
+                for efs_id, event in results:
+                    index[(efs_id, event.date.date())].append(CollectionEventSchema.model_validate(event))
+                return dict(index)
+            except Exception as e:
+                logger.error("Failed to load events", extra={"n_collections": len(efs_ids), "error": str(e)})
 
 
 async def add_schedule(schedule: ScheduleSchema) -> ScheduleModel | None:
@@ -61,3 +89,22 @@ async def add_schedule(schedule: ScheduleSchema) -> ScheduleModel | None:
             return schedule_db
         except Exception as e:
             logger.error("Failed to add schedule", extra={**schedule.info(), "error": str(e)})
+
+
+async def bulk_add_schedules(schedules: list[ScheduleSchema]) -> int:
+    """Save all schedules in a single transaction with multi-row inserts.
+
+    Rows are serialized one batch at a time, so memory and connection usage stay bounded
+    whatever the number of schedules. Return the number of schedules saved.
+    """
+    async with db_samaphore:
+        async with get_db() as session:
+            try:
+                async with session.begin():
+                    for batch in batched(schedules, settings.DB_BATCH_SIZE):
+                        rows = [schedule.model_dump() for schedule in batch]
+                        await session.execute(insert(ScheduleModel).values(rows))
+                return len(schedules)
+            except Exception as e:
+                logger.error("Failed to add schedules", extra={"n_schedules": len(schedules), "error": str(e)})
+                return 0
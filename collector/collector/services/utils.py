@@ -1,20 +1,32 @@
 import logging
+from collections.abc import AsyncIterator
+from functools import cache
+from http import HTTPStatus
+from types import ModuleType
+from typing import Any
 
+import msgspec
 from api_carto_client import Client
 from api_carto_client.api.ping import get_carto_api_v3_ping as api_ping
 from api_carto_client.models.ping import Ping
 from pydantic import BaseModel as PydanticBaseModel
+from pydantic import TypeAdapter
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from collector.core import api_structs
+from collector.core.api_client import get_api_client
+from collector.core.settings import settings
 from collector.models.base import Base as SQLAlchemyBaseModel
 
 logger = logging.getLogger(__name__)
 
 
 def with_api_client(func):
+    """Call `func` with the shared carto API client as first argument"""
+
     async def wrapper(*args, **kwargs):
-        client = Client(base_url="https://oudonner.api.efs.sante.fr/")
-        async with client as cli:
-            return await func(cli, *args, **kwargs)
+        return await func(get_api_client(), *args, **kwargs)
 
     return wrapper
 
@@ -22,7 +34,7 @@ def with_api_client(func):
 @with_api_client
 async def check_api(client: Client) -> bool:
     try:
-        ping_resp: Ping = await api_ping.asyncio(client=client)
+        ping_resp: Ping = await api_call(client, api_ping)
         if ping_resp.version != "v3":
             logger.error(f"The server is running API in {ping_resp.version}, but only v3 is supported.")
             return False
@@ -37,6 +49,49 @@ async def api_to_pydantic(api_models: list, pydantic_model: PydanticBaseModel) -
     return [pydantic_model(**api_model.to_dict()) for api_model in api_models]
 
 
+async def api_json(client: Client, endpoint: ModuleType, **kwargs) -> bytes | None:
+    """Call an endpoint of the API client, return its raw JSON body without decoding it.
+
+    Return None when the API doesn't answer 200, as the generated `asyncio` does.
+    """
+    # The generated endpoints only expose their request through `_get_kwargs`
+    response = await client.get_async_httpx_client().request(**endpoint._get_kwargs(**kwargs))
+    if response.status_code != HTTPStatus.OK:
+        logger.warning("Unexpected API response", extra={"url": str(response.url), "status_code": response.status_code})
+        return None
+    return response.content
+
+
+async def api_call(client: Client, endpoint: ModuleType, **kwargs) -> Any:
+    """Call an endpoint of the API client, as its generated `asyncio`.
+
+    With `API_MSGSPEC`, the body is decoded into the msgspec structs of
+    `core.api_structs`, which have the attributes and `to_dict` of the generated models. A body
+    the structs reject is requested again through the generated models, which keep any value.
+    """
+    if settings.API_MSGSPEC:
+        content = await api_json(client, endpoint, **kwargs)
+        if content is None:
+            return None
+        try:
+            return api_structs.decode_response(endpoint.__name__, content)
+        except msgspec.ValidationError as e:
+            logger.warning(
+                "API response rejected by msgspec, decoding it with the generated models",
+                extra={"endpoint": endpoint.__name__, "error": str(e)},
+            )
+    return await endpoint.asyncio(client=client, **kwargs)
+
+
+async def api_json_to_pydantic[T](client: Client, endpoint: ModuleType, adapter: TypeAdapter[T], **kwargs) -> T | None:
+    """Call an endpoint of the API client, validate its raw JSON body straight into Pydantic models.
+
+    Skips the generated models, built by `asyncio` then converted back by `api_to_pydantic`.
+    """
+    content = await api_json(client, endpoint, **kwargs)
+    return None if content is None else adapter.validate_json(content)
+
+
 async def pydantic_to_sqlalchemy(
     pydantic_models: list[PydanticBaseModel], sqlalchemy_model: SQLAlchemyBaseModel
 ) -> list[SQLAlchemyBaseModel]:
@@ -49,3 +104,33 @@ async def sqlalchemy_to_pydantic(
 ) -> list[PydanticBaseModel]:
     """Convert a SQLAlchemy model to a Pydantic model"""
     return [pydantic_model(**sqlalchemy_model.__dict__) for sqlalchemy_model in sqlalchemy_models]
+
+
+def select_columns(sqlalchemy_model: type[SQLAlchemyBaseModel], pydantic_model: type[PydanticBaseModel]) -> Select:
+    """Select only the columns of the table read by the Pydantic model, instead of full entities"""
+    columns = [
+        getattr(sqlalchemy_model, column.key)
+        for column in sqlalchemy_model.__mapper__.column_attrs
+        if column.key in pydantic_model.model_fields
+    ]
+    return select(*columns)
+
+
+@cache
+def _list_adapter(pydantic_model: type[PydanticBaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[pydantic_model])
+
+
+async def stream_pydantic[T: PydanticBaseModel](
+    session: AsyncSession, stmt: Select, pydantic_model: type[T], batch_size: int | None = None
+) -> AsyncIterator[list[T]]:
+    """Stream the rows of the statement by batches, each validated in one pass into Pydantic models.
+
+    Rows are fetched `DB_STREAM_BATCH` at a time from a server-side cursor, and never enter the
+    identity map of the session, so only the current batch is held in memory.
+    """
+    batch_size = batch_size or settings.DB_STREAM_BATCH
+    adapter = _list_adapter(pydantic_model)
+    results = await session.stream(stmt.execution_options(yield_per=batch_size))
+    async for rows in results.partitions():
+        yield adapter.validate_python(rows, from_attributes=True)
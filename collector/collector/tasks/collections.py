@@ -1,36 +1,76 @@
 import asyncio
 import logging
+from collections.abc import Awaitable, Callable
+from contextlib import nullcontext
 from datetime import datetime
+from itertools import islice
+from types import ModuleType
 
 from api_carto_client import Client
 from api_carto_client.api.sampling_collection import (
     get_carto_api_v3_samplingcollection_searchbypostcode as api_search_collection,
 )
+from api_carto_client.api.sampling_collection import (
+    get_carto_api_v3_samplingcollection_searchinsquare as api_search_square,
+)
 from api_carto_client.models.sampling_collection_result import SamplingCollectionResult
 from api_carto_client.models.sampling_location_collections_entity import (
     SamplingLocationCollectionsEntity,
 )
 from dateutil.relativedelta import relativedelta
 
+from collector.core.settings import settings
 from collector.schemas import (
-    CollectionGroupSchema,
     CollectionSchema,
+    CollectionsResultAdapter,
+    CollectionsResultSchema,
     LocationSchema,
 )
-from collector.services.collections import save_location_collections
+from collector.schemas.collection import collections_as_groups
+from collector.services.collections import (
+    bulk_save_location_collections,
+    load_collection_references,
+    save_location_collections,
+)
 from collector.services.locations import get_postal_codes
-from collector.services.utils import check_api, with_api_client
+from collector.services.utils import api_call, api_json_to_pydantic, check_api, with_api_client
 from collector.tasks.efs_batch_processor import EFSBatchProcessor
 
 logger = logging.getLogger(__name__)
-api_semaphore = asyncio.Semaphore(5)
+
+# (south_west_latitude, south_west_longitude, north_east_latitude, north_east_longitude)
+Tile = tuple[float, float, float, float]
+# Generated API model, or schema already validated from the raw JSON (`API_RAW_JSON`)
+LocationEntity = SamplingLocationCollectionsEntity | LocationSchema
+
+
+async def _search_collections(client: Client, endpoint: ModuleType, **kwargs) -> list[LocationEntity]:
+    """Call a collections search of the API, return its locations with their collections"""
+    result: SamplingCollectionResult | CollectionsResultSchema | None
+    if settings.API_RAW_JSON:
+        result = await api_json_to_pydantic(client, endpoint, CollectionsResultAdapter, **kwargs)
+    else:
+        result = await api_call(client, endpoint, **kwargs)
+    if not result or not result.sampling_location_collections:
+        return []
+    return result.sampling_location_collections
+
+
+def _location_data(entity: LocationEntity) -> dict | LocationSchema:
+    """Return the data of a retrieved location, only the generated models are converted"""
+    return entity if isinstance(entity, LocationSchema) else entity.to_dict()
+
+
+def _as_location(data: dict | LocationSchema) -> LocationSchema:
+    return data if isinstance(data, LocationSchema) else LocationSchema(**data)
 
 
 @with_api_client
-async def _retrieve_sampling_collections(client: Client, post_code: str) -> list[SamplingLocationCollectionsEntity]:
+async def _retrieve_sampling_collections(client: Client, post_code: str) -> list[LocationEntity]:
     """Retrieve collections from the API"""
-    collections: SamplingCollectionResult = await api_search_collection.asyncio(
-        client=client,
+    return await _search_collections(
+        client,
+        api_search_collection,
         post_code=post_code,
         # hide_private_collects=True,
         # hide_non_publiable_collects=True,
@@ -39,25 +79,137 @@ async def _retrieve_sampling_collections(client: Client, post_code: str) -> list
         user_longitude=-2,
         max_date=datetime.now() + relativedelta(months=+6),
     )
-    if not collections:
+
+
+@with_api_client
+async def _retrieve_tile_collections(client: Client, tile: Tile) -> list[LocationEntity]:
+    """Retrieve collections inside a tile from the API"""
+    south_west_latitude, south_west_longitude, north_east_latitude, north_east_longitude = tile
+    return await _search_collections(
+        client,
+        api_search_square,
+        north_east_latitude=north_east_latitude,
+        north_east_longitude=north_east_longitude,
+        south_west_latitude=south_west_latitude,
+        south_west_longitude=south_west_longitude,
+        limit=settings.TILE_LIMIT,
+        user_latitude=(south_west_latitude + north_east_latitude) / 2,
+        user_longitude=(south_west_longitude + north_east_longitude) / 2,
+        max_date=datetime.now() + relativedelta(months=+6),
+    )
+
+
+def _split_tile(tile: Tile) -> list[Tile]:
+    """Split a tile in four quarters"""
+    south_west_latitude, south_west_longitude, north_east_latitude, north_east_longitude = tile
+    mid_latitude = (south_west_latitude + north_east_latitude) / 2
+    mid_longitude = (south_west_longitude + north_east_longitude) / 2
+    return [
+        (south_west_latitude, south_west_longitude, mid_latitude, mid_longitude),
+        (south_west_latitude, mid_longitude, mid_latitude, north_east_longitude),
+        (mid_latitude, south_west_longitude, north_east_latitude, mid_longitude),
+        (mid_latitude, mid_longitude, north_east_latitude, north_east_longitude),
+    ]
+
+
+async def _retrieve_tiled_collections(
+    tile: Tile,
+    depth: int = 0,
+    on_tile: Callable[[list[LocationEntity]], Awaitable[None]] | None = None,
+) -> list[LocationEntity]:
+    """Retrieve collections inside a tile, splitting it while the API limit is reached.
+
+    `on_tile` is awaited with the collections of each final tile as soon as they are retrieved.
+    A tile whose call fails is logged and has no collections, the other tiles are kept.
+    """
+    try:
+        collections = await _retrieve_tile_collections(tile)
+    except Exception as e:
+        logger.error("Failed to retrieve tile collections", extra={"tile": tile, "depth": depth, "error": str(e)})
         return []
-    return collections.sampling_location_collections
+    if len(collections) >= settings.TILE_LIMIT and depth < settings.TILE_MAX_DEPTH:
+        tasks = [_retrieve_tiled_collections(sub_tile, depth + 1, on_tile) for sub_tile in _split_tile(tile)]
+        results = await asyncio.gather(*tasks)
+        return [collection for sublist in results for collection in sublist]
+
+    if len(collections) >= settings.TILE_LIMIT:
+        logger.warning("Tile still truncated at max depth", extra={"tile": tile, "n_locations": len(collections)})
+    if on_tile:
+        await on_tile(collections)
+    return collections
 
 
-async def _get_collections_locations() -> list[dict]:
-    """Retrieve all collection locations from the API with post_codes and flatten the list"""
+async def _get_tiled_collections_locations() -> list[dict | LocationSchema]:
+    """Retrieve all collection locations inside the configured bounding box"""
+    bounding_box = (settings.MIN_LAT, settings.MIN_LNG, settings.MAX_LAT, settings.MAX_LNG)
+    entities = await _retrieve_tiled_collections(bounding_box)
+    logger.info("Collections retrieved from tiles", extra={"n_locations": len(entities)})
+    return [_location_data(entity) for entity in entities]
+
+
+async def _get_collections_locations() -> list[dict | LocationSchema]:
+    """Retrieve all collection locations from the API and flatten the list"""
     if not await check_api():
         return []
 
+    if settings.COLLECTIONS_FETCH == "tiles":
+        return await _get_tiled_collections_locations()
+
     postal_codes = await get_postal_codes()
     tasks = [_retrieve_sampling_collections(postal_code) for postal_code in postal_codes]
     _locations = await asyncio.gather(*tasks)
 
-    locations = [collection.to_dict() for sublist in _locations for collection in sublist]
+    locations = [_location_data(collection) for sublist in _locations for collection in sublist]
 
     return locations
 
 
+def _collection_key(collection: CollectionSchema) -> int | str | None:
+    """Identify a collection by its API id, or by its booking URL when it has none"""
+    return collection.id if collection.id is not None else collection.url
+
+
+def _new_collections(location: LocationSchema, seen_collections: set) -> list[CollectionSchema]:
+    """Return the collections of the location that were not seen yet, and mark them as seen"""
+    collections = []
+    for collection in location.collections or []:
+        key = _collection_key(collection)
+        if key is not None and key in seen_collections:
+            continue
+        seen_collections.add(key)
+        collections.append(collection)
+    return collections
+
+
+def _dedupe_locations(locations: list[LocationSchema]) -> list[LocationSchema]:
+    """Merge locations returned several times by the API and keep each collection once"""
+    seen_collections = set()
+    unique_locations: dict[tuple[str, str], LocationSchema] = {}
+    n_collections = sum(len(location.collections or []) for location in locations)
+
+    for location in locations:
+        collections = _new_collections(location, seen_collections)
+
+        location_key = (location.sampling_location_code, location.full_address)
+        if location_key in unique_locations:
+            unique_locations[location_key].collections.extend(collections)
+        else:
+            location.collections = collections
+            unique_locations[location_key] = location
+
+    n_unique_collections = sum(len(location.collections) for location in unique_locations.values())
+    logger.info(
+        "Duplicates removed",
+        extra={
+            "n_locations": len(unique_locations),
+            "n_duplicate_locations": len(locations) - len(unique_locations),
+            "n_collections": n_unique_collections,
+            "n_duplicate_collections": n_collections - n_unique_collections,
+        },
+    )
+    return list(unique_locations.values())
+
+
 async def _handle_location(location: LocationSchema, efs_processor: EFSBatchProcessor) -> None:
     """Handle a single location and filter collections without urls"""
 
@@ -73,21 +225,148 @@ async def _handle_location(location: LocationSchema, efs_processor: EFSBatchProc
     location.collections = await asyncio.gather(*tasks)
 
 
-async def _transform_location_collections(location: LocationSchema) -> None:
-    """Transform collections to group collections"""
+def _transform_locations_collections(locations: list[LocationSchema]) -> None:
+    """Transform the collections of the locations to group collections, all of them at once"""
+    for location in locations:
+        location.collections = [collection for collection in location.collections if collection]
+    groups = iter(collections_as_groups([collection for location in locations for collection in location.collections]))
+    for location in locations:
+        location.collections = list(islice(groups, len(location.collections)))
 
-    async def _collection_to_group(collection: CollectionSchema) -> None:
-        group_collection: CollectionGroupSchema = collection.as_group(from_db=False)
-        return group_collection
 
-    tasks = [_collection_to_group(collection) for collection in location.collections if collection]
-    location.collections = await asyncio.gather(*tasks)
+async def _stream_collections_locations(queue: asyncio.Queue) -> None:
+    """Put the collection locations from the API into the queue as soon as each call returns"""
+    if not await check_api():
+        return
+
+    async def _put_all(entities: list[LocationEntity]) -> None:
+        for entity in entities:
+            await queue.put(_location_data(entity))
+
+    if settings.COLLECTIONS_FETCH == "tiles":
+        bounding_box = (settings.MIN_LAT, settings.MIN_LNG, settings.MAX_LAT, settings.MAX_LNG)
+        await _retrieve_tiled_collections(bounding_box, on_tile=_put_all)
+        return
 
+    async def _fetch(post_code: str) -> None:
+        await _put_all(await _retrieve_sampling_collections(post_code))
 
-async def update_collections(locations: list[dict] = None) -> None:
-    """Update all collections for all locations"""
+    postal_codes = await get_postal_codes()
+    await asyncio.gather(*[_fetch(postal_code) for postal_code in postal_codes])
+
+
+async def _stream_update_collections(
+    locations: list[dict | LocationSchema] | None = None, efs_processor: EFSBatchProcessor | None = None
+) -> tuple[int, int, int]:
+    """Fetch, resolve and save collections with bounded queues between the stages.
+
+    Each location moves on to EFS_ID resolution as soon as its API call returns, and is saved
+    with the next batch, so memory doesn't grow with the number of collections.
+    """
+    fetched: asyncio.Queue[dict | None] = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+    resolved: asyncio.Queue[LocationSchema | None] = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+    seen_collections = set()
+    n_workers = settings.PIPELINE_WORKERS
+
+    async def _produce() -> None:
+        try:
+            if locations:
+                for location in locations:
+                    await fetched.put(location)
+            else:
+                await _stream_collections_locations(fetched)
+        except Exception as e:
+            logger.error("Failed to retrieve collections", extra={"error": str(e)})
+        finally:
+            for _ in range(n_workers):
+                await fetched.put(None)
+
+    async def _resolve(efs_processor: EFSBatchProcessor) -> None:
+        while (data := await fetched.get()) is not None:
+            if not data:
+                continue
+            try:
+                location = _as_location(data)
+                location.collections = _new_collections(location, seen_collections)
+                if not location.collections:
+                    continue
+                await _handle_location(location, efs_processor)
+                await resolved.put(location)
+            except Exception as e:
+                logger.error("Failed to process location", extra={"error": str(e)})
+
+    async def _save() -> tuple[int, int, int]:
+        try:
+            location_index, group_codes = await load_collection_references()
+        except Exception as e:
+            # Each batch loads its own references instead
+            logger.error("Failed to load collection references", extra={"error": str(e)})
+            location_index, group_codes = None, None
+        totals = [0, 0, 0]
+        batch: list[LocationSchema] = []
+        finished = False
+        while not finished:
+            try:
+                location = await asyncio.wait_for(resolved.get(), timeout=settings.PIPELINE_FLUSH_INTERVAL)
+                if location is None:
+                    finished = True
+                else:
+                    batch.append(location)
+                    if len(batch) < settings.PIPELINE_BATCH_SIZE:
+                        continue
+            except TimeoutError:
+                pass
+
+            if not batch:
+                continue
+            try:
+                _transform_locations_collections(batch)
+                if settings.DB_BULK_WRITES:
+                    counts = await bulk_save_location_collections(batch, location_index, group_codes)
+                else:
+                    counts = await save_location_collections(batch)
+                totals = [total + count for total, count in zip(totals, counts, strict=True)]
+                logger.info("Collections batch saved", extra={"n_locations": len(batch), "n_collections": counts[0]})
+            except Exception as e:
+                logger.error("Failed to save collections batch", extra={"n_locations": len(batch), "error": str(e)})
+            batch = []
+        return tuple(totals)
+
+    async with nullcontext(efs_processor) if efs_processor else EFSBatchProcessor() as efs_processor:
+        writer = asyncio.create_task(_save())
+        stages = asyncio.gather(_produce(), *[_resolve(efs_processor) for _ in range(n_workers)])
+        try:
+            await asyncio.wait([stages, writer], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not stages.done():
+                # The writer stopped, the resolvers would wait forever on the full queue
+                stages.cancel()
+                await asyncio.gather(stages, return_exceptions=True)
+        if not writer.done():
+            end = asyncio.ensure_future(resolved.put(None))
+            await asyncio.wait([end, writer], return_when=asyncio.FIRST_COMPLETED)
+            end.cancel()
+        return await writer
+
+
+async def update_collections(locations: list[dict] = None, efs_processor: EFSBatchProcessor | None = None) -> bool:
+    """Update all collections for all locations, return whether they were processed
+
+    `efs_processor` is an open processor shared with other tasks, a new one is opened without it.
+    """
     logger.info("Start updating collections...")
 
+    if settings.COLLECTIONS_STREAMING:
+        collections, events, snapshots = await _stream_update_collections(locations, efs_processor)
+        if not collections:
+            logger.error("No collections to process")
+            return False
+        logger.info(
+            "Successfully processed collections",
+            extra={"n_collections": collections, "n_events": events, "n_snapshots": snapshots},
+        )
+        return True
+
     if not locations:
         logger.info("No collections specified, retrieving from API")
         # Get all locations with active collections
@@ -96,23 +375,26 @@ async def update_collections(locations: list[dict] = None) -> None:
 
     if not locations:
         logger.error("No collections to process")
-        return
+        return False
 
-    locations = [LocationSchema(**location) for location in locations if location]
+    locations = [_as_location(location) for location in locations if location]
+    locations = _dedupe_locations(locations)
 
     logger.info(f"Processing {len(locations)} collections...")
 
     # Set efs_id for all collections within a location
-    async with EFSBatchProcessor() as efs_processor:
+    async with nullcontext(efs_processor) if efs_processor else EFSBatchProcessor() as efs_processor:
         tasks = [_handle_location(location, efs_processor) for location in locations]
         _ = await asyncio.gather(*tasks)
 
     # Transform collections to group collections
-    tasks = [_transform_location_collections(location) for location in locations if location]
-    await asyncio.gather(*tasks)
+    _transform_locations_collections(locations)
 
     # Save all collections to database
-    collections, events, snapshots = await save_location_collections(locations)
+    if settings.DB_BULK_WRITES:
+        collections, events, snapshots = await bulk_save_location_collections(locations)
+    else:
+        collections, events, snapshots = await save_location_collections(locations)
 
     logger.info(
         "Successfully processed collections",
@@ -122,3 +404,4 @@ async def update_collections(locations: list[dict] = None) -> None:
             "n_snapshots": snapshots,
         },
     )
+    return True
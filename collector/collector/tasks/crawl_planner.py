@@ -0,0 +1,124 @@
+import logging
+from collections.abc import AsyncIterable
+from datetime import UTC, datetime, timedelta
+
+from crawlee import Request
+
+from collector.core.settings import settings
+from collector.schemas import CollectionUrlsSchema, CrawlStateSchema
+from collector.services.crawl_state import load_crawl_states, load_slot_stats, save_crawl_states
+
+logger = logging.getLogger(__name__)
+
+# Pages due shortly after the start of a run are crawled with it rather than with the next one
+DUE_MARGIN = timedelta(hours=1)
+
+
+def revisit_interval(days_to_event: float, volatility: float = 0.0, is_full: bool = False) -> timedelta:
+    """Return the delay before the next crawl of a booking page.
+
+    The delay grows with the number of days until the event, is up to halved when the slots
+    changed between most of the recent snapshots, and is multiplied for full events (only a
+    cancellation can change them).
+    """
+    hours = max(days_to_event, 0.0) * settings.CRAWL_HOURS_PER_DAY_TO_EVENT
+    hours *= 1 - min(max(volatility, 0.0), 1.0) / 2
+    if is_full:
+        hours *= settings.CRAWL_FULL_FACTOR
+    hours = min(max(hours, settings.CRAWL_MIN_INTERVAL_HOURS), settings.CRAWL_MAX_INTERVAL_HOURS)
+    return timedelta(hours=hours)
+
+
+def build_request(url: str, run_key: str, state: CrawlStateSchema | None = None) -> Request:
+    """Return the crawl request of a booking page, conditional when its validators are known.
+
+    The unique key is shared by the requests of a run, so a URL is crawled once per run, and
+    the requests of previous runs don't deduplicate it.
+    """
+    headers = {}
+    if state and state.etag:
+        headers["If-None-Match"] = state.etag
+    if state and state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+    return Request.from_url(url, unique_key=f"{url}#{run_key}", headers=headers or None)
+
+
+def _days_until(start_date: datetime, now: datetime) -> float:
+    if start_date.tzinfo is None:
+        start_date = start_date.replace(tzinfo=UTC)
+    return max((start_date - now).total_seconds() / 86400, 0.0)
+
+
+async def plan_crawl(
+    collections: AsyncIterable[list[CollectionUrlsSchema]], now: datetime | None = None
+) -> tuple[list[Request], list[CrawlStateSchema]]:
+    """Return the requests of the booking pages due for a crawl, and their crawl state after this run.
+
+    The collections are read batch by batch, only their booking page is kept.
+
+    Every page is crawled when CRAWL_INCREMENTAL is disabled, and no state is returned.
+    """
+    now = now or datetime.now(UTC)
+    run_key = f"{now:%Y%m%dT%H%M%S}"
+
+    days_to_event: dict[str, float] = {}
+    efs_ids: dict[str, str] = {}
+    async for batch in collections:
+        for collection in batch:
+            url = collection.url
+            if not url:
+                continue
+            days = _days_until(collection.start_date, now)
+            days_to_event[url] = min(days, days_to_event.get(url, days))
+            if collection.efs_id:
+                efs_ids[url] = collection.efs_id
+
+    if not settings.CRAWL_INCREMENTAL:
+        return [build_request(url, run_key) for url in days_to_event], []
+
+    states = await load_crawl_states(list(days_to_event))
+    stats = await load_slot_stats(list(set(efs_ids.values())), now - timedelta(days=settings.CRAWL_VOLATILITY_DAYS))
+
+    requests = []
+    next_states = []
+    for url, days in days_to_event.items():
+        state = states.get(url)
+        if state and state.next_crawl_at > now + DUE_MARGIN:
+            continue
+
+        volatility, is_full = stats.get(efs_ids.get(url), (0.0, False))
+        requests.append(build_request(url, run_key, state))
+        next_states.append(
+            CrawlStateSchema(
+                url=url,
+                etag=state.etag if state else None,
+                last_modified=state.last_modified if state else None,
+                crawled_at=now,
+                next_crawl_at=now + revisit_interval(days, volatility, is_full),
+            )
+        )
+
+    logger.info("Crawl planned", extra={"n_pages": len(days_to_event), "n_due": len(requests)})
+    return requests, next_states
+
+
+async def record_crawl(states: list[CrawlStateSchema], results: list[dict]) -> None:
+    """Save the crawl state of the planned pages, with the validators returned by the crawl.
+
+    Only the pages with a result are saved: the parsed ones with their new validators, and the
+    ones marked `not_modified` ("304 Not Modified") with their known validators. The state of a
+    page that failed is left as is, so it stays due for the next run.
+    """
+    crawled_results = {result["url"]: result for result in results if isinstance(result, dict) and "url" in result}
+
+    crawled = []
+    for state in states:
+        result = crawled_results.get(state.url)
+        if result is None:
+            continue
+        if not result.get("not_modified"):
+            state.etag, state.last_modified = result.get("etag"), result.get("last_modified")
+        crawled.append(state)
+
+    if crawled:
+        await save_crawl_states(crawled)
@@ -1,29 +1,54 @@
 import asyncio
 import logging
 import re
+from urllib.parse import urlsplit
 
 from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
 from async_lru import alru_cache
 
+from collector.core.concurrency import get_limiter
+from collector.core.settings import settings
+from collector.services.efs_ids import load_efs_id_cache, save_efs_id_cache
+
 logger = logging.getLogger(__name__)
 
 
 class EFSBatchProcessor:
-    """Process multiple EFS ID requests with a shared session"""
+    """Process multiple EFS ID requests with a shared session
+
+    Requests are sent under the adaptive limiter of their host, shared with the other EFS clients.
+    When `persistent_cache` is enabled (EFS_ID_CACHE when not given), known resolutions are loaded
+    from the database on enter and the new ones are saved back on exit, so known URLs don't need any request.
+    """
 
-    def __init__(self, max_concurrent: int = 10):
-        self.semaphore = asyncio.Semaphore(max_concurrent)
+    def __init__(self, persistent_cache: bool | None = None):
         self.session = None
+        self.persistent_cache = settings.EFS_ID_CACHE if persistent_cache is None else persistent_cache
+        self.cache: dict[str, str | None] = {}
+        self.resolved: dict[str, str | None] = {}
 
     async def __aenter__(self):
         timeout = ClientTimeout(total=45, connect=15, sock_read=15)
-        connector = TCPConnector(limit=100, limit_per_host=20, keepalive_timeout=30)
+        # The limiters decide how many requests run, the connector only needs enough connections
+        connector = TCPConnector(
+            limit=settings.HTTP_MAX_CONCURRENCY * 2,
+            limit_per_host=settings.HTTP_MAX_CONCURRENCY,
+            keepalive_timeout=30,
+        )
         self.session = ClientSession(timeout=timeout, connector=connector)
+        if self.persistent_cache:
+            self.cache = await load_efs_id_cache()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
+        if self.persistent_cache and self.resolved:
+            await save_efs_id_cache(self.resolved)
+        logger.info(
+            "EFS_ID resolution done",
+            extra={"n_cached": len(self.cache), "n_resolved": len(self.resolved)},
+        )
 
     @alru_cache()
     async def get_efs_id(self, url: str, max_retries: int = 3) -> str | None:
@@ -31,35 +56,43 @@ class EFSBatchProcessor:
         if not url:
             return None
 
+        if url in self.cache:
+            return self.cache[url]
+
         for attempt in range(max_retries):
-            async with self.semaphore:
-                try:
+            try:
+                async with get_limiter(urlsplit(url).hostname).slot() as slot:
                     async with self.session.head(url, allow_redirects=True) as resp:
+                        slot.observe(resp.status)
                         reg = r"trouver-une-collecte/([0-9]+)/"
                         match = re.search(reg, resp.url.raw_path)
-                        return match.group(1) if match else None
-
-                except (TimeoutError, ClientError) as e:
-                    if attempt < max_retries - 1:
-                        wait_time = 2**attempt
-                        logger.warning(
-                            f"Retry {attempt + 1}/{max_retries} for EFS_ID",
-                            extra={"url": url, "error": str(e)},
-                        )
-                        await asyncio.sleep(wait_time)
-                        continue
-                    else:
-                        logger.error(
-                            "Failed to retrieve EFS_ID after retries",
-                            extra={"url": url, "error": str(e)},
-                        )
-                        return None
+                        efs_id = match.group(1) if match else None
+                        # Only successful responses are cached, the others may be temporary
+                        if resp.ok:
+                            self.resolved[url] = efs_id
+                        return efs_id
 
-                except Exception as e:
+            except (TimeoutError, ClientError) as e:
+                if attempt < max_retries - 1:
+                    wait_time = 2**attempt
+                    logger.warning(
+                        f"Retry {attempt + 1}/{max_retries} for EFS_ID",
+                        extra={"url": url, "error": str(e)},
+                    )
+                    await asyncio.sleep(wait_time)
+                    continue
+                else:
                     logger.error(
-                        "Unexpected error retrieving EFS_ID",
+                        "Failed to retrieve EFS_ID after retries",
                         extra={"url": url, "error": str(e)},
                     )
                     return None
 
+            except Exception as e:
+                logger.error(
+                    "Unexpected error retrieving EFS_ID",
+                    extra={"url": url, "error": str(e)},
+                )
+                return None
+
         return None
@@ -11,9 +11,11 @@ from api_carto_client.models.sampling_group_entity import SamplingGroupEntity
 from api_carto_client.models.sampling_region_entity import SamplingRegionEntity
 
 from collector.core.settings import settings
-from collector.schemas import GroupSchema
+from collector.schemas import GroupsAdapter, GroupSchema
 from collector.services.groups import save_groups
 from collector.services.utils import (
+    api_call,
+    api_json_to_pydantic,
     api_to_pydantic,
     check_api,
     with_api_client,
@@ -25,7 +27,7 @@ logger = logging.getLogger(__name__)
 @with_api_client
 async def _retrieve_region(client: Client, name: str) -> SamplingRegionEntity:
     """Retrieve region from API"""
-    regions: list[SamplingRegionEntity] = await api_get_regions.asyncio(client=client)
+    regions: list[SamplingRegionEntity] = await api_call(client, api_get_regions)
     for region in regions:
         if region.libelle == name:
             return region
@@ -35,28 +37,31 @@ async def _retrieve_region(client: Client, name: str) -> SamplingRegionEntity:
 @with_api_client
 async def _retrieve_groups(client: Client, region: SamplingRegionEntity) -> list[GroupSchema]:
     """Retrieve groups for a region from API"""
-    groups: list[SamplingGroupEntity] = await api_get_groupements.asyncio(client=client, region_code=region.code)
+    if settings.API_RAW_JSON:
+        return await api_json_to_pydantic(client, api_get_groupements, GroupsAdapter, region_code=region.code) or []
+    groups: list[SamplingGroupEntity] = await api_call(client, api_get_groupements, region_code=region.code)
     return await api_to_pydantic(groups, GroupSchema)
 
 
-async def update_groups(groups: list[GroupSchema] = None) -> None:
-    """Retrieve groups from API and add them to database"""
+async def update_groups(groups: list[GroupSchema] = None) -> bool:
+    """Retrieve groups from API and add them to database, return whether they were processed"""
     logger.info("Start updating groups...")
 
     if not groups:
         logger.info("No groups specified, retrieving from API...")
         if not await check_api():
-            return
+            return False
         region: SamplingRegionEntity = await _retrieve_region(settings.REGION_NAME)
         groups: list[GroupSchema] = await _retrieve_groups(region)
         logger.info("Groups retrieved.")
 
     if not groups:
         logger.error("No groups to process")
-        return
+        return False
 
     logger.info(f"Processing {len(groups)} groups...")
 
     groups_processed = await save_groups(groups)
 
     logger.info("Successfully processed groups", extra={"n_groups": len(groups_processed)})
+    return True
@@ -9,10 +9,11 @@ from api_carto_client.models.sampling_group_entity import SamplingGroupEntity
 from api_carto_client.models.sampling_location_result import SamplingLocationResult
 
 from collector.core.settings import settings
+from collector.schemas.api import LocationsResultAdapter
 from collector.schemas.location import LocationSchema
 from collector.services.groups import load_groups
-from collector.services.locations import save_locations
-from collector.services.utils import api_to_pydantic, check_api, with_api_client
+from collector.services.locations import bulk_save_locations, save_locations
+from collector.services.utils import api_call, api_json_to_pydantic, api_to_pydantic, check_api, with_api_client
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +21,14 @@ logger = logging.getLogger(__name__)
 @with_api_client
 async def _retrieve_location_sampling(client: Client, groupement: SamplingGroupEntity) -> list[LocationSchema]:
     """Retrieve all locations from API"""
-    res: SamplingLocationResult = await api_search_location.asyncio(client=client, group_code=groupement.gr_code)
+    if settings.API_RAW_JSON:
+        res = await api_json_to_pydantic(
+            client, api_search_location, LocationsResultAdapter, group_code=groupement.gr_code
+        )
+        if not res or not res.sampling_location_entities:
+            return []
+        return res.sampling_location_entities
+    res: SamplingLocationResult = await api_call(client, api_search_location, group_code=groupement.gr_code)
     return await api_to_pydantic(res.sampling_location_entities, LocationSchema)
 
 
@@ -49,14 +57,14 @@ async def _filter_location(
     return location
 
 
-async def update_locations(locations: list[LocationSchema] = None) -> None:
-    """Retrieve all locations from API and store them in database"""
+async def update_locations(locations: list[LocationSchema] = None) -> bool:
+    """Retrieve all locations from API and store them in database, return whether they were processed"""
     logger.info("Start updating locations...")
 
     if not locations:
         logger.info("No locations specified, retrieving from API...")
         if not await check_api():
-            return
+            return False
         # Retrieve locations
         groups = await load_groups()
         tasks = [_retrieve_location_sampling(groupement=group) for group in groups]
@@ -66,7 +74,7 @@ async def update_locations(locations: list[LocationSchema] = None) -> None:
 
     if not locations:
         logger.error("No locations to process.")
-        return
+        return False
 
     logger.info(f"Checking {len(locations)} locations...")
 
@@ -76,8 +84,12 @@ async def update_locations(locations: list[LocationSchema] = None) -> None:
     logger.info(f"Checks complete, processing  {len(results)} locations...")
 
     # Save locations
-    added_locations = await save_locations(results)
+    if settings.DB_BULK_WRITES:
+        added_locations = await bulk_save_locations(results)
+    else:
+        added_locations = await save_locations(results)
 
     logger.info(f"Processed {len(added_locations)} collections")
 
     logger.info("Successfully processed locations", extra={"n_locations": len(added_locations)})
+    return True
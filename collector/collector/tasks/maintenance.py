@@ -0,0 +1,31 @@
+import logging
+
+from collector.services.partitions import maintain_partitions
+from collector.services.rollups import ROLLUP_VIEWS, refresh_rollups
+
+logger = logging.getLogger(__name__)
+
+
+async def update_partitions() -> bool:
+    """Create the upcoming partitions and detach the expired ones, return whether they were maintained"""
+    logger.info("Start maintaining partitions...")
+
+    report = await maintain_partitions()
+
+    for table, changes in report.items():
+        logger.info(
+            "Partitions maintained",
+            extra={"table": table, "created": changes["created"], "expired": changes["expired"]},
+        )
+    return bool(report)
+
+
+async def update_rollups() -> bool:
+    """Refresh the daily rollups read by the dashboards, return whether they were all refreshed"""
+    logger.info("Start refreshing rollups...")
+
+    refreshed = await refresh_rollups()
+    failed = [view for view in ROLLUP_VIEWS if view not in refreshed]
+
+    logger.info("Rollups refreshed", extra={"refreshed": refreshed, "failed": failed})
+    return not failed
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+
+from collector.tasks.collections import update_collections
+from collector.tasks.efs_batch_processor import EFSBatchProcessor
+from collector.tasks.groups import update_groups
+from collector.tasks.locations import update_locations
+from collector.tasks.maintenance import update_partitions, update_rollups
+from collector.tasks.schedules import update_schedules
+
+logger = logging.getLogger(__name__)
+
+# Stages of the pipeline and the stages they wait for, in an order where the dependencies come first
+PIPELINE_STAGES: dict[str, tuple[str, ...]] = {
+    "maintenance": (),
+    "groups": (),
+    "locations": ("groups",),
+    # The snapshots are saved in the partitions created by the maintenance
+    "collections": ("locations", "maintenance"),
+    # The pages crawled are the ones of the active collections
+    "schedules": ("collections", "maintenance"),
+    "rollups": ("collections", "schedules"),
+}
+
+# Dependencies only waited for, their failure doesn't skip the stage
+WEAK_DEPENDENCIES: dict[str, tuple[str, ...]] = {
+    # The schedules crawl the collections already saved, even when the API didn't answer today
+    "schedules": ("collections",),
+}
+
+
+def _stage_runners(efs_processor: EFSBatchProcessor) -> dict[str, Callable[[], Awaitable[bool]]]:
+    return {
+        "maintenance": update_partitions,
+        "groups": update_groups,
+        "locations": update_locations,
+        "collections": lambda: update_collections(efs_processor=efs_processor),
+        "schedules": lambda: update_schedules(efs_processor=efs_processor),
+        "rollups": update_rollups,
+    }
+
+
+async def run_pipeline(stages: Iterable[str] | None = None) -> dict[str, bool]:
+    """Run the stages (all of them by default) in one process, each one as soon as its dependencies are done.
+
+    The stages share the API client, the database engine and one EFS_ID processor, so the URLs
+    resolved by the collections aren't requested again by the schedules. The dependencies left
+    out of `stages` are considered done, a stage whose dependency failed is skipped (except for its
+    `WEAK_DEPENDENCIES`). A stage fails when its task raises or returns False.
+    Return whether each stage succeeded.
+    """
+    selected = set(stages or PIPELINE_STAGES)
+    logger.info("Start the pipeline...", extra={"stages": [name for name in PIPELINE_STAGES if name in selected]})
+
+    async with EFSBatchProcessor() as efs_processor:
+        runners = _stage_runners(efs_processor)
+        tasks: dict[str, asyncio.Task[bool]] = {}
+
+        async def _run_stage(name: str) -> bool:
+            dependencies = [dependency for dependency in PIPELINE_STAGES[name] if dependency in tasks]
+            results = await asyncio.gather(*(tasks[dependency] for dependency in dependencies))
+            weak = WEAK_DEPENDENCIES.get(name, ())
+            if not all(succeeded or dependency in weak for dependency, succeeded in zip(dependencies, results)):
+                logger.error("Pipeline stage skipped, a dependency failed", extra={"stage": name})
+                return False
+            try:
+                succeeded = await runners[name]()
+            except Exception as e:
+                logger.error("Pipeline stage failed", extra={"stage": name, "error": str(e)})
+                return False
+            if not succeeded:
+                logger.error("Pipeline stage failed", extra={"stage": name})
+            return succeeded
+
+        for name in PIPELINE_STAGES:
+            if name in selected:
+                tasks[name] = asyncio.create_task(_run_stage(name))
+        results = dict(zip(tasks, await asyncio.gather(*tasks.values()), strict=True))
+
+    logger.info("Pipeline ended", extra={"results": results})
+    return results
@@ -1,50 +1,105 @@
 import asyncio
 import logging
-import uuid
-
-from crawlee import Request
-from crawler import start_crawler
-
-from collector.schemas import CollectionEventSchema, ScheduleGroupSchema, ScheduleSchema
-from collector.services.collections import get_active_collections
-from collector.services.schedules import add_schedule, retrieve_events
+from collections.abc import AsyncIterator
+from contextlib import aclosing, nullcontext
+
+import httpx
+from crawlee import ConcurrencySettings, Request
+from crawlee.http_clients import HttpxHttpClient
+from crawlee.http_clients._httpx import _HttpxTransport
+from crawler import iter_crawler
+from crawler.models import PageNotModified
+
+from collector.core.concurrency import AdaptiveTransport
+from collector.core.settings import settings
+from collector.schemas import CollectionEventSchema, CrawlStateSchema, ScheduleGroupSchema, ScheduleSchema
+from collector.services.collections import iter_active_collections
+from collector.services.schedules import (
+    EventIndex,
+    add_schedule,
+    bulk_add_schedules,
+    load_events_index,
+    retrieve_events,
+)
+from collector.tasks.crawl_planner import plan_crawl, record_crawl
 from collector.tasks.efs_batch_processor import EFSBatchProcessor
 
 logger = logging.getLogger(__name__)
 
 
-async def _retrieve_active_collections_url() -> list[str]:
-    """Retrieve all active collections from the database
-    then create Request object with their URL
+async def _retrieve_active_collections_url() -> tuple[list[Request], list[CrawlStateSchema]]:
+    """Stream the active collections from the database
+    then create Request object with the URL of the ones due for a crawl
     """
-    active_collections = await get_active_collections()
-    return [Request.from_url(c.url, unique_key=f"{c.url}:{uuid.uuid4()}") for c in active_collections]
-
-
-async def _get_schedules_from_crawler() -> list[ScheduleGroupSchema]:
+    return await plan_crawl(iter_active_collections())
+
+
+def _crawler_concurrency() -> ConcurrencySettings:
+    """Let the crawler autoscaling run up to the most requests allowed by the limiters, which hold the extra ones"""
+    return ConcurrencySettings(
+        min_concurrency=settings.HTTP_MIN_CONCURRENCY,
+        max_concurrency=settings.HTTP_MAX_CONCURRENCY,
+        desired_concurrency=settings.HTTP_INITIAL_CONCURRENCY,
+    )
+
+
+def _crawler_http_client() -> HttpxHttpClient:
+    """Fetch the pages under the adaptive limiter of their host, which learns from their latency and status"""
+    # The mounted transport replaces the one of the client, so it wraps the transport the client would have built:
+    # same HTTP versions, SSL context and pool limits, and the response cookies stored in the crawlee session
+    ssl_context = httpx.create_ssl_context()
+    transport = _HttpxTransport(
+        http1=True,
+        http2=True,
+        verify=ssl_context,
+        limits=httpx.Limits(max_connections=1000, max_keepalive_connections=200),
+    )
+    # httpx picks the mounted transport for each redirect, so the booking pages count against the booking host
+    return HttpxHttpClient(http1=True, http2=True, verify=ssl_context, mounts={"all://": AdaptiveTransport(transport)})
+
+
+async def _stream_schedules_from_crawler() -> AsyncIterator[ScheduleGroupSchema | PageNotModified]:
     """Retrieves active collections URLs,
-    then calls the crawler to get corresponding schedules.
+    then yields the schedules of each page as soon as the crawler parsed it, or the page when it wasn't modified.
     """
     try:
-        urls = await _retrieve_active_collections_url()
+        urls, crawl_states = await _retrieve_active_collections_url()
         if not urls:
             logger.info("No URLs found to crawl.")
-            return []
-
-        # crawler_logger = logging.getLogger(f"{__name__}.crawler")
-        all_results = []
+            return
 
         logger.info(f"Starting crawler for {len(urls)} URLs.")
 
-        results = await start_crawler(urls)  # crawler_logger=crawler_logger)
-        all_results.extend(results)
-
-        logger.info(f"Total schedules scraped: {len(all_results)}")
-        return all_results
+        # Result of each crawled page, sent back to the planner
+        crawled = []
+        crawl = iter_crawler(
+            urls,
+            concurrency_settings=_crawler_concurrency(),
+            http_client=_crawler_http_client(),
+            parser=settings.CRAWLER_PARSER,
+            parse_processes=settings.CRAWLER_PROCESSES,
+            archive_dir=settings.CRAWLER_ARCHIVE_DIR,
+            queue_size=settings.PIPELINE_QUEUE_SIZE,
+        )
+        async with aclosing(crawl) as results:
+            async for result in results:
+                if isinstance(result, PageNotModified):
+                    crawled.append(result.model_dump())
+                    yield result
+                    continue
+                schedules_group = ScheduleGroupSchema.model_validate(result, from_attributes=True)
+                crawled.append(schedules_group.model_dump(include={"url", "etag", "last_modified"}))
+                yield schedules_group
+        await record_crawl(crawl_states, crawled)
+
+        n_not_modified = sum(1 for result in crawled if result.get("not_modified"))
+        logger.info(
+            f"Total schedules scraped: {len(crawled) - n_not_modified}", extra={"n_not_modified": n_not_modified}
+        )
 
     except Exception as e:
         logger.error("Failed to retrieve schedules from crawler", exc_info=e)
-        return []
+        raise
 
 
 async def _match_event(schedule: ScheduleSchema, event: CollectionEventSchema) -> ScheduleSchema | None:
@@ -83,10 +138,16 @@ async def _match_event(schedule: ScheduleSchema, event: CollectionEventSchema) -
         return None
 
 
-async def _handle_schedule(schedule: ScheduleSchema) -> list[ScheduleSchema]:
-    """Retrieve events related to a schedule and match the schedule for each event."""
+async def _handle_schedule(schedule: ScheduleSchema, events_index: EventIndex | None = None) -> list[ScheduleSchema]:
+    """Retrieve events related to a schedule and match the schedule for each event.
+
+    Events are looked up in `events_index` when given, otherwise they are queried from the database.
+    """
     try:
-        events = await retrieve_events(schedule)
+        if events_index is None:
+            events = await retrieve_events(schedule)
+        else:
+            events = events_index.get((schedule.efs_id, schedule.date))
         if not events:
             logger.warning("No event found for schedule.", extra=schedule.info())
             return []
@@ -106,7 +167,9 @@ async def _handle_schedule(schedule: ScheduleSchema) -> list[ScheduleSchema]:
 
 
 async def _handle_schedules_group(
-    schedules_group: ScheduleGroupSchema, efs_processor: EFSBatchProcessor
+    schedules_group: ScheduleGroupSchema,
+    efs_processor: EFSBatchProcessor,
+    events_index: EventIndex | None = None,
 ) -> list[ScheduleSchema]:
     """Retrieve EFS_ID of the url before handling each schedules."""
     try:
@@ -125,7 +188,7 @@ async def _handle_schedules_group(
             )
             return []
 
-        tasks = [_handle_schedule(schedule) for schedule in schedules]
+        tasks = [_handle_schedule(schedule, events_index) for schedule in schedules]
         results = await asyncio.gather(*tasks)
 
         return [item for items in results for item in items]
@@ -139,37 +202,132 @@ async def _handle_schedules_group(
         return []
 
 
-async def update_schedules(
-    schedules_groups: list[dict] | None = None,
-) -> None:
-    """Retrieve, process, and save schedules."""
-    logger.info("Starting schedule update process.")
+async def _build_events_index(
+    schedule_groups: list[ScheduleGroupSchema], efs_processor: EFSBatchProcessor
+) -> EventIndex | None:
+    """Resolve the EFS_ID of every schedule group, then load all their events at once."""
+    tasks = [efs_processor.get_efs_id(sg.url) for sg in schedule_groups]
+    efs_ids = {efs_id for efs_id in await asyncio.gather(*tasks) if efs_id}
+    if not efs_ids:
+        return {}
+    return await load_events_index(efs_ids)
 
-    if not schedules_groups:
-        logger.info("No schedules specified. Retrieving with the crawler.")
-        schedules_groups = await _get_schedules_from_crawler()
 
-    if not schedules_groups:
-        logger.error("No schedules to process.")
-        return
-
-    # Process all schedule groups concurrently.
-    schedule_groups = [ScheduleGroupSchema(**sg) for sg in schedules_groups if sg]
-    logger.info(f"Processing {len(schedule_groups)} schedule groups.")
-
-    async with EFSBatchProcessor() as efs_processor:
-        tasks = [_handle_schedules_group(sg, efs_processor) for sg in schedule_groups]
-        processed_schedule_groups = await asyncio.gather(*tasks)
+async def _process_schedules_groups(
+    schedule_groups: list[ScheduleGroupSchema], efs_processor: EFSBatchProcessor
+) -> int:
+    """Match the schedules of the groups with their events and save them, return the number of schedules saved."""
+    # EFS_IDs are cached by the processor, so groups won't resolve them a second time
+    events_index = await _build_events_index(schedule_groups, efs_processor)
+    tasks = [_handle_schedules_group(sg, efs_processor, events_index) for sg in schedule_groups]
+    processed_schedule_groups = await asyncio.gather(*tasks)
 
     # Flatten the list of lists of schedules.
     final_schedules = [s for sublist in processed_schedule_groups for s in sublist]
 
     if not final_schedules:
         logger.info("No schedules to save after processing.")
-        return
+        return 0
 
     logger.info(f"Saving {len(final_schedules)} schedules.")
-    save_tasks = [add_schedule(s) for s in final_schedules]
-    await asyncio.gather(*save_tasks)
+    if settings.DB_BULK_WRITES:
+        await bulk_add_schedules(final_schedules)
+    else:
+        save_tasks = [add_schedule(s) for s in final_schedules]
+        await asyncio.gather(*save_tasks)
+    return len(final_schedules)
+
+
+async def _stream_update_schedules(efs_processor: EFSBatchProcessor | None = None) -> tuple[bool, int, int]:
+    """Crawl the pages and save their schedules by batches while the crawl goes on.
+
+    Return whether the crawl succeeded and not every batch failed to be saved,
+    the number of pages crawled (not modified ones included) and of schedules saved.
+    """
+    crawled: asyncio.Queue[ScheduleGroupSchema | PageNotModified | None] = asyncio.Queue(
+        maxsize=settings.PIPELINE_QUEUE_SIZE
+    )
+
+    async def _produce() -> bool:
+        try:
+            async for schedules_group in _stream_schedules_from_crawler():
+                await crawled.put(schedules_group)
+            return True
+        except Exception:
+            # Logged by the crawler stream, the schedules already crawled are still saved
+            return False
+        finally:
+            await crawled.put(None)
+
+    async def _save(efs_processor: EFSBatchProcessor) -> tuple[int, int, int, int]:
+        n_pages, n_schedules, n_batches, n_failed_batches = 0, 0, 0, 0
+        batch: list[ScheduleGroupSchema] = []
+        finished = False
+        while not finished:
+            try:
+                schedules_group = await asyncio.wait_for(crawled.get(), timeout=settings.PIPELINE_FLUSH_INTERVAL)
+                if schedules_group is None:
+                    finished = True
+                elif isinstance(schedules_group, PageNotModified):
+                    # Its schedules were saved by a previous crawl
+                    n_pages += 1
+                    continue
+                else:
+                    batch.append(schedules_group)
+                    if len(batch) < settings.CRAWLER_BATCH:
+                        continue
+            except TimeoutError:
+                pass
+
+            if not batch:
+                continue
+            logger.info(f"Processing {len(batch)} schedule groups.")
+            n_batches += 1
+            try:
+                n_schedules += await _process_schedules_groups(batch, efs_processor)
+            except Exception as e:
+                n_failed_batches += 1
+                logger.error("Failed to save schedules batch", extra={"n_groups": len(batch), "error": str(e)})
+            n_pages += len(batch)
+            batch = []
+        return n_pages, n_schedules, n_batches, n_failed_batches
+
+    async with nullcontext(efs_processor) if efs_processor else EFSBatchProcessor() as efs_processor:
+        writer = asyncio.create_task(_save(efs_processor))
+        crawl_succeeded = await _produce()
+        n_pages, n_schedules, n_batches, n_failed_batches = await writer
+
+    succeeded = crawl_succeeded and not (n_batches and n_failed_batches == n_batches)
+    return succeeded, n_pages, n_schedules
+
 
-    logger.info(f"Successfully processed {len(final_schedules)} schedules.")
+async def update_schedules(
+    schedules_groups: list[dict] | None = None,
+    efs_processor: EFSBatchProcessor | None = None,
+) -> bool:
+    """Retrieve, process, and save schedules, return False when the crawl or every save failed.
+
+    Without `schedules_groups`, the pages are crawled and their schedules saved as they come.
+    `efs_processor` is an open processor shared with other tasks, a new one is opened without it.
+    """
+    logger.info("Starting schedule update process.")
+
+    if not schedules_groups:
+        logger.info("No schedules specified. Retrieving with the crawler.")
+        succeeded, n_pages, n_schedules = await _stream_update_schedules(efs_processor)
+        if not succeeded:
+            logger.error("Failed to update schedules.")
+            return False
+        # No page due for a crawl, or none modified since its last crawl, with CRAWL_INCREMENTAL
+        if not n_pages:
+            logger.info("No page crawled, the schedules are up to date.")
+    else:
+        # Process all schedule groups concurrently.
+        schedule_groups = [ScheduleGroupSchema(**sg) for sg in schedules_groups if sg]
+        logger.info(f"Processing {len(schedule_groups)} schedule groups.")
+        async with nullcontext(efs_processor) if efs_processor else EFSBatchProcessor() as efs_processor:
+            n_schedules = await _process_schedules_groups(schedule_groups, efs_processor)
+
+    if n_schedules:
+        logger.info(f"Successfully processed {n_schedules} schedules.")
+    return True
@@ -4,6 +4,9 @@
 # EFS Collections Launch Script
 # =============================================================================
 
+# The exit code of a task is the one of docker compose, not of the tee logging it
+set -o pipefail
+
 # Configuration
 PROJECT_DIR="/path/to/your/collectes-efs"  # Update with your path
 LOG_DIR="$PROJECT_DIR/logs"
@@ -80,14 +83,38 @@ case "${1:-}" in
         log "=== SCHEDULES COLLECTION ==="
         run_task "cli" "--schedules"
         ;;
+
+    "rollups")
+        log "=== DASHBOARDS ROLLUPS ==="
+        run_task "cli" "--refresh-rollups"
+        ;;
+
+    "maintenance")
+        log "=== DATABASE MAINTENANCE ==="
+        run_task "cli" "--maintenance"
+        ;;
+
+    "pipeline")
+        log "=== ALL TASKS PIPELINE ==="
+        run_task "cli" "--pipeline"
+        ;;
+
+    "daily")
+        log "=== COLLECTIONS, SCHEDULES AND ROLLUPS PIPELINE ==="
+        # --pipeline --collections --schedules --refresh-rollups, as one argument
+        run_task "cli" "-acsr"
+        ;;
     
     *)
-        echo "Usage: $0 {groups|locations|collections|schedules}"
+        echo "Usage: $0 {groups|locations|collections|schedules|rollups|maintenance|pipeline|daily}"
         echo ""
         echo "Examples:"
         echo "  $0 schedules    # Run only get-schedules"
+        echo "  $0 pipeline     # Run every task in one process"
         exit 1
         ;;
 esac
+status=$?
 
-log "Script completed"
\ No newline at end of file
+log "Script completed"
+exit $status
\ No newline at end of file
@@ -1,3 +1,4 @@
-from .main import start_crawler
+from .archive import reparse_archive
+from .main import iter_crawler, start_crawler
 
-__all__ = ["start_crawler"]
+__all__ = ["iter_crawler", "reparse_archive", "start_crawler"]
@@ -0,0 +1,178 @@
+import io
+import logging
+import multiprocessing
+import os
+import uuid
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from itertools import batched
+from pathlib import Path
+
+import zstandard
+
+from crawler.models import LocationEvents
+from crawler.parsers.pages import available_cores, parse_page
+
+logger = logging.getLogger(__name__)
+
+# Raised by the end of a segment truncated while a page was being written
+READ_ERRORS = (EOFError, OSError, KeyError, ValueError, zstandard.ZstdError)
+
+# A new segment is started once the current one reaches this size
+SEGMENT_BYTES = 256 * 1024 * 1024
+# Archived pages sent to the process pool at once by `reparse_archive`
+REPARSE_CHUNK = 256
+
+
+@dataclass
+class ArchivedPage:
+    url: str
+    content: bytes
+    status_code: int = 200
+    headers: dict[str, str] = field(default_factory=dict)
+    fetched_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+
+
+def _encode_record(page: ArchivedPage) -> bytes:
+    """Return the WARC response record of the page"""
+    http_headers = "".join(f"{name}: {value}\r\n" for name, value in page.headers.items())
+    block = f"HTTP/1.1 {page.status_code}\r\n{http_headers}\r\n".encode() + page.content
+    warc_headers = (
+        "WARC/1.0\r\n"
+        "WARC-Type: response\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+        f"WARC-Target-URI: {page.url}\r\n"
+        f"WARC-Date: {page.fetched_at.astimezone(UTC).strftime('%Y-%m-%dT%H:%M:%SZ')}\r\n"
+        "Content-Type: application/http; msgtype=response\r\n"
+        f"Content-Length: {len(block)}\r\n"
+        "\r\n"
+    )
+    return warc_headers.encode() + block + b"\r\n\r\n"
+
+
+def _read_headers(stream: io.BufferedReader) -> dict[str, str] | None:
+    """Read header lines up to the blank line, None at the end of the stream"""
+    headers = {}
+    while line := stream.readline():
+        line = line.decode().rstrip("\r\n")
+        if not line:
+            return headers
+        name, _, value = line.partition(":")
+        headers[name.strip()] = value.strip()
+    return headers or None
+
+
+def _decode_record(warc_headers: dict[str, str], block: bytes) -> ArchivedPage:
+    http = io.BufferedReader(io.BytesIO(block))
+    status_line = http.readline().decode().split()
+    headers = _read_headers(http) or {}
+    return ArchivedPage(
+        url=warc_headers["WARC-Target-URI"],
+        content=http.read(),
+        status_code=int(status_line[1]),
+        headers=headers,
+        fetched_at=datetime.strptime(warc_headers["WARC-Date"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=UTC),
+    )
+
+
+class PageArchive:
+    """Append the fetched pages to compressed WARC segments of a folder.
+
+    Each page is compressed in its own zstd frame, so segments can be appended to, and read
+    back up to the last complete page.
+    """
+
+    def __init__(self, directory: str | Path, segment_bytes: int = SEGMENT_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._file = None
+        self._segment = 0
+
+    def _open_segment(self) -> None:
+        self.close()
+        self._segment += 1
+        name = f"pages-{datetime.now(UTC):%Y%m%dT%H%M%S}-{os.getpid()}-{self._segment}.warc.zst"
+        self._file = open(self.directory / name, "ab")
+        logger.info("Archive segment opened.", extra={"path": str(self.directory / name)})
+
+    def write(self, page: ArchivedPage) -> None:
+        if self._file is None or self._file.tell() >= self.segment_bytes:
+            self._open_segment()
+        self._file.write(self._compressor.compress(_encode_record(page)))
+        # Complete pages survive a crash of the crawler
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def archive_segments(paths: Iterable[str | Path]) -> list[Path]:
+    """Return the archive segments of the paths, folders are searched recursively"""
+    segments = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            segments.extend(sorted(path.rglob("*.warc.zst")))
+        else:
+            segments.append(path)
+    return segments
+
+
+def _open_stream(segment: Path) -> io.BufferedReader:
+    reader = zstandard.ZstdDecompressor().stream_reader(open(segment, "rb"), read_across_frames=True)
+    return io.BufferedReader(reader)
+
+
+def iter_archive(paths: Iterable[str | Path]) -> Iterator[ArchivedPage]:
+    """Yield the pages of the archive segments, in the order they were fetched in each segment"""
+    for segment in archive_segments(paths):
+        try:
+            with _open_stream(segment) as stream:
+                while (warc_headers := _read_headers(stream)) is not None:
+                    length = int(warc_headers["Content-Length"])
+                    block = stream.read(length)
+                    if len(block) < length:
+                        raise EOFError("Incomplete record")
+                    stream.read(4)
+                    yield _decode_record(warc_headers, block)
+        except READ_ERRORS as e:
+            # The crawler stopped while writing the last page
+            logger.warning("Truncated archive segment.", extra={"path": str(segment), "error": str(e)})
+
+
+def _location_events(page: ArchivedPage, parsed: dict) -> dict:
+    location_events = LocationEvents(
+        url=page.url,
+        etag=page.headers.get("etag"),
+        last_modified=page.headers.get("last-modified"),
+        time=page.fetched_at,
+        **parsed,
+    )
+    return location_events.model_dump(mode="json")
+
+
+def reparse_archive(paths: Iterable[str | Path], parser: str = "html.parser", processes: int = -1) -> list[dict]:
+    """Parse the archived pages again, without network, in a pool of processes (-1 for one per core).
+
+    Return the data the crawler would have pushed for each page, timed when the page was fetched.
+    """
+    workers = available_cores() if processes < 0 else processes
+    executor = ProcessPoolExecutor(workers, multiprocessing.get_context("spawn")) if workers else None
+    map_pages = executor.map if executor else map
+
+    results = []
+    try:
+        for chunk in batched(iter_archive(paths), REPARSE_CHUNK):
+            pages = [page for page in chunk if page.status_code == 200]
+            parsed = map_pages(parse_page, [p.content for p in pages], [p.url for p in pages], [parser] * len(pages))
+            results.extend(_location_events(page, data) for page, data in zip(pages, parsed) if data is not None)
+    finally:
+        if executor:
+            executor.shutdown()
+    logger.info("Archive parsed.", extra={"n_results": len(results)})
+    return results
@@ -1,43 +1,153 @@
+import asyncio
 import logging
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Executor
 from datetime import UTC, datetime
 
 from crawlee.crawlers import (
     BeautifulSoupCrawlingContext,
+    ParsedHttpCrawlingContext,
 )
 
-from crawler.models import LocationEvents
-from crawler.parsers import parse_collect_type, parse_events, parse_location
+from crawler.archive import ArchivedPage, PageArchive
+from crawler.models import LocationEvents, PageNotModified
+from crawler.parsers import fast, parse_collect_type, parse_events, parse_location
+from crawler.parsers.pages import parse_page
 
 logger = logging.getLogger(__name__)
 
+# Parse a crawled page, None when it can't be used
+PageCollector = Callable[[ParsedHttpCrawlingContext], Awaitable[LocationEvents | PageNotModified | None]]
+# Receive the results instead of the crawler dataset
+ResultSink = Callable[[LocationEvents | PageNotModified], Awaitable[None]]
+RequestHandler = Callable[[ParsedHttpCrawlingContext], Awaitable[None]]
 
-async def collect_handler(context: BeautifulSoupCrawlingContext) -> LocationEvents:
-    """Crawler handler. Retrieve all informations for the EFS collects."""
+
+def _page_data(context: ParsedHttpCrawlingContext) -> dict | PageNotModified:
+    """Return the url and validators of the page, or a marker when it didn't change since the last crawl."""
+    url = context.request.url
+
+    # Answer to a conditional GET
+    if context.http_response.status_code == 304:
+        logger.info("Page not modified.", extra={"url": url})
+        return PageNotModified(url=url)
+
+    headers = context.http_response.headers
+    return {"url": url, "etag": headers.get("etag"), "last_modified": headers.get("last-modified")}
+
+
+async def collect_page(context: BeautifulSoupCrawlingContext) -> LocationEvents | PageNotModified | None:
+    """Retrieve all informations for the EFS collects from the page parsed by BeautifulSoup."""
+    data = _page_data(context)
+    if isinstance(data, PageNotModified):
+        return data
+
+    logger.info("Start processing page.", extra={"url": data["url"]})
+
+    # Parse location
+    location = await parse_location(context)
+    if not location.success:
+        return None
+    data["location"] = location.value
+
+    # Parse events type
+    collect_type_result = await parse_collect_type(context)
+    if not collect_type_result.success:
+        return None
+    data["collect_type"] = collect_type_result.value
+
+    # Parse all events
+    events_result = await parse_events(context)
+    if not events_result.success:
+        return None
+    data["events"] = events_result.value
+
+    return LocationEvents(**data, time=datetime.now(UTC))
+
+
+async def fast_collect_page(context: ParsedHttpCrawlingContext[bytes]) -> LocationEvents | PageNotModified | None:
+    """Parse the raw page with selectolax, same results as `collect_page`."""
+    data = _page_data(context)
+    if isinstance(data, PageNotModified):
+        return data
+
+    logger.info("Start processing page.", extra={"url": data["url"]})
+
+    page = fast.parse_page(context.parsed_content, data["url"])
+    if page is None:
+        return None
+    return LocationEvents(**data, **page, time=datetime.now(UTC))
+
+
+def pool_collect_page(executor: Executor, parser: str) -> PageCollector:
+    """Return a page collector parsing the raw pages in the executor, so the event loop keeps fetching."""
+
+    async def collect(context: ParsedHttpCrawlingContext[bytes]) -> LocationEvents | PageNotModified | None:
+        data = _page_data(context)
+        if isinstance(data, PageNotModified):
+            return data
+
+        logger.info("Start processing page.", extra={"url": data["url"]})
+
+        loop = asyncio.get_running_loop()
+        page = await loop.run_in_executor(executor, parse_page, context.parsed_content, data["url"], parser)
+        if page is None:
+            return None
+        return LocationEvents(**data, **page, time=datetime.now(UTC))
+
+    return collect
+
+
+def _archive_page(archive: PageArchive, context: ParsedHttpCrawlingContext) -> None:
+    """Save the fetched page to the archive, the page is processed even if it fails."""
+    response = context.http_response
+    if response.status_code != 200:
+        return
     try:
-        url = context.request.url
-        data = {"url": context.request.url}
-
-        logger.info("Start processing page.", extra={"url": url})
-
-        # Parse location
-        location = await parse_location(context)
-        if not location.success:
-            return
-        data["location"] = location.value
-
-        # Parse events type
-        collect_type_result = await parse_collect_type(context)
-        if not collect_type_result.success:
-            return
-        data["collect_type"] = collect_type_result.value
-
-        # Parse all events
-        events_result = await parse_events(context)
-        if not events_result.success:
-            return
-        data["events"] = events_result.value
-
-        location_events = LocationEvents(**data, time=datetime.now(UTC))
-        await context.push_data(location_events.model_dump_json())
+        page = ArchivedPage(
+            url=context.request.url,
+            content=response.read(),
+            status_code=response.status_code,
+            headers=dict(response.headers),
+        )
+        archive.write(page)
     except Exception as e:
-        context.log.error(f"Error in request handler: {e}")
+        logger.warning("Failed to archive page.", extra={"url": context.request.url, "error": str(e)})
+
+
+def make_handler(
+    collect: PageCollector, sink: ResultSink | None = None, archive: PageArchive | None = None
+) -> RequestHandler:
+    """Return a crawler handler saving the results of `collect` to the dataset, or sending them to `sink`.
+
+    The pages answered by "304 Not Modified" are sent as `PageNotModified`, so the caller can tell
+    them from the pages that failed.
+
+    The fetched pages are also saved to `archive` when given, to parse them again later.
+    """
+
+    async def handler(context: ParsedHttpCrawlingContext) -> None:
+        try:
+            if archive is not None:
+                _archive_page(archive, context)
+            result = await collect(context)
+            if result is None:
+                return
+            if sink is None:
+                await context.push_data(result.model_dump_json())
+            else:
+                await sink(result)
+        except Exception as e:
+            context.log.error(f"Error in request handler: {e}")
+
+    return handler
+
+
+# Crawler handlers. Retrieve all informations for the EFS collects.
+collect_handler = make_handler(collect_page)
+fast_collect_handler = make_handler(fast_collect_page)
+
+
+def pool_collect_handler(executor: Executor, parser: str) -> RequestHandler:
+    """Return a crawler handler parsing the raw pages in the executor."""
+    return make_handler(pool_collect_page(executor, parser))
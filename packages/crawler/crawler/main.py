@@ -1,14 +1,57 @@
+import asyncio
 import logging
+import multiprocessing
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import timedelta
+from pathlib import Path
 
-from crawlee.crawlers import BeautifulSoupCrawler
+from crawlee import ConcurrencySettings, Request
+from crawlee.crawlers import BasicCrawler, BeautifulSoupCrawler, HttpCrawler
+from crawlee.http_clients import HttpClient
 
-from crawler.handlers import collect_handler
-from crawler.models import LocationEvents
+from crawler.archive import PageArchive
+from crawler.handlers import ResultSink, collect_page, fast_collect_page, make_handler, pool_collect_page
+from crawler.models import LocationEvents, PageNotModified
+from crawler.parsers.fast import FAST_PARSER
+from crawler.parsers.pages import available_cores
 
 logger = logging.getLogger(__name__)
 
 
+def _build_crawler(
+    parser: str, parse_processes: int, sink: ResultSink | None = None, archive: PageArchive | None = None, **options
+) -> tuple[BasicCrawler, Executor | None]:
+    """Return the crawler of the parser, and the process pool parsing its pages if any"""
+    if parse_processes:
+        workers = available_cores() if parse_processes < 0 else parse_processes
+        # Spawned workers don't inherit the threads and event loop of the crawler
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        handler = make_handler(pool_collect_page(executor, parser), sink, archive)
+        return HttpCrawler(request_handler=handler, **options), executor
+    if parser == FAST_PARSER:
+        return HttpCrawler(request_handler=make_handler(fast_collect_page, sink, archive), **options), None
+    handler = make_handler(collect_page, sink, archive)
+    return BeautifulSoupCrawler(parser=parser, request_handler=handler, **options), None
+
+
+@contextmanager
+def _open_crawler(
+    parser: str, parse_processes: int, archive_dir: str | Path | None = None, **options
+) -> Iterator[BasicCrawler]:
+    """Build the crawler, then shut down its process pool and close its archive"""
+    archive = PageArchive(archive_dir) if archive_dir else None
+    crawler, executor = _build_crawler(parser, parse_processes, archive=archive, **options)
+    try:
+        yield crawler
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+        if archive:
+            archive.close()
+
+
 async def start_crawler(
     urls: list[str],
     request_handled_timeout: int = 60 * 2,
@@ -17,22 +60,99 @@ async def start_crawler(
     crawler_logger: logging.Logger = None,
     statistics_log_format: str = "inline",
     parser: str = "html.parser",
+    concurrency_settings: ConcurrencySettings | None = None,
+    parse_processes: int = 0,
+    archive_dir: str | Path | None = None,
+    http_client: HttpClient | None = None,
 ) -> LocationEvents | None:
-    crawler = BeautifulSoupCrawler(
+    """Crawl the booking pages, return the data pushed by the handler of each page.
+
+    The pages answered by "304 Not Modified" to a conditional request are pushed as `PageNotModified`.
+
+    With `parse_processes`, the pages are parsed by a pool of processes (-1 for one per available
+    core) while the event loop only fetches them, instead of being parsed on the event loop.
+    With `archive_dir`, the fetched pages are saved to a compressed archive (see `crawler.archive`).
+    With `http_client`, the pages are fetched by this client instead of the default one of crawlee.
+    """
+    with _open_crawler(
+        parser,
+        parse_processes,
+        archive_dir,
+        concurrency_settings=concurrency_settings,
+        http_client=http_client,
         max_request_retries=max_request_retries,
         request_handler_timeout=timedelta(seconds=request_handled_timeout),
         statistics_log_format=statistics_log_format,
         max_requests_per_crawl=max_requests_per_crawl,
-        parser=parser,
         configure_logging=False if crawler_logger else True,
-        request_handler=collect_handler,
         _logger=crawler_logger,
-    )
+    ) as crawler:
+        try:
+            await crawler.run(urls)
+            logger.info("Crawler ended.")
+            data = await crawler.get_data()
+            return data.items
+        except Exception as e:
+            logger.error(f"Error during crawling: {e}")
 
-    try:
-        await crawler.run(urls)
-        logger.info("Crawler ended.")
-        data = await crawler.get_data()
-        return data.items
-    except Exception as e:
-        logger.error(f"Error during crawling: {e}")
+
+async def iter_crawler(
+    urls: list[str | Request],
+    request_handled_timeout: int = 60 * 2,
+    max_request_retries: int = 3,
+    max_requests_per_crawl: int = 1000,
+    crawler_logger: logging.Logger = None,
+    statistics_log_format: str = "inline",
+    parser: str = "html.parser",
+    concurrency_settings: ConcurrencySettings | None = None,
+    parse_processes: int = 0,
+    archive_dir: str | Path | None = None,
+    http_client: HttpClient | None = None,
+    queue_size: int = 100,
+) -> AsyncIterator[LocationEvents | PageNotModified]:
+    """Crawl the booking pages, yield the result of each page as soon as it's parsed.
+
+    Same options as `start_crawler`, but the results skip the crawler dataset. Closing the
+    iterator (`contextlib.aclosing`) before the end stops the crawl.
+    Once `queue_size` results wait to be consumed, the handlers wait for room before pushing theirs.
+    """
+    results: asyncio.Queue[LocationEvents | PageNotModified | None] = asyncio.Queue(maxsize=queue_size)
+    with _open_crawler(
+        parser,
+        parse_processes,
+        archive_dir,
+        sink=results.put,
+        concurrency_settings=concurrency_settings,
+        http_client=http_client,
+        max_request_retries=max_request_retries,
+        request_handler_timeout=timedelta(seconds=request_handled_timeout),
+        statistics_log_format=statistics_log_format,
+        max_requests_per_crawl=max_requests_per_crawl,
+        configure_logging=False if crawler_logger else True,
+        _logger=crawler_logger,
+    ) as crawler:
+
+        async def _run() -> None:
+            try:
+                await crawler.run(urls)
+                logger.info("Crawler ended.")
+            except Exception as e:
+                logger.error(f"Error during crawling: {e}")
+            finally:
+                await results.put(None)
+
+        task = asyncio.create_task(_run())
+        finished = False
+        try:
+            while (result := await results.get()) is not None:
+                yield result
+            finished = True
+        finally:
+            if not finished:
+                if not task.done():
+                    # Let the pages being crawled finish, so the crawler storages stay consistent
+                    crawler.stop("The results are no longer consumed.")
+                # Drop their results, the handlers waiting for room in the queue would block the crawl
+                while await results.get() is not None:
+                    pass
+            await asyncio.gather(task, return_exceptions=True)
@@ -22,6 +22,16 @@ class LocationEvents(BaseModel):
     collect_type: CollectType
     time: datetime
     events: list[Event]
+    # Validators of the page, sent back with the next crawl for a conditional GET
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class PageNotModified(BaseModel):
+    """Answer "304 Not Modified" to the conditional GET of a page"""
+
+    url: str
+    not_modified: Literal[True] = True
 
 
 class Result[T](BaseModel):
@@ -7,6 +7,10 @@ from crawler.models import Event, Locator, Result, Schedules
 
 logger = logging.getLogger(__name__)
 
+# Total slots of an event ("4 places") and slots of a time block ("14h25" followed by "1 place")
+SLOTS_PATTERN = re.compile(r"\d+")
+SCHEDULE_PATTERN = re.compile(r"(\d{2}h\d{2})(\d+)")
+
 
 async def _parse_event_date(event_locator: Locator) -> str:
     date = event_locator.attrs.get("data-date")
@@ -18,7 +22,7 @@ async def _parse_event_date(event_locator: Locator) -> str:
 async def _parse_event_slots(event_locator: Locator) -> int:
     """Extract the total number of slots available from the collect event."""
     slots_element = event_locator.select_one(".timeslot-item__header > .place")
-    total_slots_match = re.search(r"\d+", slots_element.text)
+    total_slots_match = SLOTS_PATTERN.search(slots_element.text)
     if not total_slots_match:
         raise ValueError("EVENT_SLOT_NOT_FOUND")
     return int(total_slots_match.group())
@@ -30,12 +34,12 @@ async def _parse_event_schedules(event_locator: Locator) -> Schedules:
     schedules: Schedules = {}
 
     for time_block_item in time_block_items:
-        parts = re.search(r"(\d{2}h\d{2})(\d+)", time_block_item.text)
+        parts = SCHEDULE_PATTERN.search(time_block_item.text)
         if not parts:
             continue
 
         schedule, slots = parts.groups()
-        slots_match = re.search(r"\d+", slots)
+        slots_match = SLOTS_PATTERN.search(slots)
         if slots_match:
             schedules[schedule] = int(slots_match.group())
 
@@ -0,0 +1,130 @@
+import logging
+
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+
+from crawler.models import CollectType, Event, Result, Schedules
+from crawler.parsers.events import SCHEDULE_PATTERN, SLOTS_PATTERN
+from crawler.parsers.location import COLLECT_TYPES
+
+logger = logging.getLogger(__name__)
+
+# Value of the `parser` argument of `start_crawler` selecting these parsers
+FAST_PARSER = "selectolax"
+
+# Their text is skipped by BeautifulSoup `.text`, but not by selectolax `.text()`
+SKIPPED_TAGS = ["script", "style"]
+
+
+def parse_location(tree: LexborHTMLParser, url: str) -> Result[str]:
+    """Retrieve the events location"""
+    location_element = tree.css_first(".card-rdv .top")
+    if not location_element:
+        logger.error("Location not found.", extra={"url": url})
+        return Result(success=False, error="NO_LOCATION_FOUND")
+    location = location_element.text().strip()
+    logger.info(f"Location found: {location}", extra={"url": url})
+    return Result(success=True, value=location)
+
+
+def parse_collect_type(tree: LexborHTMLParser, url: str) -> Result[CollectType]:
+    """Retrieve the type of the collect from the HTML page"""
+    try:
+        # First option of the select, as `select_one("option", selected=True)` of the soup parser
+        option = tree.css_first("#map-timeslot__don-type select").css_first("option")
+        collect_type = option.attributes.get("value").lower()
+        if collect_type not in COLLECT_TYPES:
+            logger.error(f"{collect_type} is not a valid collect type.")
+            return Result(success=False, error="UNKNOWN_COLLECT_TYPE")
+
+        logger.info(f"Collect type found: {COLLECT_TYPES[collect_type]}.", extra={"url": url})
+        return Result(success=True, value=COLLECT_TYPES[collect_type])
+    except Exception as e:
+        logger.error("Error while parsing the collect type.", extra={"url": url}, exc_info=e)
+        return Result(success=False, error="COLLECT_TYPE_NOT_FOUND")
+
+
+def _parse_event_schedules(event_node: LexborNode) -> Schedules:
+    """Extract schedules of the event."""
+    schedules: Schedules = {}
+    for time_block_item in event_node.css(".time-block__item"):
+        parts = SCHEDULE_PATTERN.search(time_block_item.text())
+        if not parts:
+            continue
+
+        schedule, slots = parts.groups()
+        slots_match = SLOTS_PATTERN.search(slots)
+        if slots_match:
+            schedules[schedule] = int(slots_match.group())
+    return schedules
+
+
+def _parse_event(url: str, event_id: int, event_node: LexborNode) -> Result[Event]:
+    """Parse the date, available slots and detailed schedules from an event."""
+    try:
+        date = event_node.attributes.get("data-date")
+        if not date:
+            raise ValueError("EVENT_DATE_NOT_FOUND")
+
+        total_slots_match = SLOTS_PATTERN.search(event_node.css_first(".timeslot-item__header > .place").text())
+        if not total_slots_match:
+            raise ValueError("EVENT_SLOT_NOT_FOUND")
+        slots = int(total_slots_match.group())
+
+        schedules = _parse_event_schedules(event_node) if slots > 0 else Schedules()
+        return Result(success=True, value=Event(date=date, slots=slots, schedules=schedules))
+    except ValueError as e:
+        # The event might be private or online but not ready
+        logger.warning(
+            f"Failed to parse the event information for iteration {event_id}",
+            extra={"url": url, "error": str(e)},
+        )
+        return Result(success=False, error=str(e))
+    except Exception as e:
+        logger.error(
+            f"Something went wrong while parsing event iteration {event_id}",
+            extra={"url": url},
+            exc_info=e,
+        )
+        return Result(success=False, error=str(e))
+
+
+def parse_events(tree: LexborHTMLParser, url: str) -> Result[list[Event]]:
+    """Retrieve all the events nodes, then parse them to get all the details."""
+    events_nodes = tree.css(".timeslot-item")
+    if not events_nodes:
+        logger.warning("No events found.", extra={"url": url})
+        return Result(success=False, error="NO_EVENT_FOUND")
+    logger.info(f"Found {len(events_nodes)} events.", extra={"url": url})
+
+    events = []
+    for event_id, event_node in enumerate(events_nodes):
+        event_result = _parse_event(url, event_id, event_node)
+        if event_result.success:
+            events.append(event_result.value)
+
+    logger.info(f"Successfully parsed {len(events)} events.", extra={"url": url})
+    return Result(success=True, value=events)
+
+
+def parse_page(html: str | bytes, url: str) -> dict | None:
+    """Parse a booking page with selectolax, return its location, collect type and events.
+
+    Same results as the BeautifulSoup parsers on valid HTML, `benchmarks/parsers.py` compares
+    both on saved pages. Return None when the page can't be used, as `collect_handler` does.
+    """
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(SKIPPED_TAGS)
+
+    location = parse_location(tree, url)
+    if not location.success:
+        return None
+
+    collect_type = parse_collect_type(tree, url)
+    if not collect_type.success:
+        return None
+
+    events = parse_events(tree, url)
+    if not events.success:
+        return None
+
+    return {"location": location.value, "collect_type": collect_type.value, "events": events.value}
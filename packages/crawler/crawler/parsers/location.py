@@ -6,6 +6,9 @@ from crawler.models import CollectType, Result
 
 logger = logging.getLogger(__name__)
 
+# Type of donation, from french to english
+COLLECT_TYPES: dict[str, CollectType] = {"plasma": "plasma", "sang": "blood", "plaquettes": "platelets"}
+
 
 async def parse_location(context: BeautifulSoupCrawlingContext) -> Result[str]:
     """Retrieve the events location"""
@@ -20,13 +23,11 @@ async def parse_location(context: BeautifulSoupCrawlingContext) -> Result[str]:
 
 async def _translate_collect_type(collect_type: str) -> Result[CollectType]:
     """Translate the type of donation from french to english."""
-    type_map = {"plasma": "plasma", "sang": "blood", "plaquettes": "platelets"}
-
-    if collect_type not in type_map:
+    if collect_type not in COLLECT_TYPES:
         logger.error(f"{collect_type} is not a valid collect type.")
         return Result(success=False, error="UNKNOWN_COLLECT_TYPE")
 
-    collect_type = type_map.get(collect_type)
+    collect_type = COLLECT_TYPES.get(collect_type)
     return Result(success=True, value=collect_type)
 
 
@@ -0,0 +1,52 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+from bs4 import BeautifulSoup
+
+from crawler.parsers import fast
+from crawler.parsers.events import parse_events
+from crawler.parsers.location import parse_collect_type, parse_location
+
+
+def available_cores() -> int:
+    """Return the number of cores this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+async def _parse_soup_page(html: bytes, url: str, features: str) -> dict | None:
+    # The soup parsers only read `soup` and `request.url` from the crawling context
+    context = SimpleNamespace(soup=BeautifulSoup(html, features=features), request=SimpleNamespace(url=url))
+
+    location = await parse_location(context)
+    if not location.success:
+        return None
+
+    collect_type = await parse_collect_type(context)
+    if not collect_type.success:
+        return None
+
+    events = await parse_events(context)
+    if not events.success:
+        return None
+
+    return {"location": location.value, "collect_type": collect_type.value, "events": events.value}
+
+
+def parse_page(html: bytes, url: str, parser: str = "html.parser") -> dict | None:
+    """Parse a booking page out of the event loop, return its location, collect type and events.
+
+    Run by the workers of the process pool, the events are plain dicts so the result is cheap
+    to send back. Return None when the page can't be used, as `collect_handler` does.
+    """
+    if parser == fast.FAST_PARSER:
+        page = fast.parse_page(html, url)
+    else:
+        page = asyncio.run(_parse_soup_page(html, url, parser))
+
+    if page is None:
+        return None
+    page["events"] = [event.model_dump() for event in page["events"]]
+    return page
@@ -0,0 +1,22 @@
+from benchmarks import api_decoders
+
+
+def test_payload_model(tmp_path):
+    payload = tmp_path / "collections-35000.json"
+
+    assert api_decoders.payload_model(payload, b'{"samplingLocationCollections": []}') == (
+        "SamplingCollectionResult"
+    )
+    assert api_decoders.payload_model(payload, b"[]") == "list[SamplingLocationCollectionsEntity]"
+    assert api_decoders.payload_model(tmp_path / "schedules.json", b"[]") is None
+
+
+def test_run_benchmark_test_data():
+    payloads = sorted(api_decoders.PAYLOADS_DIR.glob("*.json"))
+
+    results = api_decoders.run_benchmark(payloads, api_decoders.DECODERS, repeat=1)
+
+    assert results[0]["decoder"] == api_decoders.REFERENCE_DECODER
+    for result in results:
+        assert result["payloads"] == 3
+        assert result["mismatches"] == []
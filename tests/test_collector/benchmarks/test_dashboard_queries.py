@@ -0,0 +1,100 @@
+import json
+from datetime import UTC, datetime
+
+from benchmarks import dashboard_queries
+
+
+def test_extract_queries(tmp_path):
+    dashboard = {
+        "panels": [
+            {
+                "title": "Schedules",
+                "targets": [
+                    {"rawSql": "SELECT * FROM schedules;\r\n"},
+                    {"expr": '{app="collector"}'},
+                ],
+            },
+            {"title": "Row", "panels": [{"title": "Nested", "targets": [{"rawSql": "SELECT 1"}]}]},
+        ],
+        "templating": {
+            "list": [
+                {"name": "event_id", "type": "query", "query": "SELECT id FROM collection_events"},
+                {"name": "mode", "type": "custom", "query": "st : sang"},
+            ]
+        },
+    }
+    path = tmp_path / "event.json"
+    path.write_text(json.dumps(dashboard))
+
+    result = dashboard_queries.extract_queries([path])
+
+    assert [(q.dashboard, q.panel, q.sql) for q in result] == [
+        ("event", "Schedules", "SELECT * FROM schedules"),
+        ("event", "Nested", "SELECT 1"),
+        ("event", "$event_id", "SELECT id FROM collection_events"),
+    ]
+
+
+def test_extract_queries_repo_dashboards():
+    paths = sorted(dashboard_queries.DASHBOARDS_DIR.glob("**/*.json"))
+
+    result = dashboard_queries.extract_queries(paths)
+
+    assert any("$event_id" in q.sql for q in result)
+    assert all(q.sql.upper().startswith(("SELECT", "WITH")) for q in result)
+
+
+def test_render_query():
+    sql = (
+        "SELECT * FROM schedules WHERE event_id = $event_id AND $__timeFilter(created_at)"
+        " AND efs_id = ${efs_id} AND location = [[location_id]] AND $unknown"
+    )
+    time_from = datetime(2026, 10, 1, tzinfo=UTC)
+    time_to = datetime(2026, 10, 8, tzinfo=UTC)
+
+    result = dashboard_queries.render_query(
+        sql, {"event_id": "12", "efs_id": "'A1'", "location_id": "3"}, time_from, time_to
+    )
+
+    assert result == (
+        "SELECT * FROM schedules WHERE event_id = 12 AND created_at BETWEEN "
+        "'2026-10-01T00:00:00+00:00' AND '2026-10-08T00:00:00+00:00'"
+        " AND efs_id = 'A1' AND location = 3 AND $unknown"
+    )
+
+
+def test_summarize_plan():
+    plan = {
+        "Planning Time": 0.2,
+        "Execution Time": 1.5,
+        "Plan": {
+            "Node Type": "Sort",
+            "Shared Hit Blocks": 10,
+            "Shared Read Blocks": 2,
+            "Plans": [
+                {
+                    "Node Type": "Index Only Scan",
+                    "Relation Name": "schedules_p2026_10",
+                    "Index Name": "schedules_p2026_10_event_id_created_at_total_slots_idx",
+                },
+                {"Node Type": "Seq Scan", "Relation Name": "collection_groups"},
+            ],
+        },
+    }
+
+    result = dashboard_queries.summarize_plan(plan)
+
+    assert result == {
+        "execution_ms": 1.5,
+        "planning_ms": 0.2,
+        "shared_hit": 10,
+        "shared_read": 2,
+        "scans": [
+            "Index Only Scan on schedules_p2026_10 using "
+            "schedules_p2026_10_event_id_created_at_total_slots_idx",
+            "Seq Scan on collection_groups",
+        ],
+    }
+    assert dashboard_queries.render_plan(plan["Plan"])[2] == (
+        "  -> Seq Scan on collection_groups (rows=None loops=None time=Nonems)"
+    )
@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks import parsers
+
+
+@pytest.mark.asyncio
+async def test_parse_reference():
+    html = (parsers.PAGES_DIR / "collect_plasma.html").read_bytes()
+
+    result = await parsers.parse(html, "http://foo.bar", parsers.REFERENCE_PARSER)
+
+    assert result == {
+        "url": "http://foo.bar",
+        "location": "Maison du Don & Plasma Saint-Grégoire",
+        "collect_type": "plasma",
+        "events": [{"date": "26/10/2026", "slots": 3, "schedules": {"08h30": 1, "09h30": 2}}],
+        "etag": None,
+        "last_modified": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_run_benchmark_sample_pages():
+    pages = sorted(parsers.PAGES_DIR.glob("*.html"))
+
+    results = await parsers.run_benchmark(pages, parsers.available_parsers(), repeat=1)
+
+    assert [r["parser"] for r in results][0] == parsers.REFERENCE_PARSER
+    for result in results:
+        assert result["pages"] == len(pages)
+        assert result["mismatches"] == []
+
+
+def test_run_pool_benchmark():
+    pages = [parsers.PAGES_DIR / "collect_blood.html"]
+
+    results = parsers.run_pool_benchmark(pages, [parsers.REFERENCE_PARSER], processes=1, repeat=2)
+
+    assert results[0]["parser"] == parsers.REFERENCE_PARSER
+    assert results[0]["pages"] == 2
+    assert results[0]["pages_per_s"] > 0
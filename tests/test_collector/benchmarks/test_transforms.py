@@ -0,0 +1,20 @@
+from benchmarks import transforms
+
+
+def test_load_collections():
+    collections = transforms.load_collections(transforms.DATA_FILE, copies=2)
+
+    assert len(collections) % 2 == 0
+    assert all(collection.id is not None for collection in collections)
+
+
+def test_run_benchmark():
+    collections = transforms.load_collections(transforms.DATA_FILE, copies=3)
+
+    results = transforms.run_benchmark(collections, list(transforms.TRANSFORMS), repeat=1)
+
+    assert [r["transform"] for r in results] == [transforms.REFERENCE_TRANSFORM, "batch"]
+    for result in results:
+        assert result["collections"] == len(collections)
+        assert result["peak_bytes_per_collection"] > 0
+        assert result["match"]
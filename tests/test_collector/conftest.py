@@ -1,14 +1,18 @@
 import json
 from pathlib import Path
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+import pytest_asyncio
 from api_carto_client.models.sampling_group_entity import SamplingGroupEntity
 from api_carto_client.models.sampling_location_collections_entity import (
     SamplingLocationCollectionsEntity,
 )
 from api_carto_client.models.sampling_location_entity import SamplingLocationEntity
 
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from collector.core.settings import settings
 from collector.models import (
     CollectionEventModel,
     CollectionGroupModel,
@@ -43,6 +47,37 @@ def async_cm():
     return _make
 
 
+@pytest.fixture
+def stream_result():
+    """Result of `session.stream`, its partitions are the given lists of rows"""
+
+    def _make(*partitions):
+        async def _partitions():
+            for partition in partitions:
+                yield partition
+
+        result = MagicMock()
+        result.partitions = _partitions
+        return result
+
+    return _make
+
+
+@pytest_asyncio.fixture
+async def pg_connection():
+    """Connection to the POSTGRES_* database, rolled back after the test"""
+    engine = create_async_engine(settings.POSTGRES_URL)
+    try:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            yield connection
+            await transaction.rollback()
+    except OSError:
+        pytest.skip("PostgreSQL is not reachable")
+    finally:
+        await engine.dispose()
+
+
 # Fake schemas and models
 def get_data_from_json(file_name: str) -> list[dict]:
     with open(TEST_DATA_DIR / file_name) as f:
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+import collector.core.api_client as api_client
+from collector.services.utils import with_api_client
+
+
+@pytest.fixture(autouse=True)
+def reset_client(mocker):
+    mocker.patch.object(api_client, "_client", None)
+    mocker.patch.object(api_client, "_client_loop", None)
+
+
+@pytest.mark.asyncio
+async def test_client_is_shared():
+    @with_api_client
+    async def get_client(client):
+        return client
+
+    first, second = await asyncio.gather(get_client(), get_client())
+
+    assert first is second
+    assert first.get_async_httpx_client() is second.get_async_httpx_client()
+
+
+@pytest.mark.asyncio
+async def test_close_api_client():
+    client = api_client.get_api_client()
+    httpx_client = client.get_async_httpx_client()
+
+    await api_client.close_api_client()
+
+    assert httpx_client.is_closed
+    assert api_client.get_api_client() is not client
+
+
+def test_new_client_per_event_loop():
+    async def get_client():
+        return api_client.get_api_client()
+
+    assert asyncio.run(get_client()) is not asyncio.run(get_client())
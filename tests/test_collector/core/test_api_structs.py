@@ -0,0 +1,53 @@
+import json
+
+import pytest
+from api_carto_client.api.sampling_collection import (
+    get_carto_api_v3_samplingcollection_searchinsquare as api_search_square,
+)
+from api_carto_client.models.sampling_collection_result import SamplingCollectionResult
+
+from collector.core import api_structs
+
+
+@pytest.fixture
+def collections_body(mock_loc_col) -> bytes:
+    result = SamplingCollectionResult(sampling_location_collections=mock_loc_col.api)
+    return json.dumps(result.to_dict()).encode()
+
+
+def test_decode_response(collections_body):
+    result = api_structs.decode_response(api_search_square.__name__, collections_body)
+
+    assert isinstance(result, api_structs.SamplingCollectionResult)
+    assert result.sampling_location_entities_sf is api_structs.UNSET
+    location = result.sampling_location_collections[0]
+    assert location.sampling_location_code == "2"
+    assert location.collections[0].lp_code == "10"
+
+
+def test_same_dict_as_generated_models(collections_body):
+    result = api_structs.decode_response(api_search_square.__name__, collections_body)
+
+    assert result.to_dict() == json.loads(collections_body)
+
+
+def test_from_dict(mock_loc_col):
+    data = mock_loc_col.api[0].to_dict()
+
+    entity = api_structs.SamplingLocationCollectionsEntity.from_dict(data)
+
+    assert entity.full_address == mock_loc_col.api[0].full_address
+    assert entity.collections[0].date == mock_loc_col.api[0].collections[0].date
+    assert entity.to_dict() == data
+
+
+def test_null_fields(mock_loc_col):
+    data = mock_loc_col.api[0].to_dict()
+    data.update(distance=None, giveBlood=None, latitude=None)
+    data["collections"][0]["id"] = None
+
+    entity = api_structs.SamplingLocationCollectionsEntity.from_dict(data)
+
+    assert entity.distance is None
+    assert entity.give_blood is None
+    assert entity.collections[0].id is None
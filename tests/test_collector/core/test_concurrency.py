@@ -0,0 +1,110 @@
+import asyncio
+
+import httpx
+import pytest
+
+from collector.core.concurrency import AdaptiveLimiter, AdaptiveTransport, get_limiter
+
+
+class TestAdaptiveLimiter:
+    def test_initial_limit_is_bounded(self):
+        limiter = AdaptiveLimiter("foo", min_limit=2, max_limit=4, initial_limit=10)
+        assert limiter.limit == 4
+
+    def test_additive_increase(self):
+        limiter = AdaptiveLimiter("foo", min_limit=1, max_limit=10, initial_limit=2)
+        # About one slot is added for a full window of fast responses
+        for _ in range(3):
+            limiter.on_success(latency=0.1)
+        assert limiter.limit == 3
+
+    def test_no_increase_when_slow(self):
+        limiter = AdaptiveLimiter("foo", initial_limit=2, latency_target=1.0)
+        for _ in range(10):
+            limiter.on_success(latency=5.0)
+        assert limiter.limit == 2
+
+    def test_multiplicative_decrease(self):
+        limiter = AdaptiveLimiter("foo", min_limit=2, max_limit=50, initial_limit=16)
+        limiter.on_overload()
+        assert limiter.limit == 8
+        # A burst of failures counts as a single congestion event
+        limiter.on_overload()
+        assert limiter.limit == 8
+
+        limiter._last_backoff = 0.0
+        limiter.on_overload()
+        limiter._last_backoff = 0.0
+        limiter.on_overload()
+        assert limiter.limit == 2
+
+    @pytest.mark.asyncio
+    async def test_slot_limits_concurrency(self):
+        limiter = AdaptiveLimiter("foo", min_limit=1, max_limit=2, initial_limit=2)
+        running = []
+        max_running = 0
+
+        async def request():
+            nonlocal max_running
+            async with limiter.slot():
+                running.append(1)
+                max_running = max(max_running, len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+
+        await asyncio.gather(*[request() for _ in range(10)])
+
+        assert max_running == 2
+        assert limiter.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_passes_its_wakeup(self):
+        limiter = AdaptiveLimiter("foo", min_limit=1, max_limit=1, initial_limit=1)
+        await limiter.acquire()
+        first = asyncio.create_task(limiter.acquire())
+        second = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        # The first waiter is woken up, then cancelled before it runs
+        limiter.release()
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        await asyncio.wait_for(second, timeout=1)
+        assert limiter.in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_slot_backs_off_on_status(self):
+        limiter = AdaptiveLimiter("foo", min_limit=1, initial_limit=10)
+        async with limiter.slot() as slot:
+            slot.observe(429)
+        assert limiter.limit == 5
+
+    @pytest.mark.asyncio
+    async def test_slot_backs_off_on_timeout(self):
+        limiter = AdaptiveLimiter("foo", min_limit=1, initial_limit=10)
+        with pytest.raises(TimeoutError):
+            async with limiter.slot():
+                raise TimeoutError()
+        assert limiter.limit == 5
+        assert limiter.in_flight == 0
+
+
+class TestAdaptiveTransport:
+    def test_get_limiter_is_shared(self):
+        assert get_limiter("foo.com") is get_limiter("foo.com")
+        assert get_limiter("foo.com") is not get_limiter("bar.com")
+
+    @pytest.mark.asyncio
+    async def test_request_observed(self):
+        limiter = get_limiter("overloaded.test")
+        initial_limit = limiter.limit
+        transport = AdaptiveTransport(httpx.MockTransport(lambda request: httpx.Response(503)))
+
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await client.get("https://overloaded.test/")
+
+        assert response.status_code == 503
+        assert limiter.limit < initial_limit
+        assert limiter.in_flight == 0
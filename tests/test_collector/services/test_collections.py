@@ -6,32 +6,48 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import collector.services.collections as collection_services
 from collector.schemas.collection import (
     CollectionGroupSchema,
+    CollectionUrlsSchema,
 )
+from collector.services.locations import location_key
 
 
 class TestLoadCollectionGroups:
     @pytest.mark.asyncio
-    async def test_success(self, mocker, async_cm, mock_grp_col):
+    async def test_success(self, mocker, async_cm, stream_result, mock_grp_col):
         mock_session = AsyncMock(spec=AsyncSession)
-        mock_results = MagicMock()
-        mock_results.scalars.return_value.all.return_value = mock_grp_col.models
-        mock_session.execute.return_value = mock_results
+        mock_session.stream.return_value = stream_result(
+            mock_grp_col.models[:1], mock_grp_col.models[1:]
+        )
 
         mocker.patch(
             "collector.services.collections.get_db", return_value=async_cm(mock_session)
         )
+
+        result = await collection_services.load_collection_groups()
+
+        mock_session.stream.assert_awaited()
+        assert all(isinstance(r, CollectionGroupSchema) for r in result)
+        assert result == mock_grp_col.schemas
+
+    @pytest.mark.asyncio
+    async def test_projected_columns(self, mocker, async_cm, stream_result):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.stream.return_value = stream_result()
+
         mocker.patch(
-            "collector.services.collections.sqlalchemy_to_pydantic",
-            return_value=mock_grp_col.schemas,
+            "collector.services.collections.get_db", return_value=async_cm(mock_session)
         )
 
-        result = await collection_services.load_collection_groups()
+        async for _ in collection_services.iter_collection_groups():
+            pass
 
-        mock_session.execute.assert_awaited()
-        collection_services.sqlalchemy_to_pydantic.assert_called_once_with(
-            mock_grp_col.models, CollectionGroupSchema
+        stmt = mock_session.stream.await_args.args[0]
+        columns = [column.name for column in stmt.selected_columns]
+        assert "content_hash" not in columns
+        assert "efs_id" in columns
+        assert stmt.get_execution_options()["yield_per"] == (
+            collection_services.settings.DB_STREAM_BATCH
         )
-        assert result == mock_grp_col.schemas
 
 
 class TestGetCollection:
@@ -64,52 +80,80 @@ class TestGetCollection:
         assert result is None
 
 
-class TestGetActiveCollections:
+class TestIterActiveCollections:
     @pytest.mark.asyncio
-    async def test_found(self, mocker, async_cm, mock_grp_col):
+    async def test_found(self, mocker, async_cm, stream_result, mock_grp_col):
         mock_session = AsyncMock(spec=AsyncSession)
-        mock_results = MagicMock()
-        mock_results.scalars.return_value.all.return_value = mock_grp_col.models[:2]
-        mock_session.execute.return_value = mock_results
+        mock_session.stream.return_value = stream_result(
+            mock_grp_col.models[:1], mock_grp_col.models[1:2]
+        )
 
         mocker.patch(
             "collector.services.collections.get_db", return_value=async_cm(mock_session)
         )
 
-        result = await collection_services.get_active_collections()
+        result = [
+            batch async for batch in collection_services.iter_active_collections()
+        ]
 
-        # mock_session.execute.assert_awaited()
-        assert result == mock_grp_col.schemas[:2]
+        assert len(result) == 2
+        assert [c.url for batch in result for c in batch] == [
+            c.url for c in mock_grp_col.schemas[:2]
+        ]
+        assert all(isinstance(c, CollectionUrlsSchema) for batch in result for c in batch)
 
     @pytest.mark.asyncio
-    async def test_not_found(self, mocker, async_cm):
+    async def test_projected_columns(self, mocker, async_cm, stream_result):
         mock_session = AsyncMock(spec=AsyncSession)
-        mock_results = MagicMock()
-        mock_results.scalars.return_value.all.return_value = []
-        mock_session.execute.return_value = mock_results
+        mock_session.stream.return_value = stream_result()
 
         mocker.patch(
             "collector.services.collections.get_db", return_value=async_cm(mock_session)
         )
 
-        result = await collection_services.get_active_collections()
+        async for _ in collection_services.iter_active_collections():
+            pass
 
-        mock_session.execute.assert_awaited()
+        stmt = mock_session.stream.await_args.args[0]
+        assert sorted(column.name for column in stmt.selected_columns) == [
+            "efs_id",
+            "start_date",
+            "url_blood",
+            "url_plasma",
+            "url_platelet",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_not_found(self, mocker, async_cm, stream_result):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.stream.return_value = stream_result()
+
+        mocker.patch(
+            "collector.services.collections.get_db", return_value=async_cm(mock_session)
+        )
+
+        result = [
+            batch async for batch in collection_services.iter_active_collections()
+        ]
+
+        mock_session.stream.assert_awaited()
         assert result == []
 
     @pytest.mark.asyncio
     async def test_exception(self, mocker, async_cm, mock_grp_col):
         mock_session = AsyncMock(spec=AsyncSession)
-        mock_session.execute.side_effect = Exception("error")
+        mock_session.stream.side_effect = Exception("error")
 
         mocker.patch(
             "collector.services.collections.get_db", return_value=async_cm(mock_session)
         )
         mock_log = mocker.patch.object(collection_services.logger, "error")
 
-        result = await collection_services.get_active_collections()
+        result = [
+            batch async for batch in collection_services.iter_active_collections()
+        ]
 
-        mock_session.execute.assert_awaited()
+        mock_session.stream.assert_awaited()
         mock_log.assert_called_once()
         assert result == []
 
@@ -238,6 +282,30 @@ class TestHandleCollection:
         mock_session.commit.assert_awaited()
         assert result == (collection_check.events, collection_check.snapshots)
 
+    @pytest.mark.asyncio
+    async def test_unchanged(self, mocker, async_cm, mock_grp_col):
+        mock_session = AsyncMock(spec=AsyncSession)
+
+        collection_input = mock_grp_col.schemas[0]
+        collection_input.efs_id = "foo"
+
+        collection_db = mock_grp_col.models[0]
+        collection_db.id = "1337"
+        collection_db.content_hash = collection_input.fingerprint()
+
+        mocker.patch(
+            "collector.services.collections.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch(
+            "collector.services.collections.get_collection", return_value=collection_db
+        )
+
+        result = await collection_services._handle_collection(collection_input)
+
+        mock_session.commit.assert_not_awaited()
+        assert result == (collection_input.events, collection_input.snapshots)
+        assert all(event.collection_group_id == "1337" for event in result[0])
+
     @pytest.mark.asyncio
     async def test_no_efs_id(self, mocker, async_cm, mock_grp_col):
         mocker.patch(
@@ -306,6 +374,22 @@ class TestHandleEvent:
         mock_session.commit.assert_awaited()
         assert result == mock_evt_col.models[0]
 
+    @pytest.mark.asyncio
+    async def test_unchanged(self, mocker, async_cm, mock_evt_col):
+        mock_session = AsyncMock(spec=AsyncSession)
+        event_db = mock_evt_col.models[0]
+        event_db.content_hash = mock_evt_col.schemas[0].fingerprint()
+
+        mocker.patch(
+            "collector.services.collections.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch("collector.services.collections.get_event", return_value=event_db)
+
+        result = await collection_services._handle_event(mock_evt_col.schemas[0])
+
+        mock_session.commit.assert_not_awaited()
+        assert result is None
+
     @pytest.mark.asyncio
     async def test_exception(self, mocker, async_cm, mock_evt_col):
         mock_session = AsyncMock(spec=AsyncSession)
@@ -340,6 +424,98 @@ class TestHandleSnapshot:
         mock_session.commit.assert_awaited()
         assert result
 
+    @pytest.mark.asyncio
+    async def test_delta_unchanged(self, mocker, async_cm, mock_snap_col):
+        mock_session = AsyncMock(spec=AsyncSession)
+        snapshot = mock_snap_col.schemas[0].model_copy(update={"collection_group_id": 42})
+        previous = snapshot.model_copy(update={"id": 7})
+
+        mocker.patch.object(collection_services.settings, "SNAPSHOT_MODE", "delta")
+        mocker.patch(
+            "collector.services.collections.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch(
+            "collector.services.collections._load_latest_snapshots",
+            return_value={42: previous},
+        )
+        mock_extend = mocker.patch("collector.services.collections._extend_snapshots")
+
+        result = await collection_services._handle_snapshot(snapshot)
+
+        mock_extend.assert_awaited_once_with(mock_session, [7])
+        mock_session.add.assert_not_called()
+        assert result is None
+
+    @pytest.mark.asyncio
+    async def test_delta_changed(self, mocker, async_cm, mock_snap_col):
+        mock_session = AsyncMock(spec=AsyncSession)
+        snapshot = mock_snap_col.schemas[0].model_copy(update={"collection_group_id": 42})
+        previous = snapshot.model_copy(update={"id": 7, "nb_places_restantes_st": -1})
+
+        mocker.patch.object(collection_services.settings, "SNAPSHOT_MODE", "delta")
+        mocker.patch(
+            "collector.services.collections.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch(
+            "collector.services.collections._load_latest_snapshots",
+            return_value={42: previous},
+        )
+
+        result = await collection_services._handle_snapshot(snapshot)
+
+        mock_session.add.assert_called_once()
+        assert result.valid_until == result.created_at
+
+
+class TestInsertSnapshots:
+    @pytest.fixture
+    def snapshots(self, mock_snap_col):
+        snapshot = mock_snap_col.schemas[0]
+        return [
+            snapshot.model_copy(update={"collection_group_id": 1}),
+            snapshot.model_copy(update={"collection_group_id": 2}),
+            snapshot.model_copy(update={"collection_group_id": 3}),
+        ]
+
+    def test_split_unchanged_snapshots(self, snapshots):
+        latest = {
+            1: snapshots[0].model_copy(update={"id": 10}),
+            2: snapshots[1].model_copy(update={"id": 20, "taux_remplissage": 0.01}),
+        }
+
+        unchanged, changed = collection_services._split_unchanged_snapshots(
+            snapshots, latest
+        )
+
+        assert unchanged == [10]
+        assert changed == snapshots[1:]
+
+    @pytest.mark.asyncio
+    async def test_full(self, mocker, snapshots):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mocker.patch.object(collection_services.settings, "SNAPSHOT_MODE", "full")
+
+        result = await collection_services._insert_snapshots(mock_session, snapshots)
+
+        mock_session.execute.assert_awaited_once()
+        assert result == 3
+
+    @pytest.mark.asyncio
+    async def test_delta(self, mocker, snapshots):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mocker.patch.object(collection_services.settings, "SNAPSHOT_MODE", "delta")
+        mocker.patch(
+            "collector.services.collections._load_latest_snapshots",
+            return_value={1: snapshots[0].model_copy(update={"id": 10})},
+        )
+        mock_extend = mocker.patch("collector.services.collections._extend_snapshots")
+
+        result = await collection_services._insert_snapshots(mock_session, snapshots)
+
+        mock_extend.assert_awaited_once_with(mock_session, [10])
+        mock_session.execute.assert_awaited_once()
+        assert result == 2
+
 
 class TestSaveLocationCollections:
     @pytest.mark.asyncio
@@ -383,6 +559,26 @@ class TestSaveLocationCollections:
 
         assert result == (1, 2, 1)
 
+    @pytest.mark.asyncio
+    async def test_unchanged_events(self, mocker, mock_loc_col, mock_grp_col, mock_evt_col, mock_snap_col):
+        mocker.patch(
+            "collector.services.collections._handle_location",
+            return_value=[mock_grp_col.schemas[0]],
+        )
+        mocker.patch(
+            "collector.services.collections._handle_collection",
+            return_value=([mock_evt_col.schemas[0]], [mock_snap_col.schemas[0]]),
+        )
+        # Neither the unchanged event nor the extended snapshot is written
+        mocker.patch("collector.services.collections._handle_event", return_value=None)
+        mocker.patch("collector.services.collections._handle_snapshot", return_value=None)
+
+        result = await collection_services.save_location_collections(
+            [mock_loc_col.schemas[0]]
+        )
+
+        assert result == (1, 0, 0)
+
     @pytest.mark.asyncio
     async def test_with_none_results(
         self,
@@ -398,3 +594,257 @@ class TestSaveLocationCollections:
         )
 
         assert result == (0, 0, 0)
+
+
+class TestResolveCollections:
+    @pytest.fixture
+    def _location(self, mock_loc_col, mock_grp_col):
+        location = mock_loc_col.schemas[0]
+        location.collections = mock_grp_col.schemas
+        for collection in location.collections:
+            collection.efs_id = "1337"
+        return location
+
+    def test_success(self, _location):
+        location_index = {location_key(_location): 101}
+        group_codes = {collection.group_code for collection in _location.collections}
+
+        result = collection_services._resolve_collections(
+            [_location], location_index, group_codes
+        )
+
+        assert len(result) == 1
+        assert result[0].location_id == 101
+
+    def test_location_not_found(self, mocker, _location):
+        mock_log = mocker.patch.object(collection_services.logger, "warning")
+
+        result = collection_services._resolve_collections([_location], {}, set())
+
+        mock_log.assert_called_once()
+        assert result == []
+
+    def test_no_efs_id(self, mocker, _location):
+        _location.collections[0].efs_id = None
+        location_index = {location_key(_location): 101}
+        mock_log = mocker.patch.object(collection_services.logger, "warning")
+
+        result = collection_services._resolve_collections(
+            [_location], location_index, {"F00006"}
+        )
+
+        mock_log.assert_called_once()
+        assert result == []
+
+    def test_unknown_group(self, mocker, _location):
+        location_index = {location_key(_location): 101}
+        mock_log = mocker.patch.object(collection_services.logger, "warning")
+
+        result = collection_services._resolve_collections(
+            [_location], location_index, {"F00004"}
+        )
+
+        mock_log.assert_called_once()
+        assert result == []
+
+    def test_duplicates(self, _location):
+        _location.collections = _location.collections * 3
+        location_index = {location_key(_location): 101}
+
+        result = collection_services._resolve_collections(
+            [_location], location_index, {"F00006"}
+        )
+
+        assert len(result) == 1
+
+
+class TestBulkSaveLocationCollections:
+    @pytest.fixture
+    def _location(self, mock_loc_col, mock_grp_col):
+        location = mock_loc_col.schemas[0]
+        location.collections = mock_grp_col.schemas
+        location.collections[0].efs_id = "1337"
+        return location
+
+    @pytest.mark.asyncio
+    async def test_success(self, mocker, async_cm, _location):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+        mock_session.begin_nested = MagicMock(return_value=async_cm(None))
+        mock_events = MagicMock()
+        mock_events.all.return_value = [(event.id,) for event in _location.collections[0].events]
+        mock_session.execute.side_effect = [
+            [],  # Collection groups content hashes
+            [(42, "1337")],  # Collection groups upsert
+            [],  # Events content hashes
+            mock_events,  # Events upsert
+            MagicMock(),  # Snapshots insert
+        ]
+
+        mocker.patch(
+            "collector.services.collections.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch(
+            "collector.services.collections.load_location_index",
+            return_value={location_key(_location): 101},
+        )
+        mocker.patch(
+            "collector.services.collections.get_group_codes", return_value={"F00006"}
+        )
+
+        result = await collection_services.bulk_save_location_collections([_location])
+
+        assert mock_session.execute.await_count == 5
+        assert result == (1, 3, 1)
+        assert all(event.collection_group_id == 42 for event in _location.collections[0].events)
+        assert _location.collections[0].snapshots[0].collection_group_id == 42
+
+    @pytest.mark.asyncio
+    async def test_unchanged(self, mocker, async_cm, _location):
+        collection = _location.collections[0]
+        collection.update_ids(42)
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+        mock_session.begin_nested = MagicMock(return_value=async_cm(None))
+        mock_session.execute.side_effect = [
+            [("1337", 42, collection.fingerprint())],  # Collection groups content hashes
+            [(event.id, event.id, event.fingerprint()) for event in collection.events],
+            MagicMock(),  # Snapshots insert
+        ]
+
+        mocker.patch(
+            "collector.services.collections.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch(
+            "collector.services.collections.load_location_index",
+            return_value={location_key(_location): 101},
+        )
+        mocker.patch(
+            "collector.services.collections.get_group_codes", return_value={"F00006"}
+        )
+
+        result = await collection_services.bulk_save_location_collections([_location])
+
+        # Only the snapshots are written
+        assert mock_session.execute.await_count == 3
+        assert result == (1, 0, 1)
+
+    @pytest.mark.asyncio
+    async def test_failed_batch(self, mocker, async_cm, _location):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+        mock_session.begin_nested = MagicMock(return_value=async_cm(None))
+        mock_events = MagicMock()
+        mock_events.all.return_value = [(event.id,) for event in _location.collections[0].events]
+        mock_session.execute.side_effect = [
+            [],  # Collection groups content hashes
+            [(42, "1337")],  # Collection groups upsert
+            [],  # Events content hashes
+            mock_events,  # Events upsert
+            Exception("error"),  # Snapshots insert
+        ]
+
+        mocker.patch(
+            "collector.services.collections.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch(
+            "collector.services.collections.load_location_index",
+            return_value={location_key(_location): 101},
+        )
+        mocker.patch(
+            "collector.services.collections.get_group_codes", return_value={"F00006"}
+        )
+        mock_log = mocker.patch.object(collection_services.logger, "error")
+
+        result = await collection_services.bulk_save_location_collections([_location])
+
+        # Only the rows of the failed batch are dropped
+        assert result == (1, 3, 0)
+        assert mock_session.begin_nested.call_count == 3
+        mock_log.assert_called_once()
+        assert mock_log.call_args.kwargs["extra"]["keys"] == [42]
+
+    @pytest.mark.asyncio
+    async def test_failed_events_batch(self, mocker, async_cm, _location):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+        mock_session.begin_nested = MagicMock(return_value=async_cm(None))
+        mock_session.execute.side_effect = [
+            [],  # Collection groups content hashes
+            [(42, "1337")],  # Collection groups upsert
+            [],  # Events content hashes
+            Exception("error"),  # Events upsert
+            MagicMock(),  # Snapshots insert
+        ]
+
+        mocker.patch(
+            "collector.services.collections.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch(
+            "collector.services.collections.load_location_index",
+            return_value={location_key(_location): 101},
+        )
+        mocker.patch(
+            "collector.services.collections.get_group_codes", return_value={"F00006"}
+        )
+        mocker.patch.object(collection_services.logger, "error")
+
+        result = await collection_services.bulk_save_location_collections([_location])
+
+        # The events of the dropped batch aren't counted as written
+        assert result == (1, 0, 1)
+
+    @pytest.mark.asyncio
+    async def test_nothing_to_save(self, mocker, async_cm, mock_loc_col):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+
+        mocker.patch(
+            "collector.services.collections.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch("collector.services.collections.load_location_index", return_value={})
+        mocker.patch("collector.services.collections.get_group_codes", return_value=set())
+
+        result = await collection_services.bulk_save_location_collections(
+            [mock_loc_col.schemas[0]]
+        )
+
+        mock_session.execute.assert_not_awaited()
+        assert result == (0, 0, 0)
+
+    @pytest.mark.asyncio
+    async def test_exception(self, mocker, async_cm, _location):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+        mock_session.execute.side_effect = Exception("error")
+
+        mocker.patch(
+            "collector.services.collections.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch(
+            "collector.services.collections.load_location_index",
+            return_value={location_key(_location): 101},
+        )
+        mocker.patch(
+            "collector.services.collections.get_group_codes", return_value={"F00006"}
+        )
+        mock_log = mocker.patch.object(collection_services.logger, "error")
+
+        result = await collection_services.bulk_save_location_collections([_location])
+
+        mock_log.assert_called_once()
+        assert result == (0, 0, 0)
+
+
+def test_fingerprint(mock_grp_col):
+    collection = mock_grp_col.schemas[0]
+    same = collection.model_copy(deep=True)
+    # Columns that aren't compared don't change the hash
+    same.id = 42
+    same.snapshots = []
+
+    assert collection.fingerprint() == same.fingerprint()
+
+    same.convocation_label_sms = "foo"
+
+    assert collection.fingerprint() != same.fingerprint()
@@ -0,0 +1,120 @@
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import collector.services.crawl_state as crawl_state_services
+from collector.models import CrawlStateModel
+from collector.schemas import CrawlStateSchema
+
+NOW = datetime(2026, 10, 18, 3, 30, tzinfo=UTC)
+
+
+class TestLoadCrawlStates:
+    @pytest.mark.asyncio
+    async def test_success(self, mocker, async_cm):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_results = MagicMock()
+        mock_results.scalars.return_value.all.return_value = [
+            CrawlStateModel(
+                url="https://efs.link/foo", etag='"abc"', crawled_at=NOW, next_crawl_at=NOW
+            )
+        ]
+        mock_session.execute.return_value = mock_results
+        mocker.patch(
+            "collector.services.crawl_state.get_db", return_value=async_cm(mock_session)
+        )
+
+        result = await crawl_state_services.load_crawl_states(
+            ["https://efs.link/foo", "https://efs.link/bar"]
+        )
+
+        assert result == {
+            "https://efs.link/foo": CrawlStateSchema(
+                url="https://efs.link/foo", etag='"abc"', crawled_at=NOW, next_crawl_at=NOW
+            )
+        }
+
+    @pytest.mark.asyncio
+    async def test_exception(self, mocker, async_cm):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.execute.side_effect = Exception("error")
+        mocker.patch(
+            "collector.services.crawl_state.get_db", return_value=async_cm(mock_session)
+        )
+        mock_log = mocker.patch.object(crawl_state_services.logger, "error")
+
+        result = await crawl_state_services.load_crawl_states(["https://efs.link/foo"])
+
+        mock_log.assert_called_once()
+        assert result == {}
+
+
+class TestLoadSlotStats:
+    @pytest.mark.asyncio
+    async def test_success(self, mocker, async_cm):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.execute.return_value = [("1", 0.25, False), ("2", None, True)]
+        mocker.patch(
+            "collector.services.crawl_state.get_db", return_value=async_cm(mock_session)
+        )
+
+        result = await crawl_state_services.load_slot_stats(["1", "2"], NOW)
+
+        assert result == {"1": (0.25, False), "2": (0.0, True)}
+        statement = str(
+            mock_session.execute.await_args.args[0].compile(dialect=postgresql.dialect())
+        )
+        assert "lag(schedules.total_slots) OVER (PARTITION BY schedules.event_id" in statement
+        assert "FILTER (WHERE anon_1.rank = " in statement
+
+    @pytest.mark.asyncio
+    async def test_exception(self, mocker, async_cm):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.execute.side_effect = Exception("error")
+        mocker.patch(
+            "collector.services.crawl_state.get_db", return_value=async_cm(mock_session)
+        )
+        mock_log = mocker.patch.object(crawl_state_services.logger, "error")
+
+        result = await crawl_state_services.load_slot_stats(["1"], NOW)
+
+        mock_log.assert_called_once()
+        assert result == {}
+
+
+class TestSaveCrawlStates:
+    @pytest.mark.asyncio
+    async def test_success(self, mocker, async_cm):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+        mocker.patch(
+            "collector.services.crawl_state.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch.object(crawl_state_services.settings, "DB_BATCH_SIZE", 1)
+        states = [
+            CrawlStateSchema(url=f"https://efs.link/{i}", crawled_at=NOW, next_crawl_at=NOW)
+            for i in range(3)
+        ]
+
+        await crawl_state_services.save_crawl_states(states)
+
+        assert mock_session.execute.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_exception(self, mocker, async_cm):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+        mock_session.execute.side_effect = Exception("error")
+        mocker.patch(
+            "collector.services.crawl_state.get_db", return_value=async_cm(mock_session)
+        )
+        mock_log = mocker.patch.object(crawl_state_services.logger, "error")
+
+        await crawl_state_services.save_crawl_states(
+            [CrawlStateSchema(url="https://efs.link/foo", crawled_at=NOW, next_crawl_at=NOW)]
+        )
+
+        mock_log.assert_called_once()
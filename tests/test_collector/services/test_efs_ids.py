@@ -0,0 +1,83 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import collector.services.efs_ids as efs_id_services
+
+
+class TestLoadEfsIdCache:
+    @pytest.mark.asyncio
+    async def test_success(self, mocker, async_cm):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.execute.side_effect = [
+            [("https://efs.link/foo", "1"), ("https://efs.link/bar", None)],
+            [
+                ("efs.link/baz", None, None, "2"),
+                (None, "https://efs.link/foo", None, "3"),
+                (None, None, None, "4"),
+            ],
+        ]
+
+        mocker.patch(
+            "collector.services.efs_ids.get_db", return_value=async_cm(mock_session)
+        )
+
+        result = await efs_id_services.load_efs_id_cache()
+
+        assert mock_session.execute.await_count == 2
+        assert result == {
+            "https://efs.link/foo": "1",
+            "https://efs.link/bar": None,
+            "https://efs.link/baz": "2",
+        }
+        # The URLs of the collection groups expire like the resolved ones
+        stmt = mock_session.execute.await_args_list[1].args[0]
+        assert "collection_groups.created_at >=" in str(stmt.whereclause)
+
+    @pytest.mark.asyncio
+    async def test_exception(self, mocker, async_cm):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.execute.side_effect = Exception("error")
+
+        mocker.patch(
+            "collector.services.efs_ids.get_db", return_value=async_cm(mock_session)
+        )
+        mock_log = mocker.patch.object(efs_id_services.logger, "error")
+
+        result = await efs_id_services.load_efs_id_cache()
+
+        mock_log.assert_called_once()
+        assert result == {}
+
+
+class TestSaveEfsIdCache:
+    @pytest.mark.asyncio
+    async def test_success(self, mocker, async_cm):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+
+        mocker.patch(
+            "collector.services.efs_ids.get_db", return_value=async_cm(mock_session)
+        )
+
+        await efs_id_services.save_efs_id_cache(
+            {"https://efs.link/foo": "1", "https://efs.link/bar": None}
+        )
+
+        mock_session.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_exception(self, mocker, async_cm):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+        mock_session.execute.side_effect = Exception("error")
+
+        mocker.patch(
+            "collector.services.efs_ids.get_db", return_value=async_cm(mock_session)
+        )
+        mock_log = mocker.patch.object(efs_id_services.logger, "error")
+
+        await efs_id_services.save_efs_id_cache({"https://efs.link/foo": "1"})
+
+        mock_log.assert_called_once()
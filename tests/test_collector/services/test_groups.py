@@ -9,21 +9,17 @@ from collector.schemas.group import GroupSchema
 
 
 @pytest.mark.asyncio
-async def test_load_groups(mocker, async_cm, mock_grp):
+async def test_load_groups(mocker, async_cm, stream_result, mock_grp):
     mock_session = AsyncMock(spec=AsyncSession)
-    mock_results = MagicMock()
-    mock_results.scalars.return_value.all.return_value = mock_grp.models
-    mock_session.execute.return_value = mock_results
+    mock_session.stream.return_value = stream_result(
+        mock_grp.models[:2], mock_grp.models[2:]
+    )
 
     mocker.patch("collector.services.groups.get_db", return_value=async_cm(mock_session))
-    mocker.patch(
-        "collector.services.locations.sqlalchemy_to_pydantic",
-        return_value=mock_grp.schemas,
-    )
 
     result = await group_services.load_groups()
 
-    mock_session.execute.assert_awaited()
+    mock_session.stream.assert_awaited()
     assert result == mock_grp.schemas
 
 
@@ -100,3 +96,16 @@ async def test_save_groups(mocker, async_cm, mock_grp):
     await group_services.save_groups(mock_grp.schemas)
 
     assert group_services.add_group.await_count == len(mock_grp.schemas)
+
+
+@pytest.mark.asyncio
+async def test_get_group_codes(mock_grp):
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_results = MagicMock()
+    mock_results.scalars.return_value.all.return_value = [g.gr_code for g in mock_grp.models]
+    mock_session.execute.return_value = mock_results
+
+    result = await group_services.get_group_codes(mock_session)
+
+    mock_session.execute.assert_awaited_once()
+    assert result == {g.gr_code for g in mock_grp.models}
@@ -9,26 +9,17 @@ from collector.schemas.location import LocationSchema
 
 
 @pytest.mark.asyncio
-async def test_load_locations(mocker, async_cm, mock_loc):
+async def test_load_locations(mocker, async_cm, stream_result, mock_loc):
     mock_session = AsyncMock(spec=AsyncSession)
-    mock_results = MagicMock()
-    mock_results.scalars.return_value.all.return_value = mock_loc.models
-    mock_session.execute.return_value = mock_results
+    mock_session.stream.return_value = stream_result(mock_loc.models)
 
     mocker.patch(
         "collector.services.locations.get_db", return_value=async_cm(mock_session)
     )
-    mocker.patch(
-        "collector.services.locations.sqlalchemy_to_pydantic",
-        return_value=mock_loc.schemas,
-    )
 
     result = await location_services.load_locations()
 
-    mock_session.execute.assert_awaited()
-    location_services.sqlalchemy_to_pydantic.assert_awaited_once_with(
-        mock_loc.models, LocationSchema
-    )
+    mock_session.stream.assert_awaited()
     assert result == mock_loc.schemas
 
 
@@ -190,3 +181,116 @@ async def test_save_locations_with_failures(mocker, mock_loc):
 
     assert result == mock_results
     assert result[1] is None  # Second location failed
+
+
+@pytest.mark.asyncio
+async def test_load_location_index(mock_loc):
+    location = mock_loc.schemas[0]
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.execute.return_value = [(101, *location_services.location_key(location))]
+
+    result = await location_services.load_location_index(mock_session)
+
+    mock_session.execute.assert_awaited_once()
+    assert result == {location_services.location_key(location): 101}
+
+
+class TestBulkSaveLocations:
+    @pytest.mark.asyncio
+    async def test_success(self, mocker, async_cm, mock_loc):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+        mock_results = MagicMock()
+        mock_results.scalars.return_value.all.return_value = [1, 2, 3]
+        mock_session.execute.return_value = mock_results
+
+        mocker.patch(
+            "collector.services.locations.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch(
+            "collector.services.locations.get_group_codes",
+            return_value={location.group_code for location in mock_loc.schemas},
+        )
+        mocker.patch(
+            "collector.services.locations.load_location_index",
+            return_value={location_services.location_key(mock_loc.schemas[0]): 1},
+        )
+
+        result = await location_services.bulk_save_locations(mock_loc.schemas)
+
+        mock_session.execute.assert_awaited_once()
+        assert result == [1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_without_name_saved_twice(self, mocker, async_cm, mock_loc):
+        location = mock_loc.schemas[0].model_copy(update={"name": None})
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+        mock_results = MagicMock()
+        mock_results.scalars.return_value.all.return_value = [7]
+        mock_session.execute.return_value = mock_results
+
+        mocker.patch(
+            "collector.services.locations.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch(
+            "collector.services.locations.get_group_codes",
+            return_value={location.group_code},
+        )
+        mocker.patch(
+            "collector.services.locations.load_location_index",
+            side_effect=[{}, {location_services.location_key(location): 7}],
+        )
+
+        first = await location_services.bulk_save_locations([location])
+        insert_stmt = mock_session.execute.await_args.args[0]
+        mock_session.execute.reset_mock()
+        second = await location_services.bulk_save_locations([location])
+
+        # Inserted without ON CONFLICT, then updated by id instead of inserted again
+        assert first == [7]
+        assert insert_stmt._post_values_clause is None
+        mock_session.execute.assert_awaited_once()
+        update_stmt, update_rows = mock_session.execute.await_args.args
+        assert update_stmt.is_update
+        assert [(row["id"], row["name"]) for row in update_rows] == [(7, None)]
+        assert second == [7]
+
+    @pytest.mark.asyncio
+    async def test_group_not_exists(self, mocker, async_cm, mock_loc):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+
+        mocker.patch(
+            "collector.services.locations.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch("collector.services.locations.get_group_codes", return_value=set())
+        mocker.patch("collector.services.locations.load_location_index", return_value={})
+        mock_log = mocker.patch.object(location_services.logger, "warning")
+
+        result = await location_services.bulk_save_locations(mock_loc.schemas)
+
+        assert mock_log.call_count == len(mock_loc.schemas)
+        mock_session.execute.assert_not_awaited()
+        assert result == []
+
+    @pytest.mark.asyncio
+    async def test_exception(self, mocker, async_cm, mock_loc):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+        mock_session.execute.side_effect = Exception("error")
+
+        mocker.patch(
+            "collector.services.locations.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch(
+            "collector.services.locations.get_group_codes",
+            return_value={location.group_code for location in mock_loc.schemas},
+        )
+        mocker.patch("collector.services.locations.load_location_index", return_value={})
+        mock_log = mocker.patch.object(location_services.logger, "error")
+
+        result = await location_services.bulk_save_locations(mock_loc.schemas)
+
+        mock_log.assert_called_once()
+        assert result == []
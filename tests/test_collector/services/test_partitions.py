@@ -0,0 +1,158 @@
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import collector.services.partitions as partition_services
+
+
+def test_month_start():
+    assert partition_services.month_start(date(2026, 10, 18)) == date(2026, 10, 1)
+    assert partition_services.month_start(date(2026, 11, 30), 2) == date(2027, 1, 1)
+    assert partition_services.month_start(date(2026, 1, 5), -13) == date(2024, 12, 1)
+
+
+def test_partition_name():
+    name = partition_services.partition_name("schedules", date(2026, 3, 1))
+
+    assert name == "schedules_p2026_03"
+
+
+@pytest.mark.asyncio
+async def test_list_partitions():
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_results = MagicMock()
+    mock_results.scalars.return_value.all.return_value = [
+        "schedules_p2026_09",
+        "schedules_default",
+    ]
+    mock_session.execute.return_value = mock_results
+
+    result = await partition_services.list_partitions(mock_session, "schedules")
+
+    assert result == {"schedules_p2026_09": date(2026, 9, 1), "schedules_default": None}
+
+
+@pytest.mark.asyncio
+async def test_create_partitions(mocker):
+    mock_session = AsyncMock(spec=AsyncSession)
+    mocker.patch(
+        "collector.services.partitions.list_partitions",
+        return_value={"schedules_p2026_10": date(2026, 10, 1)},
+    )
+
+    result = await partition_services.create_partitions(
+        mock_session, "schedules", date(2026, 10, 18), date(2026, 12, 1)
+    )
+
+    assert result == ["schedules_p2026_11", "schedules_p2026_12"]
+    statement = str(mock_session.execute.await_args_list[0].args[0])
+    assert "FOR VALUES FROM ('2026-11-01') TO ('2026-12-01')" in statement
+
+
+@pytest.mark.asyncio
+async def test_create_partitions_with_default_rows(mocker):
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_results = MagicMock()
+    # The default partition holds rows of November only
+    mock_results.scalar.side_effect = [True, False]
+    mock_session.execute.return_value = mock_results
+    mocker.patch(
+        "collector.services.partitions.list_partitions",
+        return_value={"schedules_p2026_10": date(2026, 10, 1), "schedules_default": None},
+    )
+
+    result = await partition_services.create_partitions(
+        mock_session, "schedules", date(2026, 10, 18), date(2026, 12, 1)
+    )
+
+    assert result == ["schedules_p2026_11", "schedules_p2026_12"]
+    statements = [str(c.args[0]).split(" WHERE ")[0] for c in mock_session.execute.await_args_list]
+    assert statements == [
+        "SELECT EXISTS (SELECT 1 FROM schedules_default",
+        "ALTER TABLE schedules DETACH PARTITION schedules_default",
+        "CREATE TABLE schedules_p2026_11 PARTITION OF schedules "
+        "FOR VALUES FROM ('2026-11-01') TO ('2026-12-01')",
+        "INSERT INTO schedules_p2026_11 SELECT * FROM schedules_default",
+        "DELETE FROM schedules_default",
+        "ALTER TABLE schedules ATTACH PARTITION schedules_default DEFAULT",
+        "SELECT EXISTS (SELECT 1 FROM schedules_default",
+        "CREATE TABLE schedules_p2026_12 PARTITION OF schedules "
+        "FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')",
+    ]
+    bounds = mock_session.execute.await_args_list[3].args[1]
+    assert bounds == {"start": date(2026, 11, 1), "end": date(2026, 12, 1)}
+
+
+@pytest.mark.asyncio
+async def test_expire_partitions(mocker):
+    mock_session = AsyncMock(spec=AsyncSession)
+    mocker.patch(
+        "collector.services.partitions.list_partitions",
+        return_value={
+            "schedules_p2026_07": date(2026, 7, 1),
+            "schedules_p2026_08": date(2026, 8, 1),
+            "schedules_p2026_09": date(2026, 9, 1),
+            "schedules_default": None,
+        },
+    )
+
+    result = await partition_services.expire_partitions(
+        mock_session, "schedules", date(2026, 8, 1), "drop"
+    )
+
+    assert result == ["schedules_p2026_07"]
+    statements = [str(c.args[0]) for c in mock_session.execute.await_args_list]
+    assert statements == [
+        "ALTER TABLE schedules DETACH PARTITION schedules_p2026_07",
+        "DROP TABLE schedules_p2026_07",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_maintain_partitions(mocker, async_cm):
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.begin = MagicMock(return_value=async_cm(None))
+    mocker.patch(
+        "collector.services.partitions.get_db", return_value=async_cm(mock_session)
+    )
+    mocker.patch.object(partition_services.settings, "SNAPSHOTS_RETENTION_MONTHS", 12)
+    mocker.patch.object(partition_services.settings, "SCHEDULES_RETENTION_MONTHS", None)
+    mock_create = mocker.patch(
+        "collector.services.partitions.create_partitions", return_value=["foo"]
+    )
+    mock_expire = mocker.patch(
+        "collector.services.partitions.expire_partitions", return_value=["bar"]
+    )
+
+    result = await partition_services.maintain_partitions()
+
+    assert mock_create.await_count == 2
+    cutoff = partition_services.month_start(date.today(), -12)
+    mock_expire.assert_awaited_once_with(
+        mock_session, "collection_group_snapshots", cutoff, "detach"
+    )
+    assert result == {
+        "collection_group_snapshots": {"created": ["foo"], "expired": ["bar"]},
+        "schedules": {"created": ["foo"], "expired": []},
+    }
+
+
+@pytest.mark.asyncio
+async def test_maintain_partitions_exception(mocker, async_cm):
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.begin = MagicMock(return_value=async_cm(None))
+    mocker.patch(
+        "collector.services.partitions.get_db", return_value=async_cm(mock_session)
+    )
+    mocker.patch(
+        "collector.services.partitions.create_partitions",
+        side_effect=Exception("error"),
+    )
+    mock_log = mocker.patch.object(partition_services.logger, "error")
+
+    result = await partition_services.maintain_partitions()
+
+    mock_log.assert_called_once()
+    assert result == {}
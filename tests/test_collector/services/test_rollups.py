@@ -0,0 +1,137 @@
+from datetime import UTC, date, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import collector.services.rollups as rollup_services
+
+
+@pytest.mark.asyncio
+async def test_refresh_rollup(mocker, async_cm):
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.begin = MagicMock(return_value=async_cm(None))
+    mock_last_day = MagicMock()
+    mock_last_day.scalar.return_value = date(2026, 10, 17)
+    mock_session.execute.side_effect = [mock_last_day, MagicMock(rowcount=12)]
+    mocker.patch(
+        "collector.services.rollups.get_db", return_value=async_cm(mock_session)
+    )
+
+    result = await rollup_services.refresh_rollup("schedule_daily_stats")
+
+    assert result is True
+    assert str(mock_session.execute.await_args_list[0].args[0]) == "SELECT MAX(day) FROM schedule_daily_stats"
+    # The last day is recomputed, it may have been rolled up before its last schedules
+    statement, params = mock_session.execute.await_args_list[1].args
+    assert "INSERT INTO schedule_daily_stats" in str(statement)
+    assert "ON CONFLICT (event_id, day) DO UPDATE" in str(statement)
+    assert params == {"since": date(2026, 10, 17)}
+
+
+@pytest.mark.asyncio
+async def test_refresh_rollup_empty(mocker, async_cm):
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.begin = MagicMock(return_value=async_cm(None))
+    mock_last_day = MagicMock()
+    mock_last_day.scalar.return_value = None
+    mock_session.execute.side_effect = [mock_last_day, MagicMock(rowcount=0)]
+    mocker.patch(
+        "collector.services.rollups.get_db", return_value=async_cm(mock_session)
+    )
+
+    result = await rollup_services.refresh_rollup("collection_group_daily_stats")
+
+    # The first refresh computes every day
+    assert result is True
+    assert mock_session.execute.await_args_list[1].args[1] == {"since": date.min}
+
+
+@pytest.mark.asyncio
+async def test_refresh_rollup_twice(mocker, async_cm, pg_connection):
+    # Temporary tables shadowing the snapshots and the rollup
+    await pg_connection.execute(text("SET LOCAL TIME ZONE 'UTC'"))
+    await pg_connection.execute(text("""
+        CREATE TEMPORARY TABLE collection_group_snapshots (
+            id integer, taux_remplissage float, nb_places_restantes_st integer, nb_places_totales_st integer,
+            nb_places_reservees_st integer, nb_places_restantes_pla integer, nb_places_totales_pla integer,
+            nb_places_reservees_pla integer, nb_places_restantes_cpa integer, nb_places_totales_cpa integer,
+            nb_places_reservees_cpa integer, created_at timestamptz, valid_until timestamptz,
+            collection_group_id integer
+        )
+    """))
+    await pg_connection.execute(text("""
+        CREATE TEMPORARY TABLE collection_group_daily_stats (
+            collection_group_id integer, day date, taux_remplissage float, nb_places_restantes_st integer,
+            nb_places_totales_st integer, nb_places_reservees_st integer, min_places_restantes_st integer,
+            max_places_restantes_st integer, min_places_restantes_pla integer, max_places_restantes_pla integer,
+            min_places_restantes_cpa integer, max_places_restantes_cpa integer, n_snapshots integer,
+            last_snapshot_at timestamptz, PRIMARY KEY (collection_group_id, day)
+        )
+    """))
+    session = AsyncSession(bind=pg_connection, join_transaction_mode="create_savepoint")
+    mocker.patch(
+        "collector.services.rollups.get_db", side_effect=lambda: async_cm(session)
+    )
+    # Run on day 1, unchanged on day 2
+    await pg_connection.execute(text("""
+        INSERT INTO collection_group_snapshots
+            (id, collection_group_id, nb_places_restantes_st, created_at, valid_until)
+        VALUES (1, 1, 5, '2026-10-01 10:00+00', '2026-10-02 08:00+00')
+    """))
+
+    assert await rollup_services.refresh_rollup("collection_group_daily_stats") is True
+
+    # Unchanged on day 3, changed on day 4. The value of the first snapshot is changed too, only the days from the
+    # last one rolled up (day 2) see it
+    await pg_connection.execute(text("""
+        UPDATE collection_group_snapshots SET nb_places_restantes_st = 7, valid_until = '2026-10-03 09:00+00'
+        WHERE id = 1
+    """))
+    await pg_connection.execute(text("""
+        INSERT INTO collection_group_snapshots (id, collection_group_id, nb_places_restantes_st, created_at)
+        VALUES (2, 1, 3, '2026-10-04 10:00+00')
+    """))
+
+    assert await rollup_services.refresh_rollup("collection_group_daily_stats") is True
+
+    result = await pg_connection.execute(text("""
+        SELECT day, nb_places_restantes_st, n_snapshots, last_snapshot_at
+        FROM collection_group_daily_stats
+        ORDER BY day
+    """))
+    assert result.all() == [
+        (date(2026, 10, 1), 5, 1, datetime(2026, 10, 1, 10, tzinfo=UTC)),
+        (date(2026, 10, 2), 7, 1, datetime(2026, 10, 2, 10, tzinfo=UTC)),
+        (date(2026, 10, 3), 7, 1, datetime(2026, 10, 3, 9, tzinfo=UTC)),
+        (date(2026, 10, 4), 3, 1, datetime(2026, 10, 4, 10, tzinfo=UTC)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_refresh_rollup_exception(mocker, async_cm):
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.begin = MagicMock(return_value=async_cm(None))
+    mock_session.execute.side_effect = Exception("error")
+    mocker.patch(
+        "collector.services.rollups.get_db", return_value=async_cm(mock_session)
+    )
+    mock_log = mocker.patch.object(rollup_services.logger, "error")
+
+    result = await rollup_services.refresh_rollup("schedule_daily_stats")
+
+    assert result is False
+    mock_log.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_refresh_rollups(mocker):
+    mocker.patch(
+        "collector.services.rollups.refresh_rollup",
+        side_effect=lambda view: view == "collection_group_daily_stats",
+    )
+
+    result = await rollup_services.refresh_rollups()
+
+    assert result == ["collection_group_daily_stats"]
@@ -166,3 +166,71 @@ class TestAddSchedule:
         mock_session.refresh.assert_not_called()
         mock_log.assert_called_once()
         assert result is None
+
+
+class TestBulkAddSchedules:
+    @pytest.mark.asyncio
+    async def test_success(self, mocker, async_cm, mock_sch):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+
+        mocker.patch(
+            "collector.services.schedules.get_db", return_value=async_cm(mock_session)
+        )
+        mocker.patch.object(schedule_services.settings, "DB_BATCH_SIZE", 2)
+
+        result = await schedule_services.bulk_add_schedules(mock_sch.schemas)
+
+        n_batches = (len(mock_sch.schemas) + 1) // 2
+        assert mock_session.execute.await_count == n_batches
+        assert result == len(mock_sch.schemas)
+
+    @pytest.mark.asyncio
+    async def test_exception(self, mocker, async_cm, mock_sch):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.begin = MagicMock(return_value=async_cm(None))
+        mock_session.execute.side_effect = Exception("error")
+
+        mocker.patch(
+            "collector.services.schedules.get_db", return_value=async_cm(mock_session)
+        )
+        mock_log = mocker.patch.object(schedule_services.logger, "error")
+
+        result = await schedule_services.bulk_add_schedules(mock_sch.schemas)
+
+        mock_log.assert_called_once()
+        assert result == 0
+
+
+class TestLoadEventsIndex:
+    @pytest.mark.asyncio
+    async def test_success(self, mocker, async_cm, mock_evt_col):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.execute.return_value = [("1337", event) for event in mock_evt_col.models]
+
+        mocker.patch(
+            "collector.services.schedules.get_db", return_value=async_cm(mock_session)
+        )
+
+        result = await schedule_services.load_events_index({"1337"})
+
+        mock_session.execute.assert_awaited_once()
+        assert sum(len(events) for events in result.values()) == len(mock_evt_col.models)
+        for (efs_id, date), events in result.items():
+            assert efs_id == "1337"
+            assert all(event.date.date() == date for event in events)
+
+    @pytest.mark.asyncio
+    async def test_exception(self, mocker, async_cm):
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.execute.side_effect = Exception("error")
+
+        mocker.patch(
+            "collector.services.schedules.get_db", return_value=async_cm(mock_session)
+        )
+        mock_log = mocker.patch.object(schedule_services.logger, "error")
+
+        result = await schedule_services.load_events_index({"1337"})
+
+        mock_log.assert_called_once()
+        assert result is None
@@ -1,11 +1,19 @@
+from unittest.mock import AsyncMock
+
+import httpx
 import pytest
+from api_carto_client import Client
+from api_carto_client.api.sampling_location import (
+    get_carto_api_v3_samplinglocation_getgroupements as api_get_groupements,
+)
 from api_carto_client.models.ping import Ping
 from pydantic import BaseModel as PydanticBaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import collector.services.utils as utils_services
 from collector.models import GroupModel
 from collector.models.base import Base as SQLAlchemyBaseModel
-from collector.schemas import GroupSchema
+from collector.schemas import GroupsAdapter, GroupSchema
 
 
 @pytest.mark.asyncio
@@ -60,6 +68,86 @@ async def test_api_to_pydantic(mock_grp):
     assert result == mock_grp.schemas
 
 
+def json_client(status_code: int, body, requests: list | None = None) -> Client:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if requests is not None:
+            requests.append(request)
+        return httpx.Response(status_code, json=body)
+
+    return Client(
+        base_url="https://api.test", httpx_args={"transport": httpx.MockTransport(handler)}
+    )
+
+
+@pytest.mark.asyncio
+async def test_api_json_to_pydantic(mock_grp):
+    requests = []
+    client = json_client(200, [group.to_dict() for group in mock_grp.api], requests)
+
+    result = await utils_services.api_json_to_pydantic(
+        client, api_get_groupements, GroupsAdapter, region_code="016"
+    )
+
+    assert result == mock_grp.schemas
+    assert requests[0].url.path == "/carto-api/v3/samplinglocation/getgroupements"
+    assert requests[0].url.params["RegionCode"] == "016"
+
+
+@pytest.mark.asyncio
+async def test_api_json_to_pydantic_error(mocker):
+    client = json_client(500, None)
+    mock_log = mocker.patch.object(utils_services.logger, "warning")
+
+    result = await utils_services.api_json_to_pydantic(
+        client, api_get_groupements, GroupsAdapter, region_code="016"
+    )
+
+    mock_log.assert_called_once()
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_api_call(mocker, mock_grp):
+    mock_api_get_groupements = mocker.patch.object(
+        api_get_groupements, "asyncio", return_value=mock_grp.api
+    )
+    client = json_client(500, None)
+
+    result = await utils_services.api_call(client, api_get_groupements, region_code="016")
+
+    mock_api_get_groupements.assert_awaited_with(client=client, region_code="016")
+    assert result == mock_grp.api
+
+
+@pytest.mark.asyncio
+async def test_api_call_msgspec(mocker, mock_grp):
+    mocker.patch.object(utils_services.settings, "API_MSGSPEC", True)
+    client = json_client(200, [group.to_dict() for group in mock_grp.api])
+
+    result = await utils_services.api_call(client, api_get_groupements, region_code="016")
+
+    assert [group.gr_code for group in result] == [group.gr_code for group in mock_grp.api]
+    assert [group.to_dict() for group in result] == [
+        group.to_dict() for group in mock_grp.api
+    ]
+
+
+@pytest.mark.asyncio
+async def test_api_call_msgspec_rejected(mocker, mock_grp):
+    mocker.patch.object(utils_services.settings, "API_MSGSPEC", True)
+    mock_api_get_groupements = mocker.patch.object(
+        api_get_groupements, "asyncio", return_value=mock_grp.api
+    )
+    mock_log = mocker.patch.object(utils_services.logger, "warning")
+    client = json_client(200, [{"grCode": 42}])
+
+    result = await utils_services.api_call(client, api_get_groupements, region_code="016")
+
+    mock_log.assert_called_once()
+    mock_api_get_groupements.assert_awaited_once_with(client=client, region_code="016")
+    assert result == mock_grp.api
+
+
 @pytest.mark.asyncio
 async def test_pydantic_to_sqlalchemy(mock_grp):
     pydantic_schemas = mock_grp.schemas
@@ -79,6 +167,33 @@ async def test_sqlalchemy_to_pydantic(mock_grp):
     assert result == mock_grp.schemas
 
 
+def test_select_columns():
+    stmt = utils_services.select_columns(GroupModel, GroupSchema)
+
+    assert [column.name for column in stmt.selected_columns] == [
+        "gr_code",
+        "gr_lib",
+        "gr_desd",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_pydantic(stream_result, mock_grp):
+    session = AsyncMock(spec=AsyncSession)
+    session.stream.return_value = stream_result(mock_grp.models[:2], mock_grp.models[2:])
+    stmt = utils_services.select_columns(GroupModel, GroupSchema)
+
+    batches = [
+        batch
+        async for batch in utils_services.stream_pydantic(
+            session, stmt, GroupSchema, batch_size=2
+        )
+    ]
+
+    assert batches == [mock_grp.schemas[:2], mock_grp.schemas[2:]]
+    assert session.stream.await_args.args[0].get_execution_options()["yield_per"] == 2
+
+
 @pytest.mark.asyncio
 async def test_api_to_pydantic_empty_list():
     api_models = []
@@ -1,11 +1,14 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock
+import httpx
 import pytest
 from aioresponses import aioresponses
+from api_carto_client import Client
 from api_carto_client.models.sampling_collection_result import SamplingCollectionResult
 from pytest_mock import MockerFixture
 
 import collector.tasks.collections as tasks_collections
-from collector.schemas import CollectionGroupSchema
+from collector.schemas import CollectionGroupSchema, LocationSchema
 
 
 class TestRetrieveSamplingCollections:
@@ -47,10 +50,190 @@ class TestRetrieveSamplingCollections:
         assert result == []
 
 
+class TestRetrieveTileCollections:
+    @pytest.mark.asyncio
+    async def test_success(self, mocker, mock_loc_col):
+        mock_result = SamplingCollectionResult(
+            sampling_location_collections=mock_loc_col.api
+        )
+        mock_api_search_square = mocker.patch(
+            "collector.tasks.collections.api_search_square.asyncio",
+            return_value=mock_result,
+        )
+
+        result = await tasks_collections._retrieve_tile_collections((47, -5, 49, -1))
+
+        mock_api_search_square.assert_awaited_with(
+            client=mocker.ANY,
+            north_east_latitude=49,
+            north_east_longitude=-1,
+            south_west_latitude=47,
+            south_west_longitude=-5,
+            limit=tasks_collections.settings.TILE_LIMIT,
+            user_latitude=48,
+            user_longitude=-3,
+            max_date=mocker.ANY,
+        )
+        assert result == mock_loc_col.api
+
+    @pytest.mark.asyncio
+    async def test_not_found(self, mocker):
+        mocker.patch(
+            "collector.tasks.collections.api_search_square.asyncio", return_value=None
+        )
+
+        result = await tasks_collections._retrieve_tile_collections((47, -5, 49, -1))
+
+        assert result == []
+
+    @pytest.mark.asyncio
+    async def test_raw_json(self, mocker, mock_loc_col):
+        body = SamplingCollectionResult(
+            sampling_location_collections=mock_loc_col.api
+        ).to_dict()
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json=body))
+        client = Client(base_url="https://api.test", httpx_args={"transport": transport})
+        mocker.patch("collector.services.utils.get_api_client", return_value=client)
+        mocker.patch.object(tasks_collections.settings, "API_RAW_JSON", True)
+        mock_api_search_square = mocker.patch(
+            "collector.tasks.collections.api_search_square.asyncio"
+        )
+
+        result = await tasks_collections._retrieve_tile_collections((47, -5, 49, -1))
+
+        # Same schemas as the generated models converted by `update_collections`
+        mock_api_search_square.assert_not_called()
+        assert result == [LocationSchema(**entity.to_dict()) for entity in mock_loc_col.api]
+        assert tasks_collections._location_data(result[0]) is result[0]
+
+
+class TestRetrieveTiledCollections:
+    def test_split_tile(self):
+        tiles = tasks_collections._split_tile((0, 0, 2, 4))
+
+        assert tiles == [(0, 0, 1, 2), (0, 2, 1, 4), (1, 0, 2, 2), (1, 2, 2, 4)]
+
+    @pytest.mark.asyncio
+    async def test_under_limit(self, mocker, mock_loc_col):
+        mocker.patch.object(tasks_collections.settings, "TILE_LIMIT", 10)
+        mock_retrieve = mocker.patch(
+            "collector.tasks.collections._retrieve_tile_collections",
+            return_value=mock_loc_col.api,
+        )
+
+        result = await tasks_collections._retrieve_tiled_collections((0, 0, 2, 2))
+
+        mock_retrieve.assert_awaited_once_with((0, 0, 2, 2))
+        assert result == mock_loc_col.api
+
+    @pytest.mark.asyncio
+    async def test_split_when_limit_reached(self, mocker, mock_loc_col):
+        mocker.patch.object(tasks_collections.settings, "TILE_LIMIT", 3)
+        # The full tile is truncated, each quarter holds one location or none
+        mock_retrieve = mocker.patch(
+            "collector.tasks.collections._retrieve_tile_collections",
+            side_effect=[mock_loc_col.api, *[[loc] for loc in mock_loc_col.api], []],
+        )
+
+        result = await tasks_collections._retrieve_tiled_collections((0, 0, 2, 2))
+
+        assert mock_retrieve.await_count == 5
+        assert result == mock_loc_col.api
+
+    @pytest.mark.asyncio
+    async def test_max_depth(self, mocker, mock_loc_col):
+        mocker.patch.object(tasks_collections.settings, "TILE_LIMIT", 3)
+        mocker.patch.object(tasks_collections.settings, "TILE_MAX_DEPTH", 0)
+        mocker.patch(
+            "collector.tasks.collections._retrieve_tile_collections",
+            return_value=mock_loc_col.api,
+        )
+        mock_log = mocker.patch.object(tasks_collections.logger, "warning")
+
+        result = await tasks_collections._retrieve_tiled_collections((0, 0, 2, 2))
+
+        mock_log.assert_called_once()
+        assert result == mock_loc_col.api
+
+    @pytest.mark.asyncio
+    async def test_failed_tile(self, mocker, mock_loc_col):
+        mocker.patch.object(tasks_collections.settings, "TILE_LIMIT", 3)
+        # One quarter fails, the locations of the other ones are kept
+        mocker.patch(
+            "collector.tasks.collections._retrieve_tile_collections",
+            side_effect=[mock_loc_col.api, Exception("error"), *[[loc] for loc in mock_loc_col.api[1:]], []],
+        )
+        mock_log = mocker.patch.object(tasks_collections.logger, "error")
+
+        result = await tasks_collections._retrieve_tiled_collections((0, 0, 2, 2))
+
+        mock_log.assert_called_once()
+        assert result == mock_loc_col.api[1:]
+
+
+    @pytest.mark.asyncio
+    async def test_get_tiled_collections_locations(self, mocker, mock_loc_col):
+        mocker.patch.object(tasks_collections.settings, "COLLECTIONS_FETCH", "tiles")
+        mocker.patch("collector.tasks.collections.check_api", return_value=True)
+        mock_retrieve = mocker.patch(
+            "collector.tasks.collections._retrieve_tiled_collections",
+            return_value=mock_loc_col.api * 2,
+        )
+        mock_get_postal_codes = mocker.patch(
+            "collector.tasks.collections.get_postal_codes"
+        )
+
+        result = await tasks_collections._get_collections_locations()
+
+        mock_retrieve.assert_awaited_once()
+        mock_get_postal_codes.assert_not_called()
+        assert result == [entity.to_dict() for entity in mock_loc_col.api * 2]
+
+
+class TestDedupeLocations:
+    def test_no_duplicates(self, mock_loc_col):
+        result = tasks_collections._dedupe_locations(mock_loc_col.schemas)
+
+        assert result == mock_loc_col.schemas
+
+    def test_duplicated_locations(self, mock_loc_col):
+        # Overlapping searches return the same location and collections twice
+        duplicates = [loc.model_copy(deep=True) for loc in mock_loc_col.schemas]
+
+        result = tasks_collections._dedupe_locations(mock_loc_col.schemas + duplicates)
+
+        assert len(result) == len(mock_loc_col.schemas)
+        assert [len(loc.collections) for loc in result] == [1, 1, 1]
+
+    def test_merge_collections(self, mock_loc_col):
+        location = mock_loc_col.schemas[0]
+        collection = location.collections[0]
+        other_collection = mock_loc_col.schemas[1].collections[0]
+        duplicate = location.model_copy(
+            update={"collections": [other_collection, collection]}
+        )
+
+        result = tasks_collections._dedupe_locations([location, duplicate])
+
+        assert len(result) == 1
+        assert result[0].collections == [collection, other_collection]
+
+    def test_collections_without_id(self, mock_loc_col):
+        location = mock_loc_col.schemas[0]
+        collection = location.collections[0].model_copy(update={"id": None})
+        duplicate = location.model_copy(update={"collections": [collection, collection]})
+
+        result = tasks_collections._dedupe_locations([duplicate])
+
+        # Collections without id are identified by their URL
+        assert result[0].collections == [collection]
+
+
 class TestGetCollectionsLocations:
     @pytest.mark.asyncio
     async def test_success(self, mocker: MockerFixture, mock_loc, mock_loc_col):
         mocker.patch("collector.tasks.collections.check_api", return_value=True)
+        mocker.patch.object(tasks_collections.settings, "COLLECTIONS_FETCH", "postcode")
         mock_get_postal_codes = mocker.patch(
             "collector.tasks.collections.get_postal_codes",
             return_value=["35000", "42000"],
@@ -97,19 +280,47 @@ class TestHandleLocation:
 
 
 class TestTransformLocationCollections:
-    @pytest.mark.asyncio
-    async def test_success(self, mock_loc_col, mock_col):
+    def test_success(self, mock_loc_col, mock_col):
         location = mock_loc_col.schemas[0]
 
-        await tasks_collections._transform_location_collections(location)
+        tasks_collections._transform_locations_collections([location])
 
         for collection in location.collections:
             assert isinstance(collection, CollectionGroupSchema)
 
+    def test_several_locations(self, mock_loc_col):
+        locations = mock_loc_col.schemas
+        expected = [
+            [collection.as_group(from_db=False) for collection in location.collections if collection]
+            for location in locations
+        ]
+
+        tasks_collections._transform_locations_collections(locations)
+
+        assert [location.collections for location in locations] == expected
+
+    def test_same_groups_as_as_group(self, mocker, mock_loc_col):
+        mocker.patch("collector.schemas.collection.TRANSFORM_CHUNK", 2)
+        collections = [
+            collection
+            for location in mock_loc_col.schemas
+            for collection in location.collections
+            if collection.id is not None
+        ]
+        location = mock_loc_col.schemas[0]
+        location.collections = [*collections, None]
+
+        tasks_collections._transform_locations_collections([location])
+
+        assert location.collections == [
+            collection.as_group(from_db=False) for collection in collections
+        ]
+
 
 class TestUpdateCollections:
     @pytest.mark.asyncio
     async def test_success(self, mocker, mock_loc):
+        mocker.patch.object(tasks_collections.settings, "DB_BULK_WRITES", True)
         mock_locations = [schema.model_dump() for schema in mock_loc.schemas[:2]]
 
         mock_get_collections_locations = mocker.patch(
@@ -119,11 +330,11 @@ class TestUpdateCollections:
         mock_handle_location = mocker.patch(
             "collector.tasks.collections._handle_location"
         )
-        mock_transform_location_collections = mocker.patch(
-            "collector.tasks.collections._transform_location_collections"
+        mock_transform_locations_collections = mocker.patch(
+            "collector.tasks.collections._transform_locations_collections"
         )
         mock_save_location_collections = mocker.patch(
-            "collector.tasks.collections.save_location_collections",
+            "collector.tasks.collections.bulk_save_location_collections",
             return_value=(10, 5, 3),
         )
 
@@ -131,7 +342,7 @@ class TestUpdateCollections:
 
         mock_get_collections_locations.assert_awaited()
         assert mock_handle_location.call_count == len(mock_locations)
-        assert mock_transform_location_collections.call_count == len(mock_locations)
+        mock_transform_locations_collections.assert_called_once_with(mock_loc.schemas[:2])
         mock_save_location_collections.assert_awaited_with(mock_loc.schemas[:2])
 
     @pytest.mark.asyncio
@@ -142,11 +353,11 @@ class TestUpdateCollections:
         mock_handle_location = mocker.patch(
             "collector.tasks.collections._handle_location"
         )
-        mock_transform_location_collections = mocker.patch(
-            "collector.tasks.collections._transform_location_collections"
+        mock_transform_locations_collections = mocker.patch(
+            "collector.tasks.collections._transform_locations_collections"
         )
         mock_save_location_collections = mocker.patch(
-            "collector.tasks.collections.save_location_collections",
+            "collector.tasks.collections.bulk_save_location_collections",
             return_value=(0, 0, 0),
         )
         mock_log = mocker.patch.object(tasks_collections.logger, "error")
@@ -155,12 +366,13 @@ class TestUpdateCollections:
 
         mock_get_collections_locations.assert_awaited()
         mock_handle_location.assert_not_called()
-        mock_transform_location_collections.assert_not_called()
+        mock_transform_locations_collections.assert_not_called()
         mock_save_location_collections.assert_not_awaited()
         mock_log.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_params(self, mocker: MockerFixture, mock_loc):
+        mocker.patch.object(tasks_collections.settings, "DB_BULK_WRITES", True)
         mock_data = [schema.model_dump() for schema in mock_loc.schemas]
 
         mock_get_collections_locations = mocker.patch(
@@ -169,11 +381,11 @@ class TestUpdateCollections:
         mock_handle_location = mocker.patch(
             "collector.tasks.collections._handle_location"
         )
-        mock_transform_location_collections = mocker.patch(
-            "collector.tasks.collections._transform_location_collections"
+        mock_transform_locations_collections = mocker.patch(
+            "collector.tasks.collections._transform_locations_collections"
         )
         mock_save_location_collections = mocker.patch(
-            "collector.tasks.collections.save_location_collections",
+            "collector.tasks.collections.bulk_save_location_collections",
             return_value=(0, 0, 0),
         )
         mock_log = mocker.patch.object(tasks_collections.logger, "error")
@@ -182,6 +394,178 @@ class TestUpdateCollections:
 
         mock_get_collections_locations.assert_not_awaited()
         assert mock_handle_location.await_count == 3
-        assert mock_transform_location_collections.await_count == 3
+        mock_transform_locations_collections.assert_called_once()
         mock_save_location_collections.assert_awaited()
         mock_log.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_legacy_writes(self, mocker: MockerFixture, mock_loc):
+        mock_data = [schema.model_dump() for schema in mock_loc.schemas]
+
+        mocker.patch("collector.tasks.collections._handle_location")
+        mocker.patch("collector.tasks.collections._transform_locations_collections")
+        mocker.patch.object(tasks_collections.settings, "DB_BULK_WRITES", False)
+        mock_bulk_save = mocker.patch(
+            "collector.tasks.collections.bulk_save_location_collections"
+        )
+        mock_save_location_collections = mocker.patch(
+            "collector.tasks.collections.save_location_collections",
+            return_value=(0, 0, 0),
+        )
+
+        await tasks_collections.update_collections(mock_data)
+
+        mock_bulk_save.assert_not_awaited()
+        mock_save_location_collections.assert_awaited()
+
+
+class TestStreamUpdateCollections:
+    @pytest.fixture
+    def mock_stages(self, mocker, async_cm):
+        mocker.patch.object(tasks_collections.settings, "DB_BULK_WRITES", True)
+        mocker.patch(
+            "collector.tasks.collections.EFSBatchProcessor",
+            return_value=async_cm(MagicMock()),
+        )
+        mocker.patch(
+            "collector.tasks.collections.load_collection_references",
+            return_value=({}, set()),
+        )
+
+        class main:
+            handle_location = mocker.patch(
+                "collector.tasks.collections._handle_location"
+            )
+            transform = mocker.patch(
+                "collector.tasks.collections._transform_locations_collections"
+            )
+            save = mocker.patch(
+                "collector.tasks.collections.bulk_save_location_collections",
+                return_value=(1, 2, 1),
+            )
+
+        return main
+
+    @pytest.fixture
+    def locations(self, mock_loc_col):
+        return [schema.model_dump() for schema in mock_loc_col.schemas]
+
+    @pytest.mark.asyncio
+    async def test_batches(self, mocker, mock_stages, locations):
+        mocker.patch.object(tasks_collections.settings, "PIPELINE_BATCH_SIZE", 2)
+
+        result = await tasks_collections._stream_update_collections(locations)
+
+        assert mock_stages.handle_location.await_count == len(locations)
+        # Once per saved batch
+        assert mock_stages.transform.call_count == 2
+        assert [len(c.args[0]) for c in mock_stages.save.await_args_list] == [2, 1]
+        mock_stages.save.assert_awaited_with(mocker.ANY, {}, set())
+        assert result == (2, 4, 2)
+
+    @pytest.mark.asyncio
+    async def test_duplicates(self, mock_stages, locations):
+        result = await tasks_collections._stream_update_collections(
+            locations + locations
+        )
+
+        assert mock_stages.handle_location.await_count == len(locations)
+        saved = mock_stages.save.await_args.args[0]
+        assert len(saved) == len(locations)
+        assert result == (1, 2, 1)
+
+    @pytest.mark.asyncio
+    async def test_from_api(self, mocker, mock_stages, mock_loc_col):
+        mocker.patch.object(tasks_collections.settings, "COLLECTIONS_FETCH", "postcode")
+        mocker.patch("collector.tasks.collections.check_api", return_value=True)
+        mocker.patch(
+            "collector.tasks.collections.get_postal_codes",
+            return_value=["35000", "42000"],
+        )
+        mocker.patch(
+            "collector.tasks.collections._retrieve_sampling_collections",
+            side_effect=[mock_loc_col.api[:2], mock_loc_col.api[2:]],
+        )
+
+        await tasks_collections._stream_update_collections()
+
+        assert mock_stages.handle_location.await_count == len(mock_loc_col.api)
+        mock_stages.save.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_invalid_location(self, mock_stages, locations):
+        locations = [{"foo": "bar"}, *locations]
+
+        result = await tasks_collections._stream_update_collections(locations)
+
+        assert mock_stages.handle_location.await_count == len(locations) - 1
+        assert result == (1, 2, 1)
+
+    @pytest.mark.asyncio
+    async def test_failed_batch(self, mocker, mock_stages, locations):
+        mocker.patch.object(tasks_collections.settings, "PIPELINE_BATCH_SIZE", 2)
+        mock_stages.save.side_effect = [Exception("error"), (1, 2, 1)]
+        mock_log = mocker.patch.object(tasks_collections.logger, "error")
+
+        result = await tasks_collections._stream_update_collections(locations)
+
+        assert mock_stages.save.await_count == 2
+        mock_log.assert_called_once()
+        assert result == (1, 2, 1)
+
+    @pytest.mark.asyncio
+    async def test_writer_stopped(self, mocker, mock_stages, locations):
+        mocker.patch.object(tasks_collections.settings, "PIPELINE_QUEUE_SIZE", 1)
+        # The writer fails outside of the batch saves on the first location
+        mocker.patch.object(tasks_collections.settings, "PIPELINE_BATCH_SIZE", None)
+
+        with pytest.raises(TypeError):
+            await asyncio.wait_for(
+                tasks_collections._stream_update_collections(locations * 10), timeout=1
+            )
+
+        mock_stages.save.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_update_collections(self, mocker):
+        mocker.patch.object(tasks_collections.settings, "COLLECTIONS_STREAMING", True)
+        mock_stream = mocker.patch(
+            "collector.tasks.collections._stream_update_collections",
+            return_value=(1, 2, 1),
+        )
+        mock_get_collections_locations = mocker.patch(
+            "collector.tasks.collections._get_collections_locations"
+        )
+
+        await tasks_collections.update_collections()
+
+        mock_stream.assert_awaited_once_with(None, None)
+        mock_get_collections_locations.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_shared_efs_processor(self, mocker, mock_stages, locations):
+        mock_ebp = mocker.patch("collector.tasks.collections.EFSBatchProcessor")
+        mock_efs_processor = MagicMock()
+
+        await tasks_collections._stream_update_collections(
+            locations, mock_efs_processor
+        )
+
+        mock_ebp.assert_not_called()
+        assert mock_stages.handle_location.await_args.args[1] is mock_efs_processor
+
+
+class TestRetrieveTiledCollectionsCallback:
+    @pytest.mark.asyncio
+    async def test_on_tile(self, mocker, mock_loc_col):
+        mocker.patch.object(tasks_collections.settings, "TILE_LIMIT", 3)
+        mocker.patch(
+            "collector.tasks.collections._retrieve_tile_collections",
+            side_effect=[mock_loc_col.api, *[[loc] for loc in mock_loc_col.api], []],
+        )
+        on_tile = AsyncMock()
+
+        await tasks_collections._retrieve_tiled_collections((0, 0, 2, 2), on_tile=on_tile)
+
+        # Only the final tiles are streamed
+        assert on_tile.await_count == 4
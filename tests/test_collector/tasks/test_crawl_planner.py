@@ -0,0 +1,139 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+import collector.tasks.crawl_planner as crawl_planner
+from collector.schemas import CrawlStateSchema
+
+NOW = datetime(2026, 10, 18, 3, 30, tzinfo=UTC)
+
+
+@pytest.fixture
+def _settings(mocker: MockerFixture):
+    mocker.patch.object(crawl_planner.settings, "CRAWL_INCREMENTAL", True)
+    mocker.patch.object(crawl_planner.settings, "CRAWL_HOURS_PER_DAY_TO_EVENT", 6.0)
+    mocker.patch.object(crawl_planner.settings, "CRAWL_MIN_INTERVAL_HOURS", 12.0)
+    mocker.patch.object(crawl_planner.settings, "CRAWL_MAX_INTERVAL_HOURS", 168.0)
+    mocker.patch.object(crawl_planner.settings, "CRAWL_FULL_FACTOR", 2.0)
+
+
+def _collection(url: str, days: float, efs_id: str | None = None):
+    return MagicMock(url=url, start_date=NOW + timedelta(days=days), efs_id=efs_id)
+
+
+async def _batches(*batches):
+    for batch in batches:
+        yield batch
+
+
+class TestRevisitInterval:
+    def test_days_to_event(self, _settings):
+        assert crawl_planner.revisit_interval(1) == timedelta(hours=12)
+        assert crawl_planner.revisit_interval(10) == timedelta(hours=60)
+        assert crawl_planner.revisit_interval(60) == timedelta(hours=168)
+
+    def test_volatility(self, _settings):
+        assert crawl_planner.revisit_interval(10, volatility=1.0) == timedelta(hours=30)
+        assert crawl_planner.revisit_interval(10, volatility=0.5) == timedelta(hours=45)
+
+    def test_full(self, _settings):
+        assert crawl_planner.revisit_interval(10, is_full=True) == timedelta(hours=120)
+
+
+def test_build_request():
+    state = CrawlStateSchema(
+        url="https://efs.link/foo",
+        etag='"abc"',
+        last_modified="Sat, 18 Oct 2026 03:30:00 GMT",
+        crawled_at=NOW,
+        next_crawl_at=NOW,
+    )
+
+    request = crawl_planner.build_request("https://efs.link/foo", "run", state)
+
+    assert request.unique_key == "https://efs.link/foo#run"
+    assert request.headers["if-none-match"] == '"abc"'
+    assert request.headers["if-modified-since"] == "Sat, 18 Oct 2026 03:30:00 GMT"
+    assert not crawl_planner.build_request("https://efs.link/foo", "run").headers
+
+
+class TestPlanCrawl:
+    @pytest.mark.asyncio
+    async def test_due_pages(self, mocker: MockerFixture, _settings):
+        states = {
+            "https://efs.link/later": CrawlStateSchema(
+                url="https://efs.link/later", crawled_at=NOW, next_crawl_at=NOW + timedelta(days=1)
+            ),
+            "https://efs.link/due": CrawlStateSchema(
+                url="https://efs.link/due", etag='"abc"', crawled_at=NOW, next_crawl_at=NOW
+            ),
+        }
+        mocker.patch("collector.tasks.crawl_planner.load_crawl_states", return_value=states)
+        mock_load_slot_stats = mocker.patch(
+            "collector.tasks.crawl_planner.load_slot_stats", return_value={"1": (1.0, False)}
+        )
+        collections = _batches(
+            [_collection("https://efs.link/later", 2), _collection("https://efs.link/due", 10, efs_id="1")],
+            [_collection("https://efs.link/new", 10)],
+            [_collection("https://efs.link/new", 1), _collection(None, 1)],
+        )
+
+        requests, next_states = await crawl_planner.plan_crawl(collections, NOW)
+
+        mock_load_slot_stats.assert_awaited_once_with(["1"], NOW - timedelta(days=7))
+        assert [r.url for r in requests] == ["https://efs.link/due", "https://efs.link/new"]
+        assert requests[0].headers["if-none-match"] == '"abc"'
+        assert [(s.url, s.etag, s.next_crawl_at) for s in next_states] == [
+            ("https://efs.link/due", '"abc"', NOW + timedelta(hours=30)),
+            ("https://efs.link/new", None, NOW + timedelta(hours=12)),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_not_incremental(self, mocker: MockerFixture, _settings):
+        mocker.patch.object(crawl_planner.settings, "CRAWL_INCREMENTAL", False)
+        mock_load_crawl_states = mocker.patch("collector.tasks.crawl_planner.load_crawl_states")
+
+        requests, next_states = await crawl_planner.plan_crawl(
+            _batches([_collection("https://efs.link/foo", 10)]), NOW
+        )
+
+        mock_load_crawl_states.assert_not_awaited()
+        assert [r.url for r in requests] == ["https://efs.link/foo"]
+        assert next_states == []
+
+
+class TestRecordCrawl:
+    @pytest.mark.asyncio
+    async def test_record(self, mocker: MockerFixture):
+        mock_save = mocker.patch("collector.tasks.crawl_planner.save_crawl_states")
+        states = [
+            CrawlStateSchema(url=f"https://efs.link/{name}", etag=etag, crawled_at=NOW, next_crawl_at=NOW)
+            for name, etag in [
+                ("crawled", None),
+                ("not-modified", '"abc"'),
+                ("failed", None),
+                ("failed-conditional", '"def"'),
+            ]
+        ]
+        results = [
+            {"url": "https://efs.link/crawled", "etag": '"new"', "last_modified": None},
+            {"url": "https://efs.link/not-modified", "not_modified": True},
+        ]
+
+        await crawl_planner.record_crawl(states, results)
+
+        saved = mock_save.await_args.args[0]
+        assert [(s.url, s.etag) for s in saved] == [
+            ("https://efs.link/crawled", '"new"'),
+            ("https://efs.link/not-modified", '"abc"'),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_nothing_to_record(self, mocker: MockerFixture):
+        mock_save = mocker.patch("collector.tasks.crawl_planner.save_crawl_states")
+
+        await crawl_planner.record_crawl([], [])
+
+        mock_save.assert_not_awaited()
@@ -0,0 +1,79 @@
+import pytest
+from aioresponses import aioresponses
+
+import collector.tasks.efs_batch_processor as efs_batch_processor
+from collector.tasks.efs_batch_processor import EFSBatchProcessor
+
+COLLECTION_URL = "https://dondesang.efs.sante.fr/trouver-une-collecte/1337/foo"
+
+
+class TestEFSBatchProcessor:
+    @pytest.mark.asyncio
+    async def test_resolve(self, mocker):
+        mocker.patch(
+            "collector.tasks.efs_batch_processor.load_efs_id_cache", return_value={}
+        )
+        mock_save = mocker.patch("collector.tasks.efs_batch_processor.save_efs_id_cache")
+
+        with aioresponses() as mock_http:
+            mock_http.head(COLLECTION_URL, status=200)
+            async with EFSBatchProcessor(persistent_cache=True) as efs_processor:
+                result = await efs_processor.get_efs_id(COLLECTION_URL)
+
+        assert result == "1337"
+        mock_save.assert_awaited_once_with({COLLECTION_URL: "1337"})
+
+    @pytest.mark.asyncio
+    async def test_negative_resolution(self, mocker):
+        url = "https://efs.link/foo"
+        mocker.patch(
+            "collector.tasks.efs_batch_processor.load_efs_id_cache", return_value={}
+        )
+        mock_save = mocker.patch("collector.tasks.efs_batch_processor.save_efs_id_cache")
+
+        with aioresponses() as mock_http:
+            mock_http.head(url, status=200)
+            async with EFSBatchProcessor(persistent_cache=True) as efs_processor:
+                result = await efs_processor.get_efs_id(url)
+
+        assert result is None
+        mock_save.assert_awaited_once_with({url: None})
+
+    @pytest.mark.asyncio
+    async def test_cached(self, mocker):
+        url = "https://efs.link/foo"
+        mocker.patch(
+            "collector.tasks.efs_batch_processor.load_efs_id_cache",
+            return_value={url: "42"},
+        )
+        mock_save = mocker.patch("collector.tasks.efs_batch_processor.save_efs_id_cache")
+
+        with aioresponses() as mock_http:
+            async with EFSBatchProcessor(persistent_cache=True) as efs_processor:
+                result = await efs_processor.get_efs_id(url)
+
+            assert not mock_http.requests
+
+        assert result == "42"
+        mock_save.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_without_persistent_cache(self, mocker):
+        mock_load = mocker.patch("collector.tasks.efs_batch_processor.load_efs_id_cache")
+        mock_save = mocker.patch("collector.tasks.efs_batch_processor.save_efs_id_cache")
+
+        with aioresponses() as mock_http:
+            mock_http.head(COLLECTION_URL, status=200)
+            async with EFSBatchProcessor(persistent_cache=False) as efs_processor:
+                result = await efs_processor.get_efs_id(COLLECTION_URL)
+
+        assert result == "1337"
+        mock_load.assert_not_awaited()
+        mock_save.assert_not_awaited()
+
+    @pytest.mark.parametrize("enabled", [True, False])
+    def test_persistent_cache_setting(self, mocker, enabled):
+        # Read when the processor is created, not when the module is imported
+        mocker.patch.object(efs_batch_processor.settings, "EFS_ID_CACHE", enabled)
+
+        assert EFSBatchProcessor().persistent_cache is enabled
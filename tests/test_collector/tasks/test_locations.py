@@ -1,6 +1,8 @@
 from unittest.mock import MagicMock
 
+import httpx
 import pytest
+from api_carto_client import Client
 from api_carto_client.models.sampling_location_result import SamplingLocationResult
 from pytest_mock import MockerFixture
 
@@ -32,6 +34,21 @@ async def test_retrieve_location_sampling(mocker, mock_grp, mock_loc):
     assert result == mock_loc.schemas
 
 
+@pytest.mark.asyncio
+async def test_retrieve_location_sampling_raw_json(mocker, mock_grp, mock_loc):
+    body = SamplingLocationResult(sampling_location_entities=mock_loc.api).to_dict()
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=body))
+    client = Client(base_url="https://api.test", httpx_args={"transport": transport})
+    mocker.patch("collector.services.utils.get_api_client", return_value=client)
+    mocker.patch.object(tasks_locations.settings, "API_RAW_JSON", True)
+    mock_api_to_pydantic = mocker.patch("collector.tasks.locations.api_to_pydantic")
+
+    result = await tasks_locations._retrieve_location_sampling(mock_grp.api[0])
+
+    mock_api_to_pydantic.assert_not_called()
+    assert result == mock_loc.schemas
+
+
 @pytest.mark.asyncio
 async def test_filter_location_success(mocker: MockerFixture):
     mock_input = MagicMock(
@@ -65,6 +82,7 @@ async def test_filter_location_error(mocker: MockerFixture, post_code, lat, lng)
 
 @pytest.mark.asyncio
 async def test_update_locations_success(mocker, mock_grp, mock_loc):
+    mocker.patch.object(tasks_locations.settings, "DB_BULK_WRITES", True)
     mock_check_api = mocker.patch(
         "collector.tasks.locations.check_api", return_value=True
     )
@@ -84,7 +102,7 @@ async def test_update_locations_success(mocker, mock_grp, mock_loc):
 
     # Save locations
     mock_save_locations = mocker.patch(
-        "collector.tasks.locations.save_locations", return_value=mock_locations
+        "collector.tasks.locations.bulk_save_locations", return_value=mock_locations
     )
 
     await tasks_locations.update_locations()
@@ -100,7 +118,7 @@ async def test_update_locations_api_check_fails(mocker):
         "collector.tasks.locations.check_api", return_value=False
     )
     mock_load_groups = mocker.patch("collector.tasks.locations.load_groups")
-    mock_save_locations = mocker.patch("collector.tasks.locations.save_locations")
+    mock_save_locations = mocker.patch("collector.tasks.locations.bulk_save_locations")
 
     await tasks_locations.update_locations()
 
@@ -122,7 +140,7 @@ async def test_update_locations_empty_groups(mocker):
         "collector.tasks.locations.load_groups", return_value=mock_groups
     )
     mock_save_locations = mocker.patch(
-        "collector.tasks.locations.save_locations", return_value=mock__locations
+        "collector.tasks.locations.bulk_save_locations", return_value=mock__locations
     )
     mock_log = mocker.patch.object(tasks_locations.logger, "error")
 
@@ -152,7 +170,7 @@ async def test_update_locations_no_locations_found(mocker, mock_grp):
         return_value=mock__locations,
     )
     mock_save_locations = mocker.patch(
-        "collector.tasks.locations.save_locations", return_value=mock_locations
+        "collector.tasks.locations.bulk_save_locations", return_value=mock_locations
     )
     mock_log = mocker.patch.object(tasks_locations.logger, "error")
 
@@ -162,3 +180,17 @@ async def test_update_locations_no_locations_found(mocker, mock_grp):
     mock_check_api.assert_awaited()
     mock_load_groups.assert_awaited()
     mock_save_locations.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_update_locations_legacy_writes(mocker, mock_loc):
+    mocker.patch.object(tasks_locations.settings, "DB_BULK_WRITES", False)
+    mock_bulk_save_locations = mocker.patch("collector.tasks.locations.bulk_save_locations")
+    mock_save_locations = mocker.patch(
+        "collector.tasks.locations.save_locations", return_value=mock_loc.schemas
+    )
+
+    await tasks_locations.update_locations(mock_loc.schemas)
+
+    mock_bulk_save_locations.assert_not_awaited()
+    mock_save_locations.assert_awaited_with(mock_loc.schemas)
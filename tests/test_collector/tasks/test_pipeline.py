@@ -0,0 +1,135 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+import collector.tasks.collections as collection_tasks
+import collector.tasks.pipeline as pipeline_tasks
+from collector.tasks.collections import update_collections
+
+
+@pytest.fixture
+def mock_stages(mocker: MockerFixture, async_cm):
+    efs_processor = MagicMock()
+    mock_ebp = mocker.patch(
+        "collector.tasks.pipeline.EFSBatchProcessor",
+        return_value=async_cm(efs_processor),
+    )
+    calls = []
+
+    def _stage(name):
+        async def _run(*args, **kwargs):
+            calls.append(name)
+            return True
+
+        return mocker.patch(f"collector.tasks.pipeline.{name}", side_effect=_run)
+
+    class main:
+        processor = efs_processor
+        ebp = mock_ebp
+        order = calls
+        groups = _stage("update_groups")
+        locations = _stage("update_locations")
+        collections = _stage("update_collections")
+        schedules = _stage("update_schedules")
+        rollups = _stage("update_rollups")
+        maintenance = _stage("update_partitions")
+
+    return main
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_all(mock_stages):
+    results = await pipeline_tasks.run_pipeline()
+
+    assert results == {name: True for name in pipeline_tasks.PIPELINE_STAGES}
+    mock_stages.ebp.assert_called_once()
+    mock_stages.collections.assert_awaited_once_with(efs_processor=mock_stages.processor)
+    mock_stages.schedules.assert_awaited_once_with(efs_processor=mock_stages.processor)
+    order = mock_stages.order
+    assert order.index("update_groups") < order.index("update_locations")
+    assert order.index("update_locations") < order.index("update_collections")
+    assert order.index("update_partitions") < order.index("update_collections")
+    assert order.index("update_collections") < order.index("update_schedules")
+    assert order[-1] == "update_rollups"
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_concurrent_stages(mocker: MockerFixture, mock_stages):
+    started = asyncio.Event()
+
+    async def _groups():
+        # Waits for the maintenance, which would never start if the stages were sequential
+        await asyncio.wait_for(started.wait(), timeout=1)
+        return True
+
+    async def _maintenance():
+        started.set()
+        return True
+
+    mock_stages.groups.side_effect = _groups
+    mock_stages.maintenance.side_effect = _maintenance
+
+    results = await pipeline_tasks.run_pipeline(["groups", "maintenance"])
+
+    assert results == {"maintenance": True, "groups": True}
+    mock_stages.locations.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_selected_stages(mock_stages):
+    results = await pipeline_tasks.run_pipeline(["collections", "schedules", "rollups"])
+
+    assert results == {"collections": True, "schedules": True, "rollups": True}
+    assert mock_stages.order == ["update_collections", "update_schedules", "update_rollups"]
+    mock_stages.groups.assert_not_awaited()
+    mock_stages.maintenance.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_failed_stage(mocker: MockerFixture, mock_stages):
+    mock_stages.collections.side_effect = Exception("Foo")
+    mock_log = mocker.patch.object(pipeline_tasks.logger, "error")
+
+    results = await pipeline_tasks.run_pipeline()
+
+    assert results == {
+        "maintenance": True,
+        "groups": True,
+        "locations": True,
+        "collections": False,
+        "schedules": True,
+        "rollups": False,
+    }
+    # The schedules crawl the collections already saved
+    mock_stages.schedules.assert_awaited_once()
+    mock_stages.rollups.assert_not_awaited()
+    assert mock_log.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_stage_returned_failure(mocker: MockerFixture, mock_stages):
+    # The real task, which logs and returns when the API is unavailable
+    mocker.patch("collector.tasks.pipeline.update_collections", side_effect=update_collections)
+    mocker.patch.object(collection_tasks.settings, "COLLECTIONS_STREAMING", False)
+    mock_check_api = mocker.patch("collector.tasks.collections.check_api", return_value=False)
+
+    results = await pipeline_tasks.run_pipeline(["collections", "schedules"])
+
+    assert results == {"collections": False, "schedules": True}
+    mock_check_api.assert_awaited_once()
+    mock_stages.schedules.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_failed_locations(mocker: MockerFixture, mock_stages):
+    mock_stages.locations.side_effect = Exception("Foo")
+    mocker.patch.object(pipeline_tasks.logger, "error")
+
+    results = await pipeline_tasks.run_pipeline(["locations", "collections", "schedules"])
+
+    # Only the collections depend on the locations, the schedules wait for them without being skipped
+    assert results == {"locations": False, "collections": False, "schedules": True}
+    mock_stages.collections.assert_not_awaited()
+    mock_stages.schedules.assert_awaited_once()
@@ -1,124 +1,220 @@
 from datetime import datetime, time
 from unittest.mock import AsyncMock, MagicMock
 
+import httpx
 import pytest
 from crawlee import Request
-from crawler.models import LocationEvents
+from crawlee.sessions import Session
+from crawler.models import LocationEvents, PageNotModified
 from pytest_mock import MockerFixture
 
 import collector.tasks.schedules as schedule_tasks
+from collector.core.concurrency import get_limiter
 from collector.schemas import CollectionEventSchema, ScheduleSchema
 
 
 class TestRetrieveActiveCollectionsUrl:
     @pytest.mark.asyncio
     async def test_found(self, mocker: MockerFixture, mock_grp_col):
-        mock_get_active_collections = mocker.patch(
-            "collector.tasks.schedules.get_active_collections",
-            return_value=mock_grp_col.schemas,
+        active_collections = _aiter([mock_grp_col.schemas])
+        mock_iter_active_collections = mocker.patch(
+            "collector.tasks.schedules.iter_active_collections",
+            return_value=active_collections,
+        )
+        mock_requests = [Request.from_url("http://foo.com")]
+        mock_plan_crawl = mocker.patch(
+            "collector.tasks.schedules.plan_crawl", return_value=(mock_requests, [])
         )
 
         result = await schedule_tasks._retrieve_active_collections_url()
 
-        mock_get_active_collections.assert_called_once()
-        assert isinstance(result[0], Request)
-        assert len(result) == len(mock_grp_col.schemas)
+        mock_iter_active_collections.assert_called_once()
+        mock_plan_crawl.assert_awaited_once_with(active_collections)
+        assert result == (mock_requests, [])
 
     @pytest.mark.asyncio
     async def test_not_found(self, mocker: MockerFixture, mock_grp_col):
-        mock_get_active_collections = mocker.patch(
-            "collector.tasks.schedules.get_active_collections", return_value=[]
+        mock_iter_active_collections = mocker.patch(
+            "collector.tasks.schedules.iter_active_collections", return_value=_aiter([])
         )
+        mocker.patch.object(schedule_tasks.settings, "CRAWL_INCREMENTAL", False)
 
         result = await schedule_tasks._retrieve_active_collections_url()
 
-        mock_get_active_collections.assert_called_once()
-        assert result == []
+        mock_iter_active_collections.assert_called_once()
+        assert result == ([], [])
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+class TestCrawlerHttpClient:
+    @pytest.mark.asyncio
+    async def test_redirect_observed_by_booking_host(self, mocker: MockerFixture):
+        async def _respond(_transport, request: httpx.Request) -> httpx.Response:
+            if request.url.host == "short.test":
+                return httpx.Response(302, headers={"Location": "https://booking.test/page"})
+            return httpx.Response(503)
+
+        mocker.patch.object(httpx.AsyncHTTPTransport, "handle_async_request", _respond)
+        short_limiter, booking_limiter = get_limiter("short.test"), get_limiter("booking.test")
+        initial_limit = booking_limiter.limit
 
+        response = await schedule_tasks._crawler_http_client().send_request("https://short.test/foo")
+
+        assert response.status_code == 503
+        assert booking_limiter.limit < initial_limit
+        assert short_limiter.in_flight == booking_limiter.in_flight == 0
 
-class TestGetSchedulesFromCrawler:
+    @pytest.mark.asyncio
+    async def test_cookies_stored_in_session(self, mocker: MockerFixture):
+        async def _respond(_transport, request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, headers={"Set-Cookie": "foo=bar; Path=/"}, request=request)
+
+        mocker.patch.object(httpx.AsyncHTTPTransport, "handle_async_request", _respond)
+        session = Session()
+
+        response = await schedule_tasks._crawler_http_client().send_request(
+            "https://cookies.test/foo", session=session
+        )
+
+        # Same behavior as the transport of the crawlee client
+        assert "set-cookie" not in response.headers
+        assert session.cookies["foo"] == "bar"
+
+
+class TestStreamSchedulesFromCrawler:
     @pytest.mark.asyncio
     async def test_exception(self, mocker: MockerFixture):
-        mock_urls = ["http://foo.com/1", "http://foo.com/2", "http://foo.com/3"]
+        mock_urls = [Request.from_url(f"http://foo.com/{i}") for i in range(1, 4)]
 
         mock_retrieve_active_collections_url = mocker.patch(
             "collector.tasks.schedules._retrieve_active_collections_url",
-            return_value=mock_urls,
+            return_value=(mock_urls, []),
         )
-        mock_start_crawler = mocker.patch(
-            "collector.tasks.schedules.start_crawler", side_effect=Exception("error")
+        mock_iter_crawler = mocker.patch(
+            "collector.tasks.schedules.iter_crawler", side_effect=Exception("error")
         )
         mock_log = mocker.patch.object(schedule_tasks.logger, "error")
 
-        results = await schedule_tasks._get_schedules_from_crawler()
+        with pytest.raises(Exception, match="error"):
+            [sg async for sg in schedule_tasks._stream_schedules_from_crawler()]
 
         mock_retrieve_active_collections_url.assert_awaited_once()
-        mock_start_crawler.assert_awaited()
+        mock_iter_crawler.assert_called_once()
         mock_log.assert_called_once()
-        assert results == []
 
     @pytest.mark.asyncio
     async def test_not_found_urls(self, mocker: MockerFixture):
-        mock_urls = []
-        mock_crawler_resp = MagicMock(items=[])
-
         mock_retrieve_active_collections_url = mocker.patch(
             "collector.tasks.schedules._retrieve_active_collections_url",
-            return_value=mock_urls,
-        )
-        mock_start_crawler = mocker.patch(
-            "collector.tasks.schedules.start_crawler", return_value=mock_crawler_resp
+            return_value=([], []),
         )
+        mock_iter_crawler = mocker.patch("collector.tasks.schedules.iter_crawler")
 
-        results = await schedule_tasks._get_schedules_from_crawler()
+        results = [sg async for sg in schedule_tasks._stream_schedules_from_crawler()]
 
         mock_retrieve_active_collections_url.assert_awaited_once()
-        mock_start_crawler.assert_not_awaited()
+        mock_iter_crawler.assert_not_called()
         assert results == []
 
     @pytest.mark.asyncio
     async def test_not_found_schedules(self, mocker: MockerFixture):
-        mock_urls = ["http://foo.com/1", "http://foo.com/2", "http://foo.com/3"]
-        mock_crawler_resp = MagicMock(items=[])
+        mock_urls = [Request.from_url(f"http://foo.com/{i}") for i in range(1, 4)]
 
-        mock_retrieve_active_collections_url = mocker.patch(
+        mocker.patch(
             "collector.tasks.schedules._retrieve_active_collections_url",
-            return_value=mock_urls,
+            return_value=(mock_urls, []),
         )
-        mock_start_crawler = mocker.patch(
-            "collector.tasks.schedules.start_crawler", return_value=mock_crawler_resp
+        mock_iter_crawler = mocker.patch(
+            "collector.tasks.schedules.iter_crawler", return_value=_aiter([])
         )
+        mock_record_crawl = mocker.patch("collector.tasks.schedules.record_crawl")
 
-        results = await schedule_tasks._get_schedules_from_crawler()
+        results = [sg async for sg in schedule_tasks._stream_schedules_from_crawler()]
 
-        mock_retrieve_active_collections_url.assert_awaited_once()
-        mock_start_crawler.assert_awaited_once()
+        mock_iter_crawler.assert_called_once()
+        mock_record_crawl.assert_awaited_once_with([], [])
         assert results == []
 
     @pytest.mark.asyncio
     async def test_found(self, mocker: MockerFixture):
-        mock_urls = [f"http://foo.com/{i}" for i in range(20)]
+        mock_urls = [Request.from_url(f"http://foo.com/{i}") for i in range(20)]
         mock_crawler_resp = [
-            MagicMock(
-                spec=LocationEvents, location="foo", url=url, time=datetime(2025, 11, 11), events=[]
+            LocationEvents(
+                location="foo",
+                url=request.url,
+                collect_type="blood",
+                time=datetime(2025, 11, 11),
+                events=[{"date": "19/09/2025", "slots": 1, "schedules": {"14h25": 1}}],
+                etag='"abc"',
             )
-            for url in mock_urls
+            for request in mock_urls
         ]
 
         mock_retrieve_active_collections_url = mocker.patch(
             "collector.tasks.schedules._retrieve_active_collections_url",
-            return_value=mock_urls,
+            return_value=(mock_urls, []),
         )
-        mock_start_crawler = mocker.patch(
-            "collector.tasks.schedules.start_crawler",
-            return_value=mock_crawler_resp,
+        mock_iter_crawler = mocker.patch(
+            "collector.tasks.schedules.iter_crawler", return_value=_aiter(mock_crawler_resp)
         )
+        mock_record_crawl = mocker.patch("collector.tasks.schedules.record_crawl")
 
-        results = await schedule_tasks._get_schedules_from_crawler()
+        results = [sg async for sg in schedule_tasks._stream_schedules_from_crawler()]
 
         mock_retrieve_active_collections_url.assert_awaited_once()
-        mock_start_crawler.assert_awaited_once()
+        mock_iter_crawler.assert_called_once()
+        assert (
+            mock_iter_crawler.call_args.kwargs["parser"]
+            == schedule_tasks.settings.CRAWLER_PARSER
+        )
+        assert (
+            mock_iter_crawler.call_args.kwargs["parse_processes"]
+            == schedule_tasks.settings.CRAWLER_PROCESSES
+        )
+        assert (
+            mock_iter_crawler.call_args.kwargs["archive_dir"]
+            == schedule_tasks.settings.CRAWLER_ARCHIVE_DIR
+        )
+        assert (
+            mock_iter_crawler.call_args.kwargs["queue_size"]
+            == schedule_tasks.settings.PIPELINE_QUEUE_SIZE
+        )
         assert len(results) == 20
+        assert results[0].url == "http://foo.com/0"
+        assert results[0].created_at == datetime(2025, 11, 11)
+        assert results[0].events[0].timetables == {"14h25": 1}
+        mock_record_crawl.assert_awaited_once_with(
+            [],
+            [
+                {"url": request.url, "etag": '"abc"', "last_modified": None}
+                for request in mock_urls
+            ],
+        )
+
+    @pytest.mark.asyncio
+    async def test_not_modified(self, mocker: MockerFixture):
+        mock_urls = [Request.from_url(f"http://foo.com/{i}") for i in range(2)]
+        mock_states = [MagicMock(url=request.url) for request in mock_urls]
+        mocker.patch(
+            "collector.tasks.schedules._retrieve_active_collections_url",
+            return_value=(mock_urls, mock_states),
+        )
+        mocker.patch(
+            "collector.tasks.schedules.iter_crawler",
+            return_value=_aiter([PageNotModified(url="http://foo.com/0")]),
+        )
+        mock_record_crawl = mocker.patch("collector.tasks.schedules.record_crawl")
+
+        results = [sg async for sg in schedule_tasks._stream_schedules_from_crawler()]
+
+        assert results == [PageNotModified(url="http://foo.com/0")]
+        mock_record_crawl.assert_awaited_once_with(
+            mock_states, [{"url": "http://foo.com/0", "not_modified": True}]
+        )
 
 
 class TestMatchEvent:
@@ -306,6 +402,62 @@ class TestHandleSchedule:
         assert results == []
 
 
+class TestHandleScheduleWithIndex:
+    @pytest.mark.asyncio
+    async def test_found(self, mocker: MockerFixture, mock_sch, mock_evt_col):
+        schedule = mock_sch.schemas[0]
+        events_index = {(schedule.efs_id, schedule.date): mock_evt_col.schemas[:2]}
+
+        mock_retrieve_events = mocker.patch("collector.tasks.schedules.retrieve_events")
+        mock_match_event = mocker.patch(
+            "collector.tasks.schedules._match_event", side_effect=mock_sch.schemas[:2]
+        )
+
+        results = await schedule_tasks._handle_schedule(schedule, events_index)
+
+        mock_retrieve_events.assert_not_called()
+        assert mock_match_event.call_count == 2
+        assert results == mock_sch.schemas[:2]
+
+    @pytest.mark.asyncio
+    async def test_not_found(self, mocker: MockerFixture, mock_sch):
+        mock_retrieve_events = mocker.patch("collector.tasks.schedules.retrieve_events")
+        mock_log = mocker.patch.object(schedule_tasks.logger, "warning")
+
+        results = await schedule_tasks._handle_schedule(mock_sch.schemas[0], {})
+
+        mock_retrieve_events.assert_not_called()
+        mock_log.assert_called_once()
+        assert results == []
+
+
+class TestBuildEventsIndex:
+    @pytest.mark.asyncio
+    async def test_success(self, mocker: MockerFixture, mock_grp_sch):
+        mock_ebp = MagicMock()
+        mock_ebp.get_efs_id = AsyncMock(side_effect=["1", None, "1"])
+        mock_load_events_index = mocker.patch(
+            "collector.tasks.schedules.load_events_index", return_value={"foo": "bar"}
+        )
+
+        result = await schedule_tasks._build_events_index(mock_grp_sch.schemas, mock_ebp)
+
+        assert mock_ebp.get_efs_id.await_count == len(mock_grp_sch.schemas)
+        mock_load_events_index.assert_awaited_once_with({"1"})
+        assert result == {"foo": "bar"}
+
+    @pytest.mark.asyncio
+    async def test_no_efs_id(self, mocker: MockerFixture, mock_grp_sch):
+        mock_ebp = MagicMock()
+        mock_ebp.get_efs_id = AsyncMock(return_value=None)
+        mock_load_events_index = mocker.patch("collector.tasks.schedules.load_events_index")
+
+        result = await schedule_tasks._build_events_index(mock_grp_sch.schemas, mock_ebp)
+
+        mock_load_events_index.assert_not_called()
+        assert result == {}
+
+
 class TestHandleSchedulesGroup:
     @pytest.mark.asyncio
     async def test_no_efs_id(self, mocker: MockerFixture, mock_grp_sch):
@@ -340,25 +492,84 @@ class TestHandleSchedulesGroup:
 class TestUpdateSchedule:
     @pytest.mark.asyncio
     async def test_no_schedules_groups(self, mocker: MockerFixture, mock_grp_sch):
-        mock_get_schedules_from_crawler = mocker.patch(
-            "collector.tasks.schedules._get_schedules_from_crawler", return_value=None
+        mock_ebp = mocker.patch("collector.tasks.schedules.EFSBatchProcessor")
+        # No page due for a crawl
+        mock_stream_schedules_from_crawler = mocker.patch(
+            "collector.tasks.schedules._stream_schedules_from_crawler",
+            return_value=_aiter([]),
         )
+        mock_process = mocker.patch("collector.tasks.schedules._process_schedules_groups")
         mock_log = mocker.patch.object(schedule_tasks.logger, "error")
 
         results = await schedule_tasks.update_schedules()
 
-        mock_get_schedules_from_crawler.assert_awaited_once()
-        mock_log.assert_called_once()
-        assert results is None
+        mock_ebp.assert_called_once()
+        mock_stream_schedules_from_crawler.assert_called_once()
+        mock_process.assert_not_awaited()
+        mock_log.assert_not_called()
+        assert results is True
+
+    @pytest.mark.asyncio
+    async def test_not_modified(self, mocker: MockerFixture):
+        mocker.patch("collector.tasks.schedules.EFSBatchProcessor")
+        mocker.patch(
+            "collector.tasks.schedules._stream_schedules_from_crawler",
+            return_value=_aiter([PageNotModified(url="http://foo.com/0")]),
+        )
+        mock_process = mocker.patch("collector.tasks.schedules._process_schedules_groups")
+
+        results = await schedule_tasks.update_schedules()
+
+        mock_process.assert_not_awaited()
+        assert results is True
+
+    @pytest.mark.asyncio
+    async def test_crawler_error(self, mocker: MockerFixture, mock_grp_sch):
+        async def _failing_crawl():
+            yield mock_grp_sch.schemas[0]
+            raise Exception("error")
+
+        mocker.patch("collector.tasks.schedules.EFSBatchProcessor")
+        mocker.patch(
+            "collector.tasks.schedules._stream_schedules_from_crawler",
+            return_value=_failing_crawl(),
+        )
+        mock_process = mocker.patch(
+            "collector.tasks.schedules._process_schedules_groups", return_value=1
+        )
+
+        results = await schedule_tasks.update_schedules()
+
+        # The page crawled before the error is still saved
+        mock_process.assert_awaited_once()
+        assert results is False
+
+    @pytest.mark.asyncio
+    async def test_every_batch_failed(self, mocker: MockerFixture, mock_grp_sch):
+        mocker.patch("collector.tasks.schedules.EFSBatchProcessor")
+        mocker.patch(
+            "collector.tasks.schedules._stream_schedules_from_crawler",
+            return_value=_aiter(mock_grp_sch.schemas),
+        )
+        mocker.patch(
+            "collector.tasks.schedules._process_schedules_groups",
+            side_effect=Exception("error"),
+        )
+
+        results = await schedule_tasks.update_schedules()
+
+        assert results is False
 
     @pytest.mark.asyncio
     async def test_success_crawler(self, mocker: MockerFixture, mock_grp_sch):
+        mocker.patch.object(schedule_tasks.settings, "DB_BULK_WRITES", True)
         mock_ebp = mocker.patch("collector.tasks.schedules.EFSBatchProcessor")
+        mocker.patch("collector.tasks.schedules._build_events_index", return_value={})
         mock_schedule = MagicMock(timetables={"foo": "bar"})
 
-        mock_get_schedules_from_crawler = mocker.patch(
-            "collector.tasks.schedules._get_schedules_from_crawler",
-            return_value=[schema.model_dump() for schema in mock_grp_sch.schemas],
+        mock_stream_schedules_from_crawler = mocker.patch(
+            "collector.tasks.schedules._stream_schedules_from_crawler",
+            return_value=_aiter(mock_grp_sch.schemas),
         )  # return len 3
         mock_handle_schedules_group = mocker.patch(
             "collector.tasks.schedules._handle_schedules_group",
@@ -368,26 +579,52 @@ class TestUpdateSchedule:
                 [],
             ],
         )
-        mock_add_schedule = mocker.patch(
-            "collector.tasks.schedules.add_schedule",
-            return_value=True,
+        mock_bulk_add_schedules = mocker.patch(
+            "collector.tasks.schedules.bulk_add_schedules",
+            return_value=5,
         )
 
         await schedule_tasks.update_schedules()
 
         mock_ebp.assert_called_once()
-        mock_get_schedules_from_crawler.assert_awaited_once()
-        mock_handle_schedules_group.call_count == 3
-        mock_add_schedule.call_count == 3
+        mock_stream_schedules_from_crawler.assert_called_once()
+        assert mock_handle_schedules_group.call_count == 3
+        mock_bulk_add_schedules.assert_awaited_once()
+        assert len(mock_bulk_add_schedules.call_args.args[0]) == 5
+
+    @pytest.mark.asyncio
+    async def test_success_crawler_batches(self, mocker: MockerFixture, mock_grp_sch):
+        mocker.patch.object(schedule_tasks.settings, "DB_BULK_WRITES", True)
+        mocker.patch("collector.tasks.schedules.EFSBatchProcessor")
+        mock_build_events_index = mocker.patch(
+            "collector.tasks.schedules._build_events_index", return_value={}
+        )
+        mocker.patch(
+            "collector.tasks.schedules._stream_schedules_from_crawler",
+            return_value=_aiter(mock_grp_sch.schemas),
+        )
+        mocker.patch(
+            "collector.tasks.schedules._handle_schedules_group",
+            return_value=[MagicMock(timetables={"foo": "bar"})],
+        )
+        mock_bulk_add_schedules = mocker.patch("collector.tasks.schedules.bulk_add_schedules")
+        mocker.patch.object(schedule_tasks.settings, "CRAWLER_BATCH", 2)
+
+        await schedule_tasks.update_schedules()
+
+        # Groups are saved by batches of 2, the last one when the crawl ends
+        assert mock_build_events_index.await_count == 2
+        assert [len(c.args[0]) for c in mock_bulk_add_schedules.await_args_list] == [2, 1]
 
     @pytest.mark.asyncio
     async def test_success_param(self, mocker: MockerFixture, mock_grp_sch):
         mock_ebp = mocker.patch("collector.tasks.schedules.EFSBatchProcessor")
+        mocker.patch("collector.tasks.schedules._build_events_index", return_value={})
         mock_schedule = MagicMock(timetables={"foo": "bar"})
         mock_data = [schema.model_dump() for schema in mock_grp_sch.schemas]
 
-        mock_get_schedules_from_crawler = mocker.patch(
-            "collector.tasks.schedules._get_schedules_from_crawler"
+        mock_stream_schedules_from_crawler = mocker.patch(
+            "collector.tasks.schedules._stream_schedules_from_crawler"
         )
         mock_handle_schedules_group = mocker.patch(
             "collector.tasks.schedules._handle_schedules_group",
@@ -401,10 +638,25 @@ class TestUpdateSchedule:
             "collector.tasks.schedules.add_schedule",
             return_value=True,
         )
+        mocker.patch.object(schedule_tasks.settings, "DB_BULK_WRITES", False)
 
         await schedule_tasks.update_schedules(mock_data)
 
         mock_ebp.assert_called_once()
-        mock_get_schedules_from_crawler.assert_not_called()
+        mock_stream_schedules_from_crawler.assert_not_called()
         mock_handle_schedules_group.call_count == 3
         mock_add_schedule.call_count == 4
+
+    @pytest.mark.asyncio
+    async def test_shared_efs_processor(self, mocker: MockerFixture, mock_grp_sch):
+        mock_ebp = mocker.patch("collector.tasks.schedules.EFSBatchProcessor")
+        mock_efs_processor = MagicMock()
+        mock_data = [schema.model_dump() for schema in mock_grp_sch.schemas]
+        mock_process = mocker.patch(
+            "collector.tasks.schedules._process_schedules_groups", return_value=3
+        )
+
+        await schedule_tasks.update_schedules(mock_data, efs_processor=mock_efs_processor)
+
+        mock_ebp.assert_not_called()
+        assert mock_process.await_args.args[1] is mock_efs_processor
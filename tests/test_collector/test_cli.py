@@ -15,9 +15,13 @@ def _mock_args():
     args.locations = False
     args.collections = False
     args.schedules = False
+    args.maintenance = False
+    args.refresh_rollups = False
+    args.pipeline = False
     args.file = None
     args.format = None
     args.crawl = False
+    args.reparse = None
     args.urls = []
     return args
 
@@ -39,6 +43,74 @@ async def test_cli_groups(mocker: MockerFixture, _mock_args):
     mock_update_schedules.assert_not_awaited()
 
 
+@pytest.mark.asyncio
+async def test_cli_maintenance(mocker: MockerFixture, _mock_args):
+    _mock_args.maintenance = True
+
+    mock_update_schedules = mocker.patch("cli.update_schedules")
+    mock_update_partitions = mocker.patch("cli.update_partitions")
+
+    await cli.main(_mock_args)
+
+    mock_update_partitions.assert_awaited_once()
+    mock_update_schedules.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_cli_refresh_rollups_after_schedules(mocker: MockerFixture, _mock_args):
+    _mock_args.schedules = True
+    _mock_args.refresh_rollups = True
+
+    calls = []
+    mocker.patch("cli.update_schedules", side_effect=lambda _: calls.append("schedules"))
+    mocker.patch("cli.update_rollups", side_effect=lambda: calls.append("rollups"))
+
+    await cli.main(_mock_args)
+
+    assert calls == ["schedules", "rollups"]
+
+
+@pytest.mark.asyncio
+async def test_cli_pipeline(mocker: MockerFixture, _mock_args):
+    _mock_args.pipeline = True
+
+    mock_run_pipeline = mocker.patch("cli.run_pipeline", return_value={"groups": True, "locations": True})
+    mock_update_groups = mocker.patch("cli.update_groups")
+
+    result = await cli.main(_mock_args)
+
+    assert result == 0
+    mock_run_pipeline.assert_awaited_once_with(None)
+    mock_update_groups.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_cli_pipeline_failed_stage(mocker: MockerFixture, _mock_args):
+    _mock_args.pipeline = True
+
+    mocker.patch("cli.run_pipeline", return_value={"groups": True, "locations": False})
+
+    result = await cli.main(_mock_args)
+
+    assert result == 1
+
+
+@pytest.mark.asyncio
+async def test_cli_pipeline_selected(mocker: MockerFixture, _mock_args):
+    _mock_args.pipeline = True
+    _mock_args.collections = True
+    _mock_args.schedules = True
+    _mock_args.refresh_rollups = True
+
+    mock_run_pipeline = mocker.patch("cli.run_pipeline", return_value={})
+    mock_update_collections = mocker.patch("cli.update_collections")
+
+    await cli.main(_mock_args)
+
+    mock_run_pipeline.assert_awaited_once_with(["collections", "schedules", "rollups"])
+    mock_update_collections.assert_not_awaited()
+
+
 @pytest.mark.asyncio
 async def test_cli_locations(mocker: MockerFixture, _mock_args):
     _mock_args.locations = True
@@ -232,3 +304,18 @@ async def test_cli_crawl_urls(mocker: MockerFixture, _mock_args):
 
     mock_log.assert_called_once_with(f"Crawler ended with data: {mock_results}")
     mock_start_crawler.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_cli_reparse_schedules(mocker: MockerFixture, _mock_args):
+    _mock_args.reparse = ["archive/"]
+    _mock_args.schedules = True
+    mock_results = [{"url": "http://foo.com"}]
+
+    mock_reparse_archive = mocker.patch("cli.reparse_archive", return_value=mock_results)
+    mock_update_schedules = mocker.patch("cli.update_schedules")
+
+    await cli.main(_mock_args)
+
+    mock_reparse_archive.assert_called_once_with(["archive/"], cli.settings.CRAWLER_PARSER)
+    mock_update_schedules.assert_awaited_once_with(mock_results)
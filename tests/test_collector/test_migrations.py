@@ -0,0 +1,51 @@
+import importlib.util
+from datetime import UTC, date, datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+VERSIONS_DIR = Path(__file__).parents[2] / "collector" / "alembic" / "versions"
+
+
+def load_migration(name: str):
+    spec = importlib.util.spec_from_file_location(name, VERSIONS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.asyncio
+async def test_dense_view_snapshots_less_than_a_day_apart(pg_connection):
+    migration = load_migration("d2b7e4a9c1f3_fix_dense_snapshots_view")
+    # Temporary table shadowing collection_group_snapshots, the view on it is temporary too
+    await pg_connection.execute(text("""
+        CREATE TEMPORARY TABLE collection_group_snapshots (
+            id integer, taux_remplissage float, nb_places_restantes_st integer, nb_places_totales_st integer,
+            nb_places_reservees_st integer, nb_places_restantes_pla integer, nb_places_totales_pla integer,
+            nb_places_reservees_pla integer, nb_places_restantes_cpa integer, nb_places_totales_cpa integer,
+            nb_places_reservees_cpa integer, created_at timestamptz, valid_until timestamptz,
+            collection_group_id integer
+        )
+    """))
+    await pg_connection.execute(text(migration.DENSE_VIEW.format(days=migration.DAYS)))
+    # Run on day 1 at 10:00, unchanged on day 2 at 08:00, changed on day 3 at 07:00
+    await pg_connection.execute(
+        text("""
+            INSERT INTO collection_group_snapshots (id, collection_group_id, created_at, valid_until)
+            VALUES (1, 1, :first, :extended), (2, 1, :second, :second)
+        """),
+        {
+            "first": datetime(2026, 10, 1, 10, tzinfo=UTC),
+            "extended": datetime(2026, 10, 2, 8, tzinfo=UTC),
+            "second": datetime(2026, 10, 3, 7, tzinfo=UTC),
+        },
+    )
+
+    result = await pg_connection.execute(text("""
+        SELECT id, (created_at AT TIME ZONE 'UTC')::date
+        FROM collection_group_snapshots_dense
+        ORDER BY created_at
+    """))
+
+    assert result.all() == [(1, date(2026, 10, 1)), (1, date(2026, 10, 2)), (2, date(2026, 10, 3))]
@@ -9,9 +9,12 @@ TEST_DATA_DIR = Path(__file__).parent / "test_data"
 
 @pytest.fixture()
 def _mock_context():
-    def sub(soup=None, url="http://foo.bar"):
+    def sub(soup=None, url="http://foo.bar", status_code=200, headers=None):
         mock_request = MagicMock(url=url)
-        mock_context = MagicMock(BeautifulSoupCrawlingContext, request=mock_request)
+        mock_response = MagicMock(status_code=status_code, headers=headers or {})
+        mock_context = MagicMock(
+            BeautifulSoupCrawlingContext, request=mock_request, http_response=mock_response
+        )
         mock_context.log = MagicMock(
             info=MagicMock(),
             warning=MagicMock(),
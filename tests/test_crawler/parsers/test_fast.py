@@ -0,0 +1,81 @@
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock
+
+import pytest
+from bs4 import BeautifulSoup
+from pytest_mock import MockerFixture
+
+from crawler.handlers import collect_handler, fast_collect_handler
+from crawler.models import Event
+from crawler.parsers.fast import parse_page
+
+from ..conftest import TEST_DATA_DIR
+
+PAGES = sorted(TEST_DATA_DIR.glob("*.html"))
+
+
+async def _pushed_data(handler, context) -> str | None:
+    context.push_data = AsyncMock()
+    await handler(context)
+    if not context.push_data.await_count:
+        return None
+    return context.push_data.await_args.args[0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("page", PAGES, ids=[page.name for page in PAGES])
+async def test_fast_collect_handler_same_output(mocker: MockerFixture, _mock_context, page):
+    mock_datetime = mocker.patch("crawler.handlers.datetime")
+    mock_datetime.now.return_value = datetime.now(UTC)
+    html = page.read_bytes()
+    headers = {"etag": '"abc"'}
+
+    soup_context = _mock_context(soup=BeautifulSoup(html, features="html.parser"), headers=headers)
+    fast_context = _mock_context(headers=headers)
+    fast_context.parsed_content = html
+
+    expected = await _pushed_data(collect_handler, soup_context)
+    assert await _pushed_data(fast_collect_handler, fast_context) == expected
+    assert (expected is None) == page.name.startswith(("collect_no_events", "collect_unknown_type"))
+
+
+def test_parse_page():
+    html = (TEST_DATA_DIR / "collect_blood.html").read_bytes()
+
+    page = parse_page(html, "http://foo.bar")
+
+    assert page == {
+        "location": "Salle des fêtes de l'Hôtel de Ville",
+        "collect_type": "blood",
+        "events": [
+            Event(
+                date="21/10/2026",
+                slots=12,
+                schedules={"14h00": 3, "14h15": 2, "14h30": 0, "14h45": 1, "15h00": 6},
+            ),
+            Event(date="22/10/2026", slots=0, schedules={}),
+            Event(date="23/10/2026", slots=5, schedules={"16h00": 2, "16h30": 3}),
+        ],
+    }
+
+
+def test_parse_page_skip_failed_events():
+    html = (TEST_DATA_DIR / "collect_plasma.html").read_text()
+
+    page = parse_page(html, "http://foo.bar")
+
+    assert page["collect_type"] == "plasma"
+    assert page["events"] == [
+        Event(date="26/10/2026", slots=3, schedules={"08h30": 1, "09h30": 2})
+    ]
+
+
+@pytest.mark.parametrize("page", ["collect_no_events.html", "collect_unknown_type.html"])
+def test_parse_page_failed(page):
+    html = (TEST_DATA_DIR / page).read_bytes()
+
+    assert parse_page(html, "http://foo.bar") is None
+
+
+def test_parse_page_no_location():
+    assert parse_page("<html><body></body></html>", "http://foo.bar") is None
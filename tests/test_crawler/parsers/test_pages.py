@@ -0,0 +1,48 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from crawler.parsers.pages import available_cores, parse_page
+
+from ..conftest import TEST_DATA_DIR
+
+PAGES = sorted(TEST_DATA_DIR.glob("*.html"))
+
+
+def test_parse_page():
+    html = (TEST_DATA_DIR / "collect_plasma.html").read_bytes()
+
+    page = parse_page(html, "http://foo.bar")
+
+    assert page == {
+        "location": "Maison du Don & Plasma Saint-Grégoire",
+        "collect_type": "plasma",
+        "events": [{"date": "26/10/2026", "slots": 3, "schedules": {"08h30": 1, "09h30": 2}}],
+    }
+
+
+@pytest.mark.parametrize("page", ["collect_no_events.html", "collect_unknown_type.html"])
+def test_parse_page_failed(page):
+    html = (TEST_DATA_DIR / page).read_bytes()
+
+    assert parse_page(html, "http://foo.bar") is None
+
+
+@pytest.mark.parametrize("page", PAGES, ids=[page.name for page in PAGES])
+def test_parse_page_fast_parser(page):
+    html = page.read_bytes()
+
+    assert parse_page(html, "http://foo.bar", "selectolax") == parse_page(html, "http://foo.bar")
+
+
+def test_parse_page_process_pool():
+    html = (TEST_DATA_DIR / "collect_blood.html").read_bytes()
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        page = executor.submit(parse_page, html, "http://foo.bar").result()
+
+    assert page == parse_page(html, "http://foo.bar")
+
+
+def test_available_cores():
+    assert available_cores() >= 1
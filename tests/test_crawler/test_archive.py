@@ -0,0 +1,80 @@
+from datetime import UTC, datetime
+
+from crawler.archive import ArchivedPage, PageArchive, iter_archive, reparse_archive
+
+from .conftest import TEST_DATA_DIR
+
+
+def _page(i: int) -> ArchivedPage:
+    return ArchivedPage(
+        url=f"http://foo.bar/{i}",
+        content=f"<html>{i}</html>".encode(),
+        headers={"etag": f'"{i}"', "content-type": "text/html"},
+        fetched_at=datetime(2026, 10, 18, 8, i, tzinfo=UTC),
+    )
+
+
+def test_archive_round_trip(tmp_path):
+    pages = [_page(i) for i in range(3)]
+
+    page_archive = PageArchive(tmp_path)
+    for page in pages:
+        page_archive.write(page)
+    page_archive.close()
+
+    segments = list(tmp_path.iterdir())
+    assert len(segments) == 1
+    assert segments[0].name.endswith(".warc.zst")
+    assert list(iter_archive([tmp_path])) == pages
+
+
+def test_archive_segments(tmp_path):
+    page_archive = PageArchive(tmp_path, segment_bytes=1)
+    for i in range(3):
+        page_archive.write(_page(i))
+    page_archive.close()
+
+    assert len(list(tmp_path.iterdir())) == 3
+    assert [page.url for page in iter_archive([tmp_path])] == [f"http://foo.bar/{i}" for i in range(3)]
+
+
+def test_archive_truncated_segment(tmp_path):
+    page_archive = PageArchive(tmp_path)
+    for i in range(2):
+        page_archive.write(_page(i))
+    page_archive.close()
+    segment = next(tmp_path.iterdir())
+    segment.write_bytes(segment.read_bytes()[:-10])
+
+    # Pages before the truncated one are still read
+    assert [page.url for page in iter_archive([segment])] == ["http://foo.bar/0"]
+
+
+def test_reparse_archive(tmp_path):
+    page_archive = PageArchive(tmp_path)
+    for path in sorted(TEST_DATA_DIR.glob("*.html")):
+        page = ArchivedPage(
+            url=f"http://foo.bar/{path.stem}",
+            content=path.read_bytes(),
+            headers={"etag": '"abc"'},
+            fetched_at=datetime(2026, 10, 18, 8, tzinfo=UTC),
+        )
+        page_archive.write(page)
+    page_archive.close()
+
+    results = reparse_archive([tmp_path], processes=0)
+
+    # Pages without events or with an unknown collect type aren't pushed by the crawler either
+    assert [result["url"] for result in results] == [
+        "http://foo.bar/collect_blood",
+        "http://foo.bar/collect_plasma",
+    ]
+    assert results[1] == {
+        "url": "http://foo.bar/collect_plasma",
+        "location": "Maison du Don & Plasma Saint-Grégoire",
+        "collect_type": "plasma",
+        "time": "2026-10-18T08:00:00Z",
+        "events": [{"date": "26/10/2026", "slots": 3, "schedules": {"08h30": 1, "09h30": 2}}],
+        "etag": '"abc"',
+        "last_modified": None,
+    }
@@ -1,13 +1,20 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from bs4 import BeautifulSoup
 from pytest_mock import MockerFixture
 
-from crawler.handlers import collect_handler
-from crawler.models import LocationEvents, Result
+from crawler.handlers import (
+    collect_handler,
+    collect_page,
+    fast_collect_handler,
+    make_handler,
+    pool_collect_handler,
+)
+from crawler.models import LocationEvents, PageNotModified, Result
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -80,6 +87,193 @@ async def test_start_crawler_success(mocker: MockerFixture, _mock_context, mock_
         ).model_dump_json()
     )
 
+@pytest.mark.asyncio
+async def test_start_crawler_validators(_mock_context, mock_html):
+    mock_soup = BeautifulSoup(mock_html, features="html.parser")
+    mock_context = _mock_context(
+        soup=mock_soup,
+        headers={"etag": '"abc"', "last-modified": "Sat, 18 Oct 2026 08:00:00 GMT"},
+    )
+    mock_context.push_data = AsyncMock()
+
+    await collect_handler(mock_context)
+
+    result = LocationEvents.model_validate_json(mock_context.push_data.await_args.args[0])
+    assert result.etag == '"abc"'
+    assert result.last_modified == "Sat, 18 Oct 2026 08:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_start_crawler_not_modified(mocker: MockerFixture, _mock_context):
+    mock_context = _mock_context(status_code=304)
+    mock_context.push_data = AsyncMock()
+    mock_parse_location = mocker.patch("crawler.handlers.parse_location")
+
+    await collect_handler(mock_context)
+
+    mock_parse_location.assert_not_called()
+    result = PageNotModified.model_validate_json(mock_context.push_data.await_args.args[0])
+    assert result.url == mock_context.request.url
+
+
+@pytest.mark.asyncio
+async def test_fast_collect_handler_success(mocker: MockerFixture, _mock_context, mock_html):
+    mock_context = _mock_context(url="http://efscollect.fr")
+    mock_context.parsed_content = mock_html.encode()
+    mock_context.push_data = AsyncMock()
+    soup_context = _mock_context(
+        soup=BeautifulSoup(mock_html, features="html.parser"), url="http://efscollect.fr"
+    )
+    soup_context.push_data = AsyncMock()
+    now = datetime.now(UTC)
+    mock_datetime = mocker.patch("crawler.handlers.datetime")
+    mock_datetime.now.return_value = now
+
+    await fast_collect_handler(mock_context)
+    await collect_handler(soup_context)
+
+    mock_context.push_data.assert_awaited_once_with(soup_context.push_data.await_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_fast_collect_handler_not_modified(mocker: MockerFixture, _mock_context):
+    mock_context = _mock_context(status_code=304)
+    mock_context.push_data = AsyncMock()
+    mock_parse_page = mocker.patch("crawler.handlers.fast.parse_page")
+
+    await fast_collect_handler(mock_context)
+
+    mock_parse_page.assert_not_called()
+    mock_context.push_data.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_fast_collect_handler_failed_page(mocker: MockerFixture, _mock_context):
+    mock_context = _mock_context()
+    mock_context.parsed_content = b"<html></html>"
+    mock_context.push_data = AsyncMock()
+    mocker.patch("crawler.handlers.fast.parse_page", return_value=None)
+
+    await fast_collect_handler(mock_context)
+
+    mock_context.push_data.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_pool_collect_handler_success(mocker: MockerFixture, _mock_context, mock_html):
+    mock_context = _mock_context(url="http://efscollect.fr")
+    mock_context.parsed_content = mock_html.encode()
+    mock_context.push_data = AsyncMock()
+    soup_context = _mock_context(
+        soup=BeautifulSoup(mock_html, features="html.parser"), url="http://efscollect.fr"
+    )
+    soup_context.push_data = AsyncMock()
+    mock_datetime = mocker.patch("crawler.handlers.datetime")
+    mock_datetime.now.return_value = datetime.now(UTC)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        await pool_collect_handler(executor, "html.parser")(mock_context)
+    await collect_handler(soup_context)
+
+    mock_context.push_data.assert_awaited_once_with(soup_context.push_data.await_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_pool_collect_handler_not_modified(mocker: MockerFixture, _mock_context):
+    mock_context = _mock_context(status_code=304)
+    mock_context.push_data = AsyncMock()
+    executor = MagicMock()
+
+    await pool_collect_handler(executor, "html.parser")(mock_context)
+
+    executor.submit.assert_not_called()
+    mock_context.push_data.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_make_handler_sink(mocker: MockerFixture, _mock_context, mock_html):
+    mock_context = _mock_context(
+        soup=BeautifulSoup(mock_html, features="html.parser"), url="http://efscollect.fr"
+    )
+    mock_context.push_data = AsyncMock()
+    sink = AsyncMock()
+
+    await make_handler(collect_page, sink)(mock_context)
+
+    mock_context.push_data.assert_not_awaited()
+    sink.assert_awaited_once()
+    result = sink.await_args.args[0]
+    assert isinstance(result, LocationEvents)
+    assert result.url == "http://efscollect.fr"
+    assert len(result.events) == 2
+
+
+@pytest.mark.asyncio
+async def test_make_handler_sink_not_modified(_mock_context):
+    mock_context = _mock_context(status_code=304, url="http://efscollect.fr")
+    sink = AsyncMock()
+
+    await make_handler(collect_page, sink)(mock_context)
+
+    sink.assert_awaited_once_with(PageNotModified(url="http://efscollect.fr"))
+
+
+@pytest.mark.asyncio
+async def test_make_handler_failed_page(mocker: MockerFixture, _mock_context):
+    mock_context = _mock_context(url="http://efscollect.fr")
+    sink = AsyncMock()
+    mocker.patch(
+        "crawler.handlers.parse_location", return_value=Result(success=False, error="foo")
+    )
+
+    await make_handler(collect_page, sink)(mock_context)
+
+    sink.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_make_handler_archive(_mock_context, mock_html):
+    mock_context = _mock_context(
+        soup=BeautifulSoup(mock_html, features="html.parser"),
+        url="http://efscollect.fr",
+        headers={"etag": '"abc"'},
+    )
+    mock_context.http_response.read.return_value = mock_html.encode()
+    mock_context.push_data = AsyncMock()
+    archive = MagicMock()
+
+    await make_handler(collect_page, archive=archive)(mock_context)
+
+    page = archive.write.call_args.args[0]
+    assert page.url == "http://efscollect.fr"
+    assert page.content == mock_html.encode()
+    assert page.headers == {"etag": '"abc"'}
+    mock_context.push_data.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_make_handler_archive_error(_mock_context, mock_html):
+    mock_context = _mock_context(soup=BeautifulSoup(mock_html, features="html.parser"))
+    mock_context.push_data = AsyncMock()
+    archive = MagicMock()
+    archive.write.side_effect = OSError("disk full")
+
+    await make_handler(collect_page, archive=archive)(mock_context)
+
+    # The page is processed even if it couldn't be archived
+    mock_context.push_data.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_make_handler_archive_not_modified(_mock_context):
+    mock_context = _mock_context(status_code=304)
+    archive = MagicMock()
+
+    await make_handler(collect_page, archive=archive)(mock_context)
+
+    archive.write.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_start_crawler_error(mocker: MockerFixture, _mock_context, mock_html):
     mock_soup = BeautifulSoup(mock_html, features="html.parser")
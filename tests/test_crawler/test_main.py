@@ -0,0 +1,81 @@
+import asyncio
+from contextlib import aclosing
+from unittest.mock import MagicMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from crawler.main import iter_crawler
+
+
+class _Crawler:
+    """Crawler sending a result to the sink for each url"""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.stop = MagicMock()
+        self.sent = []
+
+    async def run(self, urls):
+        for url in urls:
+            if self.stop.called:
+                return
+            await self.sink(url)
+            self.sent.append(url)
+            await asyncio.sleep(0)
+
+
+@pytest.fixture()
+def mock_build_crawler(mocker: MockerFixture):
+    executor = MagicMock()
+    crawlers = []
+
+    def build(parser, parse_processes, sink=None, **options):
+        crawlers.append(_Crawler(sink))
+        return crawlers[-1], executor
+
+    mock = mocker.patch("crawler.main._build_crawler", side_effect=build)
+    mock.crawlers = crawlers
+    mock.executor = executor
+    return mock
+
+
+@pytest.mark.asyncio
+async def test_iter_crawler(mock_build_crawler):
+    results = [result async for result in iter_crawler(["a", "b", "c"], parse_processes=2)]
+
+    assert results == ["a", "b", "c"]
+    assert mock_build_crawler.call_args.args == ("html.parser", 2)
+    mock_build_crawler.executor.shutdown.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_iter_crawler_break(mock_build_crawler):
+    async with aclosing(iter_crawler(["a", "b", "c"])) as results:
+        async for result in results:
+            break
+
+    assert result == "a"
+    mock_build_crawler.crawlers[0].stop.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_iter_crawler_queue_size(mock_build_crawler):
+    async with aclosing(iter_crawler(["a", "b", "c", "d"], queue_size=1)) as results:
+        result = await anext(results)
+        await asyncio.sleep(0.01)
+
+        # "c" waits for "b" to be consumed
+        assert mock_build_crawler.crawlers[0].sent == ["a", "b"]
+
+    assert result == "a"
+    mock_build_crawler.crawlers[0].stop.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_iter_crawler_error(mocker: MockerFixture, mock_build_crawler):
+    mocker.patch.object(_Crawler, "run", side_effect=Exception("foo"))
+
+    results = [result async for result in iter_crawler(["a"])]
+
+    assert results == []